@@ -10,39 +10,66 @@ import base64
 from io import BytesIO
 import os
 import sys
-
-
-def load_data():
-    """Загрузка всех необходимых данных"""
+import time
+
+from src.loader import DataLoadError, DataSource, DataSourceNotFoundError, load_sources
+from src.cache import ResultCache, cached_stage, data_version
+from src.change_points import change_point_alerts, merge_alerts
+from src.data_processor import SENSOR_METRICS, compute_block_stats, quantile_label
+from src.sketches import COMFORT_QUANTILES, build_metric_sketches
+from src.visualization import CHART_VIEWS, DEFAULT_POINT_BUDGET, decimate_view
+from src.templating import (escape_column, format_column, format_datetime_column, load_template,
+                            page_numbers, pagination_controls, read_static, render_context)
+
+
+# Пути относительно корня проекта, а не рабочей папки
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'src', 'data')
+REPORTS_DIR = os.path.join(BASE_DIR, 'reports')
+
+
+def dashboard_sources(data_dir=DATA_DIR, reports_dir=REPORTS_DIR, timeout=30.0):
+    """Источники данных дашборда: основные данные обязательны, результаты ML - нет"""
+    return [
+        DataSource('sensors', os.path.join(data_dir, 'sensors_data.csv'), parse_dates=['timestamp'], timeout=timeout),
+        DataSource('energy', os.path.join(data_dir, 'energy_data.csv'), parse_dates=['timestamp'], timeout=timeout),
+        DataSource('anomalies', os.path.join(reports_dir, 'temperature_anomalies.csv'),
+                   required=False, parse_dates=['timestamp'], timeout=timeout),
+        DataSource('recommendations', os.path.join(reports_dir, 'system_recommendations.csv'),
+                   required=False, timeout=timeout)
+    ]
+
+
+def load_data(data_dir=DATA_DIR, reports_dir=REPORTS_DIR, timeout=30.0):
+    """
+    Загрузка всех необходимых данных
+
+    Источники читаются одновременно, поэтому время загрузки определяется
+    самым медленным из них.
+
+    Args:
+        data_dir: Папка с данными датчиков и энергии
+        reports_dir: Папка с результатами ML
+        timeout: Тайм-аут загрузки каждого источника, с
+
+    Returns:
+        Словарь с sensors, energy, anomalies, recommendations или None,
+        если основные данные не загрузились
+    """
     print("📂 Загрузка данных...")
 
-    data = {}
-
+    start = time.perf_counter()
     try:
-        # Основные данные
-        data['sensors'] = pd.read_csv('C:/Users/andre/Project_cybernetika/src/data/sensors_data.csv', parse_dates=['timestamp'])
-        data['energy'] = pd.read_csv('C:/Users/andre/Project_cybernetika/src/data/energy_data.csv', parse_dates=['timestamp'])
-        print("✅ Основные данные загружены")
-    except FileNotFoundError as e:
+        data, _ = load_sources(dashboard_sources(data_dir, reports_dir, timeout))
+    except DataSourceNotFoundError as e:
         print(f"❌ Ошибка: {e}")
         print("   Сначала запустите генерацию данных")
         return None
+    except DataLoadError as e:
+        print(f"❌ Ошибка: {e}")
+        return None
 
-    # ML результаты (если есть)
-    try:
-        data['anomalies'] = pd.read_csv('C:/Users/andre/Project_cybernetika/reports/temperature_anomalies.csv')
-        print("✅ Аномалии загружены")
-    except:
-        data['anomalies'] = pd.DataFrame()
-        print("⚠️  Аномалии не найдены")
-
-    try:
-        data['recommendations'] = pd.read_csv('C:/Users/andre/Project_cybernetika/reports/system_recommendations.csv')
-        print("✅ Рекомендации загружены")
-    except:
-        data['recommendations'] = pd.DataFrame()
-        print("⚠️  Рекомендации не найдены")
-
+    print(f"✅ Данные загружены за {time.perf_counter() - start:.2f} с")
     return data
 
 
@@ -51,10 +78,9 @@ def calculate_metrics(sensors):
     if len(sensors) == 0:
         return {}
 
-    avg_temp = sensors['temperature'].mean()
-    avg_humidity = sensors['humidity'].mean()
-    avg_co2 = sensors['co2'].mean()
-    avg_light = sensors['light_level'].mean()
+    # Средние всех метрик за один проход по числовому блоку
+    stats = compute_block_stats(sensors[SENSOR_METRICS].to_numpy(dtype=float), quantiles=())
+    avg_temp, avg_humidity, avg_co2, avg_light = stats['mean']
 
     # Определяем статусы
     def get_status_and_color(value, good_range, warning_range=None):
@@ -87,31 +113,71 @@ def calculate_metrics(sensors):
     else:
         light_status, light_color = "❌ Очень темно", "danger"
 
+    # Процентили p5/p50/p95 по KLL-скетчам (ограниченная память на длинной истории)
+    percentiles = {}
+    for col, sketch in build_metric_sketches(sensors, SENSOR_METRICS).items():
+        values = sketch.quantiles(COMFORT_QUANTILES)
+        percentiles[col] = {quantile_label(q): v for q, v in zip(COMFORT_QUANTILES, values)}
+
     return {
-        'temperature': {'value': avg_temp, 'status': temp_status, 'color': temp_color},
-        'humidity': {'value': avg_humidity, 'status': humidity_status, 'color': humidity_color},
-        'co2': {'value': avg_co2, 'status': co2_status, 'color': co2_color},
-        'light': {'value': avg_light, 'status': light_status, 'color': light_color}
+        'temperature': {'value': avg_temp, 'status': temp_status, 'color': temp_color,
+                        'percentiles': percentiles['temperature']},
+        'humidity': {'value': avg_humidity, 'status': humidity_status, 'color': humidity_color,
+                     'percentiles': percentiles['humidity']},
+        'co2': {'value': avg_co2, 'status': co2_status, 'color': co2_color,
+                'percentiles': percentiles['co2']},
+        'light': {'value': avg_light, 'status': light_status, 'color': light_color,
+                  'percentiles': percentiles['light_level']}
     }
 
 
-def create_temperature_chart(sensors):
-    """Создает график температуры"""
+def format_percentiles(metric, fmt='.1f'):
+    """Строка процентилей для карточки метрики"""
+    percentiles = metric.get('percentiles')
+    if not percentiles:
+        return ''
+    return ' · '.join(f"{name}: {value:{fmt}}" for name, value in percentiles.items())
+
+
+def create_temperature_chart(sensors, view='day', anomalies=None, budget=DEFAULT_POINT_BUDGET):
+    """
+    Создает график температуры за период
+
+    Ряд прореживается min-max до бюджета точек, поэтому график за год
+    строится так же быстро, как за сутки, а пики не теряются.
+
+    Args:
+        sensors: Данные датчиков
+        view: Период графика (ключ CHART_VIEWS)
+        anomalies: Таблица аномалий; их точки сохраняются и выделяются
+        budget: Бюджет точек графика
+    """
     if len(sensors) == 0:
         return ""
 
+    keep = None
+    if anomalies is not None and len(anomalies) > 0 and 'timestamp' in anomalies:
+        keep = sensors['timestamp'].isin(anomalies['timestamp']).to_numpy()
+
+    temp_data, n_window = decimate_view(sensors, 'temperature', view, budget, keep=keep)
+    _, label = CHART_VIEWS[view]
+
     fig, ax = plt.subplots(figsize=(10, 4))
 
-    # Берем последние 200 записей
-    temp_data = sensors.tail(200)
     ax.plot(temp_data['timestamp'], temp_data['temperature'],
             color='red', linewidth=1.5, alpha=0.7)
 
+    if keep is not None:
+        marked = temp_data[temp_data['timestamp'].isin(anomalies['timestamp'])]
+        if len(marked) > 0:
+            ax.scatter(marked['timestamp'], marked['temperature'],
+                       color='black', s=15, zorder=3, label='Аномалии')
+
     # Линии нормы
     ax.axhline(y=20, color='green', linestyle='--', alpha=0.5, label='Нижняя норма (20°C)')
     ax.axhline(y=24, color='green', linestyle='--', alpha=0.5, label='Верхняя норма (24°C)')
 
-    ax.set_title('Температура в помещении (последние 200 измерений)', fontsize=12)
+    ax.set_title(f'Температура в помещении ({label}, {len(temp_data):,} из {n_window:,} точек)', fontsize=12)
     ax.set_xlabel('Время')
     ax.set_ylabel('Температура (°C)')
     ax.legend()
@@ -130,6 +196,35 @@ def create_temperature_chart(sensors):
     return chart_base64
 
 
+def generate_temperature_views(sensors, anomalies=None, budget=DEFAULT_POINT_BUDGET):
+    """
+    Генерирует вкладки графиков температуры за сутки, неделю, месяц и год
+
+    Args:
+        sensors: Данные датчиков
+        anomalies: Таблица аномалий
+        budget: Бюджет точек каждого графика
+    """
+    views = list(CHART_VIEWS)
+    pane_ids = [f'temp-{view}' for view in views]
+    labels = [CHART_VIEWS[view][1].capitalize() for view in views]
+    active = [' active' if i == 0 else '' for i in range(len(views))]
+
+    tabs = load_template('chart_view_tab.html').render_rows({
+        'active': active,
+        'pane_id': pane_ids,
+        'label': labels
+    })
+    panes = load_template('chart_view_pane.html').render_rows({
+        'active_pane': [' show active' if flag else '' for flag in active],
+        'pane_id': pane_ids,
+        'label': labels,
+        'chart': [create_temperature_chart(sensors, view, anomalies, budget) for view in views]
+    })
+
+    return render_context('chart_views.html', {'tabs': tabs, 'panes': panes})
+
+
 def create_energy_chart(energy):
     """Создает график энергопотребления"""
     if len(energy) == 0:
@@ -137,8 +232,8 @@ def create_energy_chart(energy):
 
     fig, ax = plt.subplots(figsize=(10, 4))
 
-    energy['hour'] = energy['timestamp'].dt.hour
-    energy_by_hour = energy.groupby('hour')['electricity_kwh'].mean()
+    # Час считается без добавления колонки во входную таблицу (ее версия - ключ кэша)
+    energy_by_hour = energy.groupby(energy['timestamp'].dt.hour.rename('hour'))['electricity_kwh'].mean()
 
     bars = ax.bar(energy_by_hour.index, energy_by_hour.values,
                   color='green', alpha=0.7, edgecolor='black')
@@ -175,8 +270,15 @@ def create_energy_chart(energy):
     return chart_base64
 
 
-def generate_anomalies_table(anomalies):
-    """Генерирует HTML таблицу аномалий"""
+def generate_anomalies_table(anomalies, limit=5, page_size=0):
+    """
+    Генерирует HTML таблицу аномалий
+
+    Args:
+        anomalies: Таблица аномалий
+        limit: Сколько последних аномалий показать (None - все)
+        page_size: Строк на странице в браузере (0 - без пагинации)
+    """
     if len(anomalies) == 0:
         return '''
         <div class="alert alert-success">
@@ -184,59 +286,52 @@ def generate_anomalies_table(anomalies):
         </div>
         '''
 
-    # Берем последние 5 аномалий
-    recent_anomalies = anomalies.tail(5).copy()
-    recent_anomalies['timestamp'] = pd.to_datetime(recent_anomalies['timestamp'])
-
-    table_html = '''
-    <div class="table-responsive">
-        <table class="table table-sm table-hover">
-            <thead class="table-dark">
-                <tr>
-                    <th>Дата</th>
-                    <th>Время</th>
-                    <th>Температура</th>
-                    <th>Тип</th>
-                    <th>Отклонение</th>
-                </tr>
-            </thead>
-            <tbody>
-    '''
-
-    for _, row in recent_anomalies.iterrows():
-        anomaly_type = row.get('anomaly_type', 'Неизвестно')
-        deviation = row.get('deviation', 0)
-        temp = row.get('temperature', 0)
-
-        # Определяем иконку
-        if 'холодно' in str(anomaly_type).lower():
-            icon = '❄️'
-            badge_class = 'bg-primary'
-        else:
-            icon = '🔥'
-            badge_class = 'bg-danger'
-
-        table_html += f'''
-                <tr>
-                    <td>{row['timestamp'].strftime('%d.%m.%Y')}</td>
-                    <td>{row['timestamp'].strftime('%H:%M')}</td>
-                    <td><strong>{temp:.1f}°C</strong></td>
-                    <td><span class="badge {badge_class}">{icon} {anomaly_type}</span></td>
-                    <td>{deviation:.1f}°C</td>
-                </tr>
-        '''
-
-    table_html += '''
-            </tbody>
-        </table>
-    </div>
-    '''
-
-    return table_html
-
-
-def generate_recommendations_list(recommendations):
-    """Генерирует HTML список рекомендаций"""
+    # Берем последние аномалии
+    recent_anomalies = anomalies.tail(limit) if limit else anomalies
+    timestamps = recent_anomalies['timestamp']
+    anomaly_type = recent_anomalies.get('anomaly_type', pd.Series('Неизвестно', index=recent_anomalies.index))
+    cold = anomaly_type.astype(str).str.lower().str.contains('холодно').to_numpy()
+    # Смены режима (change_point_alerts) выделяются отдельно и могут быть в единицах энергии
+    regime = anomaly_type.astype(str).str.startswith('смена режима').to_numpy()
+    units = recent_anomalies.get('unit', pd.Series('°C', index=recent_anomalies.index)).fillna('°C')
+    temperature = format_column(recent_anomalies.get('temperature', 0), '.1f')
+    deviation = np.asarray(recent_anomalies.get('deviation', 0), dtype=float)
+
+    rows = load_template('anomaly_row.html').render_rows({
+        'page': page_numbers(len(recent_anomalies), page_size),
+        'date': format_datetime_column(timestamps, '%d.%m.%Y'),
+        'time': format_datetime_column(timestamps, '%H:%M'),
+        'temperature': [value if value == '—' else value + '°C' for value in temperature],
+        'badge_class': np.select([regime, cold], ['bg-warning text-dark', 'bg-primary'], 'bg-danger').tolist(),
+        'icon': np.select([regime & (deviation < 0), regime, cold], ['📉', '📈', '❄️'], '🔥').tolist(),
+        'anomaly_type': escape_column(anomaly_type),
+        'deviation': [value if value == '—' else value + unit for value, unit in
+                      zip(format_column(deviation, '.1f'), escape_column(units))]
+    })
+
+    return render_context('anomalies_table.html', {
+        'table_id': 'anomalies-table',
+        'rows': rows,
+        'pagination': pagination_controls('anomalies-table', len(recent_anomalies), page_size)
+    })
+
+
+# Стили рекомендаций по приоритету: (рамка, значок, текст)
+PRIORITY_STYLES = {
+    'Высокий': ('border-danger', 'bg-danger', 'text-danger'),
+    'Средний': ('border-warning', 'bg-warning', 'text-warning'),
+    'Низкий': ('border-success', 'bg-success', 'text-success')
+}
+
+
+def generate_recommendations_list(recommendations, page_size=0):
+    """
+    Генерирует HTML список рекомендаций
+
+    Args:
+        recommendations: Таблица рекомендаций
+        page_size: Элементов на странице в браузере (0 - без пагинации)
+    """
     if len(recommendations) == 0:
         return '''
         <div class="alert alert-info">
@@ -244,46 +339,77 @@ def generate_recommendations_list(recommendations):
         </div>
         '''
 
-    list_html = '<div class="list-group">'
-
-    for _, row in recommendations.iterrows():
-        priority = row.get('Приоритет', 'Средний')
-        parameter = row.get('Параметр', 'Неизвестно')
-        recommendation = row.get('Рекомендация', 'Нет рекомендации')
-        status = row.get('Статус', 'Неизвестно')
-
-        # Определяем стиль по приоритету
-        if priority == 'Высокий':
-            border_class = 'border-danger'
-            badge_class = 'bg-danger'
-            text_class = 'text-danger'
-        elif priority == 'Средний':
-            border_class = 'border-warning'
-            badge_class = 'bg-warning'
-            text_class = 'text-warning'
-        else:
-            border_class = 'border-success'
-            badge_class = 'bg-success'
-            text_class = 'text-success'
-
-        list_html += f'''
-        <div class="list-group-item {border_class} {text_class}">
-            <div class="d-flex w-100 justify-content-between">
-                <h6 class="mb-1">{parameter}</h6>
-                <span class="badge {badge_class}">{priority}</span>
-            </div>
-            <p class="mb-1">{recommendation}</p>
-            <small>Статус: {status}</small>
-        </div>
-        '''
-
-    list_html += '</div>'
-
-    return list_html
-
-
-def generate_dashboard(data):
-    """Генерирует полный HTML дашборд"""
+    def column(name, default):
+        if name in recommendations.columns:
+            return recommendations[name].fillna(default).astype(str)
+        return pd.Series(default, index=recommendations.index)
+
+    priority = column('Приоритет', 'Средний')
+    parameter = column('Параметр', 'Неизвестно')
+
+    # Рекомендации движка правил относятся к конкретной зоне и окну
+    if 'zone' in recommendations.columns:
+        has_zone = recommendations['zone'].notna()
+        parameter = parameter.where(~has_zone, parameter + ' · ' + recommendations['zone'].astype(str))
+
+    styles = [PRIORITY_STYLES.get(value, PRIORITY_STYLES['Низкий']) for value in priority]
+    border_class, badge_class, text_class = (list(values) for values in zip(*styles))
+
+    items = load_template('recommendation_item.html').render_rows({
+        'page': page_numbers(len(recommendations), page_size),
+        'border_class': border_class,
+        'text_class': text_class,
+        'badge_class': badge_class,
+        'parameter': escape_column(parameter),
+        'priority': escape_column(priority),
+        'recommendation': escape_column(column('Рекомендация', 'Нет рекомендации')),
+        'status': escape_column(column('Статус', 'Неизвестно'))
+    })
+
+    return render_context('recommendations_list.html', {
+        'list_id': 'recommendations-list',
+        'items': items,
+        'pagination': pagination_controls('recommendations-list', len(recommendations), page_size)
+    })
+
+
+# Карточки метрик: (ключ метрики, заголовок, иконка, формат значения, норма, формат процентилей)
+METRIC_CARDS = [
+    ('temperature', 'Температура', 'bi-thermometer-half', '{:.1f}°C', 'Норма: 20-24°C', '.1f'),
+    ('humidity', 'Влажность', 'bi-droplet', '{:.1f}%', 'Норма: 40-60%', '.1f'),
+    ('co2', 'Уровень CO₂', 'bi-cloud', '{:.0f} ppm', 'Хорошо: ≤600 ppm', '.0f'),
+    ('light', 'Освещение', 'bi-brightness-high', '{:.0f} lux', 'Норма: ≥300 lux', '.0f')
+]
+
+
+def generate_metric_cards(metrics):
+    """Генерирует HTML карточек ключевых метрик"""
+    card = load_template('metric_card.html')
+    cards = []
+    for key, title, icon, value_fmt, norm, percentile_fmt in METRIC_CARDS:
+        metric = metrics.get(key, {})
+        cards.append(card.render({
+            'color': metric.get('color', 'light'),
+            'icon': icon,
+            'title': title,
+            'value': value_fmt.format(metric.get('value', 0)),
+            'norm': norm,
+            'percentiles': format_percentiles(metric, percentile_fmt),
+            'status': metric.get('status', 'Нет данных')
+        }))
+    return ''.join(cards)
+
+
+def generate_dashboard(data, anomaly_limit=5, page_size=0, cache=None):
+    """
+    Генерирует полный HTML дашборд
+
+    Args:
+        data: Словарь с sensors, energy, anomalies, recommendations
+        anomaly_limit: Сколько последних аномалий показать (None - все)
+        page_size: Строк на странице для таблиц аномалий и рекомендаций (0 - без пагинации)
+        cache: ResultCache для метрик, смен режима и графиков (None - без кэша)
+    """
     print("🎨 Генерация HTML дашборда...")
 
     # Подготовка данных
@@ -292,418 +418,41 @@ def generate_dashboard(data):
     anomalies = data['anomalies']
     recommendations = data['recommendations']
 
-    # Рассчитываем метрики
-    metrics = calculate_metrics(sensors)
-
-    # Создаем графики
-    temp_chart = create_temperature_chart(sensors)
-    energy_chart = create_energy_chart(energy)
-
-    # Генерируем таблицы и списки
-    anomalies_table = generate_anomalies_table(anomalies)
-    recommendations_list = generate_recommendations_list(recommendations)
-
-    # Получаем значения метрик с проверками
-    temp_metrics = metrics.get('temperature', {})
-    humidity_metrics = metrics.get('humidity', {})
-    co2_metrics = metrics.get('co2', {})
-    light_metrics = metrics.get('light', {})
-
-    temp_color = temp_metrics.get('color', 'light')
-    humidity_color = humidity_metrics.get('color', 'light')
-    co2_color = co2_metrics.get('color', 'light')
-    light_color = light_metrics.get('color', 'light')
-
-    temp_value = temp_metrics.get('value', 0)
-    humidity_value = humidity_metrics.get('value', 0)
-    co2_value = co2_metrics.get('value', 0)
-    light_value = light_metrics.get('value', 0)
-
-    temp_status = temp_metrics.get('status', 'Нет данных')
-    humidity_status = humidity_metrics.get('status', 'Нет данных')
-    co2_status = co2_metrics.get('status', 'Нет данных')
-    light_status = light_metrics.get('status', 'Нет данных')
-
-    # Генерируем HTML
-    html = f'''<!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>🏢 Дашборд умного здания</title>
-
-    <!-- Bootstrap 5 -->
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <!-- Bootstrap Icons -->
-    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.8.1/font/bootstrap-icons.css">
-
-    <style>
-        :root {{
-            --primary-color: #4361ee;
-            --secondary-color: #3a0ca3;
-            --success-color: #4cc9f0;
-            --warning-color: #f72585;
-            --danger-color: #7209b7;
-        }}
-
-        body {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            background-attachment: fixed;
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            min-height: 100vh;
-            padding: 20px 0;
-        }}
-
-        .dashboard-container {{
-            max-width: 1400px;
-            margin: 0 auto;
-        }}
-
-        .header-card {{
-            background: rgba(255, 255, 255, 0.95);
-            backdrop-filter: blur(10px);
-            border-radius: 20px;
-            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.2);
-            margin-bottom: 30px;
-            overflow: hidden;
-        }}
-
-        .header-gradient {{
-            background: linear-gradient(90deg, var(--primary-color), var(--secondary-color));
-            color: white;
-            padding: 30px;
-            text-align: center;
-        }}
-
-        .metric-card {{
-            background: white;
-            border-radius: 15px;
-            padding: 25px;
-            margin-bottom: 20px;
-            box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
-            transition: all 0.3s ease;
-            border: none;
-            position: relative;
-            overflow: hidden;
-        }}
-
-        .metric-card:hover {{
-            transform: translateY(-10px);
-            box-shadow: 0 15px 30px rgba(0, 0, 0, 0.2);
-        }}
-
-        .metric-card::before {{
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            height: 5px;
-        }}
-
-        .metric-card.bg-success::before {{ background: var(--success-color); }}
-        .metric-card.bg-warning::before {{ background: var(--warning-color); }}
-        .metric-card.bg-danger::before {{ background: var(--danger-color); }}
-
-        .chart-container {{
-            background: white;
-            border-radius: 15px;
-            padding: 25px;
-            margin-bottom: 20px;
-            box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
-        }}
-
-        .section-title {{
-            color: var(--secondary-color);
-            border-bottom: 3px solid var(--primary-color);
-            padding-bottom: 10px;
-            margin-bottom: 20px;
-            font-weight: 600;
-        }}
-
-        .status-badge {{
-            font-size: 0.8em;
-            padding: 5px 12px;
-            border-radius: 20px;
-            font-weight: 500;
-        }}
-
-        .value-large {{
-            font-size: 2.5rem;
-            font-weight: 700;
-            margin: 10px 0;
-        }}
-
-        .update-time {{
-            font-size: 0.9em;
-            color: #6c757d;
-            background: rgba(255, 255, 255, 0.1);
-            padding: 5px 15px;
-            border-radius: 20px;
-            display: inline-block;
-        }}
-
-        .anomaly-row {{
-            border-left: 4px solid;
-            transition: all 0.3s;
-        }}
-
-        .anomaly-row:hover {{
-            background-color: rgba(255, 0, 0, 0.05);
-            transform: translateX(5px);
-        }}
-
-        .recommendation-item {{
-            border-left: 4px solid;
-            margin-bottom: 10px;
-            transition: all 0.3s;
-        }}
-
-        .recommendation-item:hover {{
-            transform: translateX(10px);
-            box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
-        }}
-
-        .footer {{
-            text-align: center;
-            color: white;
-            margin-top: 40px;
-            padding: 20px;
-            background: rgba(0, 0, 0, 0.2);
-            border-radius: 15px;
-        }}
-
-        .pulse {{
-            animation: pulse 2s infinite;
-        }}
-
-        @keyframes pulse {{
-            0% {{ opacity: 1; }}
-            50% {{ opacity: 0.7; }}
-            100% {{ opacity: 1; }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="dashboard-container">
-        <!-- Шапка -->
-        <div class="header-card">
-            <div class="header-gradient">
-                <h1 class="display-4"><i class="bi bi-building"></i> Дашборд умного здания</h1>
-                <p class="lead">Интеллектуальный мониторинг и анализ энергоэффективности</p>
-                <div class="update-time">
-                    <i class="bi bi-clock"></i> Обновлено: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}
-                </div>
-            </div>
-        </div>
-
-        <!-- Карточки с метриками -->
-        <div class="row">
-            <div class="col-lg-3 col-md-6">
-                <div class="metric-card bg-{temp_color}">
-                    <div class="d-flex justify-content-between align-items-start">
-                        <div>
-                            <h5><i class="bi bi-thermometer-half"></i> Температура</h5>
-                            <div class="value-large">{temp_value:.1f}°C</div>
-                            <small class="text-muted">Норма: 20-24°C</small>
-                        </div>
-                        <span class="status-badge bg-{temp_color}">
-                            {temp_status}
-                        </span>
-                    </div>
-                </div>
-            </div>
-
-            <div class="col-lg-3 col-md-6">
-                <div class="metric-card bg-{humidity_color}">
-                    <div class="d-flex justify-content-between align-items-start">
-                        <div>
-                            <h5><i class="bi bi-droplet"></i> Влажность</h5>
-                            <div class="value-large">{humidity_value:.1f}%</div>
-                            <small class="text-muted">Норма: 40-60%</small>
-                        </div>
-                        <span class="status-badge bg-{humidity_color}">
-                            {humidity_status}
-                        </span>
-                    </div>
-                </div>
-            </div>
-
-            <div class="col-lg-3 col-md-6">
-                <div class="metric-card bg-{co2_color}">
-                    <div class="d-flex justify-content-between align-items-start">
-                        <div>
-                            <h5><i class="bi bi-cloud"></i> Уровень CO₂</h5>
-                            <div class="value-large">{co2_value:.0f} ppm</div>
-                            <small class="text-muted">Хорошо: ≤600 ppm</small>
-                        </div>
-                        <span class="status-badge bg-{co2_color}">
-                            {co2_status}
-                        </span>
-                    </div>
-                </div>
-            </div>
-
-            <div class="col-lg-3 col-md-6">
-                <div class="metric-card bg-{light_color}">
-                    <div class="d-flex justify-content-between align-items-start">
-                        <div>
-                            <h5><i class="bi bi-brightness-high"></i> Освещение</h5>
-                            <div class="value-large">{light_value:.0f} lux</div>
-                            <small class="text-muted">Норма: ≥300 lux</small>
-                        </div>
-                        <span class="status-badge bg-{light_color}">
-                            {light_status}
-                        </span>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <!-- Графики -->
-        <div class="row">
-            <div class="col-lg-6">
-                <div class="chart-container">
-                    <h3 class="section-title"><i class="bi bi-graph-up"></i> Температура в реальном времени</h3>
-                    <img src="data:image/png;base64,{temp_chart}" class="img-fluid rounded" alt="График температуры">
-                    <div class="mt-3 text-center">
-                        <small class="text-muted">Последние 200 измерений | Зеленые линии - нормативные значения</small>
-                    </div>
-                </div>
-            </div>
-
-            <div class="col-lg-6">
-                <div class="chart-container">
-                    <h3 class="section-title"><i class="bi bi-lightning-charge"></i> Потребление энергии</h3>
-                    <img src="data:image/png;base64,{energy_chart}" class="img-fluid rounded" alt="График энергопотребления">
-                    <div class="mt-3 text-center">
-                        <small class="text-muted">Среднее потребление по часам | Красный столбец - пиковый час</small>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <!-- Аномалии и рекомендации -->
-        <div class="row">
-            <div class="col-lg-6">
-                <div class="chart-container">
-                    <h3 class="section-title"><i class="bi bi-exclamation-triangle"></i> Обнаруженные аномалии</h3>
-                    {anomalies_table}
-                </div>
-            </div>
-
-            <div class="col-lg-6">
-                <div class="chart-container">
-                    <h3 class="section-title"><i class="bi bi-lightbulb"></i> Рекомендации системы</h3>
-                    {recommendations_list}
-                </div>
-            </div>
-        </div>
-
-        <!-- Статистика системы -->
-        <div class="row mt-4">
-            <div class="col-12">
-                <div class="chart-container">
-                    <h3 class="section-title"><i class="bi bi-bar-chart"></i> Статистика системы</h3>
-                    <div class="row text-center">
-                        <div class="col-md-3">
-                            <div class="p-3 bg-light rounded">
-                                <h2>{len(sensors):,}</h2>
-                                <p class="mb-0"><i class="bi bi-cpu"></i> Записей с датчиков</p>
-                            </div>
-                        </div>
-                        <div class="col-md-3">
-                            <div class="p-3 bg-light rounded">
-                                <h2>{len(energy):,}</h2>
-                                <p class="mb-0"><i class="bi bi-lightning"></i> Записей энергии</p>
-                            </div>
-                        </div>
-                        <div class="col-md-3">
-                            <div class="p-3 bg-light rounded">
-                                <h2>{len(anomalies)}</h2>
-                                <p class="mb-0"><i class="bi bi-exclamation-circle"></i> Обнаруженных аномалий</p>
-                            </div>
-                        </div>
-                        <div class="col-md-3">
-                            <div class="p-3 bg-light rounded">
-                                <h2>{len(recommendations)}</h2>
-                                <p class="mb-0"><i class="bi bi-check-circle"></i> Рекомендаций</p>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
+    # Версии входных данных - ключи кэша этапов (хэшируются один раз)
+    if cache is not None:
+        sensors_version, energy_version, anomalies_version = (
+            data_version(sensors), data_version(energy), data_version(anomalies))
+    else:
+        sensors_version = energy_version = anomalies_version = None
 
-        <!-- Футер -->
-        <div class="footer">
-            <h5><i class="bi bi-code-slash"></i> Аналитическая система управления зданием</h5>
-            <p class="mb-2">Курсовой проект | Автоматический мониторинг и оптимизация</p>
-            <p class="mb-0">
-                <small>
-                    <span class="pulse"><i class="bi bi-circle-fill text-success"></i> Система активна</span> | 
-                    Ожидаемая экономия: 15-20% | Повышение комфорта: 25-30%
-                </small>
-            </p>
-        </div>
-    </div>
-
-    <!-- Bootstrap JS -->
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-
-    <script>
-        // Автоматическое обновление
-        let refreshTimer = 300; // 5 минут в секундах
-        const timerElement = document.createElement('div');
-        timerElement.className = 'update-time mt-2';
-        timerElement.innerHTML = '<i class="bi bi-arrow-clockwise"></i> Автообновление через: <span id="countdown">' + refreshTimer + '</span> сек';
-        document.querySelector('.update-time').parentNode.appendChild(timerElement);
-
-        function updateCountdown() {{
-            refreshTimer--;
-            document.getElementById('countdown').textContent = refreshTimer;
-
-            if (refreshTimer <= 0) {{
-                location.reload();
-            }}
-        }}
-
-        setInterval(updateCountdown, 1000);
-
-        // Анимация при наведении на метрики
-        document.querySelectorAll('.metric-card').forEach(card => {{
-            card.addEventListener('mouseenter', function() {{
-                this.style.transform = 'translateY(-10px) scale(1.02)';
-            }});
-
-            card.addEventListener('mouseleave', function() {{
-                this.style.transform = 'translateY(0) scale(1)';
-            }});
-        }});
-
-        // Подсветка активных элементов
-        document.querySelectorAll('.anomaly-row, .recommendation-item').forEach(el => {{
-            el.addEventListener('click', function() {{
-                this.classList.toggle('bg-light');
-            }});
-        }});
-
-        // Уведомление о новом обновлении
-        setTimeout(() => {{
-            const alert = document.createElement('div');
-            alert.className = 'alert alert-info alert-dismissible fade show position-fixed bottom-0 end-0 m-3';
-            alert.style.zIndex = '1000';
-            alert.innerHTML = `
-                <i class="bi bi-info-circle"></i> Система мониторинга активна. Данные обновляются автоматически.
-                <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-            `;
-            document.body.appendChild(alert);
-        }}, 3000);
-    </script>
-</body>
-</html>'''
-
-    return html
+    # Рассчитываем метрики
+    metrics = cached_stage(cache, 'metrics', [sensors_version], lambda: calculate_metrics(sensors))
+
+    # Смены режима энергопотребления и температуры зон дополняют таблицу аномалий
+    change_points = cached_stage(cache, 'change_points', [sensors_version, energy_version],
+                                 lambda: change_point_alerts(sensors, energy))
+    alerts = merge_alerts(anomalies, change_points)
+
+    temp_chart = cached_stage(cache, 'temperature_views', [sensors_version, anomalies_version],
+                              lambda: generate_temperature_views(sensors, anomalies),
+                              budget=DEFAULT_POINT_BUDGET, views=list(CHART_VIEWS))
+    energy_chart = cached_stage(cache, 'energy_chart', [energy_version], lambda: create_energy_chart(energy))
+
+    # Генерируем HTML из скомпилированного шаблона; CSS и JS читаются один раз на процесс
+    return render_context('dashboard.html', {
+        'css': read_static('dashboard.css'),
+        'js': read_static('dashboard.js'),
+        'updated': datetime.now().strftime('%d.%m.%Y %H:%M:%S'),
+        'metric_cards': generate_metric_cards(metrics),
+        'temp_chart': temp_chart,
+        'energy_chart': energy_chart,
+        'anomalies_table': generate_anomalies_table(alerts, anomaly_limit, page_size),
+        'recommendations_list': generate_recommendations_list(recommendations, page_size),
+        'sensor_count': f"{len(sensors):,}",
+        'energy_count': f"{len(energy):,}",
+        'anomaly_count': len(alerts),
+        'recommendation_count': len(recommendations)
+    })
 
 
 def main():
@@ -717,8 +466,12 @@ def main():
     if data is None:
         sys.exit(1)
 
-    # Генерируем дашборд
-    html_content = generate_dashboard(data)
+    # Генерируем дашборд; этапы с неизменными входными данными берутся из кэша
+    cache = ResultCache()
+    html_content = generate_dashboard(data, cache=cache)
+    stats = cache.stats()
+    print(f"💾 Кэш этапов: попаданий {stats['hits']}, промахов {stats['misses']}, "
+          f"{stats['entries']} записей, {stats['size_bytes'] / 1024 ** 2:.1f} МБ")
 
     # Сохраняем файл
     output_file = 'dashboard.html'
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# 🏙️ create_portfolio.py
+# Аналитика по портфелю зданий: дашборд каждого здания и сводный индекс
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from html import escape
+
+import numpy as np
+import pandas as pd
+
+from create_dashboard import calculate_metrics, generate_dashboard
+from src.cache import DEFAULT_CACHE_DIR, ResultCache, cached_stage, data_version
+from src.models import (detect_temperature_anomalies, fit_energy_model, forecast_energy,
+                        generate_building_recommendations, generate_recommendations)
+
+
+def find_buildings(portfolio_dir):
+    """Папки зданий: каждая содержит sensors_data.csv и energy_data.csv"""
+    buildings = []
+    for name in sorted(os.listdir(portfolio_dir)):
+        path = os.path.join(portfolio_dir, name)
+        if (os.path.isfile(os.path.join(path, 'sensors_data.csv'))
+                and os.path.isfile(os.path.join(path, 'energy_data.csv'))):
+            buildings.append((name, path))
+    return buildings
+
+
+def analyze_building(name, path, output_dir, cache_dir=None):
+    """
+    Полный анализ одного здания (выполняется в отдельном процессе)
+
+    Возвращает KPI здания и время каждого этапа в секундах. Если задан
+    cache_dir, этапы с неизменными данными берутся из дискового кэша.
+    """
+    timings = {}
+    cache = ResultCache(cache_dir) if cache_dir else None
+
+    def timed(stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    def load():
+        sensors = pd.read_csv(os.path.join(path, 'sensors_data.csv'), parse_dates=['timestamp'])
+        energy = pd.read_csv(os.path.join(path, 'energy_data.csv'), parse_dates=['timestamp'])
+        return sensors, energy
+
+    sensors, energy = timed('load', load)
+    versions = timed('fingerprint', lambda: (data_version(sensors), data_version(energy))) if cache else (None, None)
+    metrics = timed('metrics', cached_stage, cache, 'metrics', versions[:1], lambda: calculate_metrics(sensors))
+    anomalies = timed('anomalies', cached_stage, cache, 'temperature_anomalies', versions[:1],
+                      lambda: detect_temperature_anomalies(sensors), n_sigma=3.0)
+
+    def forecast():
+        model = fit_energy_model(energy)
+        start = energy['timestamp'].max() + pd.Timedelta(minutes=30)
+        return forecast_energy(start, hours=24, model=model)
+
+    energy_forecast = timed('forecast', cached_stage, cache, 'energy_forecast', versions[1:], forecast, hours=24)
+    recommendations = timed('recommendations', generate_building_recommendations, sensors, energy)
+    zone_recommendations = timed('zone_recommendations', generate_recommendations, sensors, energy)
+
+    def dashboard():
+        building_dir = os.path.join(output_dir, name)
+        os.makedirs(building_dir, exist_ok=True)
+        html = generate_dashboard({
+            'sensors': sensors,
+            'energy': energy,
+            'anomalies': anomalies,
+            'recommendations': recommendations
+        }, cache=cache)
+        with open(os.path.join(building_dir, 'dashboard.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
+        return os.path.join(name, 'dashboard.html')
+
+    dashboard_path = timed('dashboard', dashboard)
+
+    kpis = {
+        'building': name,
+        'dashboard': dashboard_path,
+        'readings': len(sensors),
+        'avg_temperature': metrics.get('temperature', {}).get('value', np.nan),
+        'avg_humidity': metrics.get('humidity', {}).get('value', np.nan),
+        'avg_co2': metrics.get('co2', {}).get('value', np.nan),
+        'avg_light': metrics.get('light', {}).get('value', np.nan),
+        'energy_kwh': energy['electricity_kwh'].sum(),
+        'forecast_24h_kwh': energy_forecast['forecast_kwh'].sum(),
+        'anomalies': len(anomalies),
+        'high_priority_recommendations': int((zone_recommendations['Приоритет'] == 'Высокий').sum()),
+        'zone_recommendations': len(zone_recommendations)
+    }
+    kpis.update({f'time_{stage}_sec': value for stage, value in timings.items()})
+    kpis['time_total_sec'] = sum(timings.values())
+    return kpis
+
+
+def aggregate_portfolio(kpis):
+    """Сводные KPI портфеля"""
+    weights = kpis['readings'].to_numpy(dtype=float)
+    return {
+        'Зданий': len(kpis),
+        'Показаний датчиков': int(kpis['readings'].sum()),
+        'Средняя температура, °C': float(np.average(kpis['avg_temperature'], weights=weights)),
+        'Средний CO2, ppm': float(np.average(kpis['avg_co2'], weights=weights)),
+        'Энергопотребление, кВт·ч': float(kpis['energy_kwh'].sum()),
+        'Прогноз на 24 ч, кВт·ч': float(kpis['forecast_24h_kwh'].sum()),
+        'Аномалий': int(kpis['anomalies'].sum()),
+        'Рекомендаций высокого приоритета': int(kpis['high_priority_recommendations'].sum())
+    }
+
+
+def generate_portfolio_index(kpis, summary, wall_time):
+    """HTML-индекс портфеля со ссылками на дашборды зданий"""
+    summary_rows = ''.join(
+        f'<tr><th>{escape(key)}</th><td>{value:,.1f}</td></tr>' if isinstance(value, float)
+        else f'<tr><th>{escape(key)}</th><td>{value:,}</td></tr>'
+        for key, value in summary.items()
+    )
+
+    building_rows = ''.join(
+        f'''<tr>
+            <td><a href="{escape(row.dashboard)}">{escape(row.building)}</a></td>
+            <td>{row.avg_temperature:.1f}</td>
+            <td>{row.avg_co2:.0f}</td>
+            <td>{row.energy_kwh:,.0f}</td>
+            <td>{row.forecast_24h_kwh:,.0f}</td>
+            <td>{row.anomalies}</td>
+            <td>{row.high_priority_recommendations}</td>
+            <td>{row.time_total_sec:.2f}</td>
+        </tr>'''
+        for row in kpis.itertuples()
+    )
+
+    return f'''<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <title>🏙️ Портфель зданий</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
+</head>
+<body class="bg-light">
+    <div class="container py-4">
+        <h1>🏙️ Портфель зданий</h1>
+        <p class="text-muted">Обновлено: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')} |
+           Время анализа: {wall_time:.1f} сек</p>
+
+        <h3>Сводные показатели</h3>
+        <table class="table table-sm w-auto">{summary_rows}</table>
+
+        <h3>Здания</h3>
+        <table class="table table-sm table-hover">
+            <thead class="table-dark">
+                <tr>
+                    <th>Здание</th><th>Температура, °C</th><th>CO2, ppm</th><th>Энергия, кВт·ч</th>
+                    <th>Прогноз 24 ч, кВт·ч</th><th>Аномалии</th><th>Высокий приоритет</th><th>Время, сек</th>
+                </tr>
+            </thead>
+            <tbody>{building_rows}</tbody>
+        </table>
+    </div>
+</body>
+</html>'''
+
+
+def run_portfolio(portfolio_dir, output_dir='reports/portfolio', max_workers=None, cache_dir=None):
+    """
+    Анализ всех зданий портфеля в пуле процессов
+
+    Args:
+        portfolio_dir: Папка с папками зданий
+        output_dir: Папка для дашбордов, индекса и portfolio_kpis.csv
+        max_workers: Число процессов (по умолчанию - число ядер)
+        cache_dir: Папка кэша результатов этапов (None - без кэша)
+
+    Returns:
+        DataFrame KPI по зданиям (с временем каждого этапа)
+
+    Raises:
+        FileNotFoundError: В папке нет зданий
+        RuntimeError: Анализ всех зданий завершился ошибкой
+    """
+    buildings = find_buildings(portfolio_dir)
+    if not buildings:
+        raise FileNotFoundError(f"В {portfolio_dir} не найдено папок зданий с sensors_data.csv и energy_data.csv")
+
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"🏙️ Анализ {len(buildings)} зданий...")
+    start = time.perf_counter()
+
+    results = []
+    failures = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(analyze_building, name, path, output_dir, cache_dir): name for name, path in buildings}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                kpis = future.result()
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+                failures[name] = e
+                continue
+            print(f"✅ {name}: {kpis['time_total_sec']:.2f} сек")
+            results.append(kpis)
+
+    wall_time = time.perf_counter() - start
+    if failures:
+        print(f"\n⚠️  Не обработано зданий: {len(failures)} из {len(buildings)}: {', '.join(sorted(failures))}")
+    if not results:
+        raise RuntimeError(f"Ни одно здание портфеля {portfolio_dir} не обработано")
+
+    kpis = pd.DataFrame(results).sort_values('building').reset_index(drop=True)
+    kpis.to_csv(os.path.join(output_dir, 'portfolio_kpis.csv'), index=False, encoding='utf-8')
+
+    summary = aggregate_portfolio(kpis)
+    with open(os.path.join(output_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(generate_portfolio_index(kpis, summary, wall_time))
+
+    print(f"\n📊 Портфель обработан за {wall_time:.1f} сек: {os.path.join(output_dir, 'index.html')}")
+    return kpis
+
+
+def main():
+    """Основная функция"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Аналитика по портфелю зданий')
+    parser.add_argument('portfolio_dir', help='Папка с папками зданий')
+    parser.add_argument('--output', default='reports/portfolio')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Кэш результатов этапов')
+    parser.add_argument('--no-cache', action='store_true', help='Пересчитать все этапы')
+    args = parser.parse_args()
+
+    try:
+        run_portfolio(args.portfolio_dir, args.output, args.workers, None if args.no_cache else args.cache_dir)
+    except (FileNotFoundError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Модуль бинарного колоночного архива показаний датчиков
+
+Архив - папка с файлами фиксированной ширины (по одному на колонку) и
+meta.json со схемой, числом строк и словарями строковых колонок
+(sensor_id, zone хранятся кодами int32). Читатели открывают колонки через
+numpy.memmap: несколько процессов делят одни и те же страницы ОС без копий,
+а выборка по времени - бинарный поиск по колонке timestamp без разбора CSV.
+
+Пример:
+    python -m src.archive src/data/sensors_data.csv archive/sensors
+"""
+
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+ARCHIVE_VERSION = 1
+ARCHIVE_SCHEMA = {
+    'timestamp': 'int64',
+    'sensor_id': 'int32',
+    'temperature': 'float32',
+    'humidity': 'float32',
+    'co2': 'float32',
+    'light_level': 'float32',
+    'zone': 'int32'
+}
+DICTIONARY_COLUMNS = ['sensor_id', 'zone']
+
+
+class SensorArchive:
+    """Колоночный архив показаний с доступом через numpy.memmap"""
+
+    def __init__(self, path: str, schema: Optional[Dict[str, str]] = None):
+        """
+        Открытие архива (создается пустой, если папки нет)
+
+        Args:
+            path: Папка архива
+            schema: Колонки и их типы (по умолчанию ARCHIVE_SCHEMA, только для нового архива)
+        """
+        self.path = path
+        self._meta_path = os.path.join(path, 'meta.json')
+
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding='utf-8') as f:
+                self.meta = json.load(f)
+            if self.meta.get('version') != ARCHIVE_VERSION:
+                raise ValueError(f"Неподдерживаемая версия архива: {self.meta.get('version')}")
+        else:
+            schema = dict(schema or ARCHIVE_SCHEMA)
+            self.meta = {
+                'version': ARCHIVE_VERSION,
+                'rows': 0,
+                'sorted': True,
+                'schema': schema,
+                'dictionaries': {col: [] for col in DICTIONARY_COLUMNS if col in schema}
+            }
+
+        self._lookup = {col: {value: code for code, value in enumerate(values)}
+                        for col, values in self.meta['dictionaries'].items()}
+        self._maps = {}
+
+    # ---------- запись ----------
+
+    def _column_path(self, column: str) -> str:
+        return os.path.join(self.path, f'{column}.bin')
+
+    def _save_meta(self):
+        tmp_path = self._meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._meta_path)
+
+    def _encode(self, column: str, values: pd.Series) -> np.ndarray:
+        """Коды словарной колонки; новые значения дописываются в словарь"""
+        lookup = self._lookup[column]
+        dictionary = self.meta['dictionaries'][column]
+        uniques, inverse = np.unique(values.astype(str).to_numpy(), return_inverse=True)
+        for value in uniques:
+            if value not in lookup:
+                lookup[value] = len(dictionary)
+                dictionary.append(str(value))
+        codes = np.fromiter((lookup[value] for value in uniques), dtype=np.int64, count=len(uniques))
+        return codes[inverse]
+
+    def append(self, df: pd.DataFrame):
+        """
+        Дописывание пакета показаний (совместимо с хранилищами IngestionPipeline)
+
+        Args:
+            df: DataFrame с колонками схемы архива
+        """
+        if len(df) == 0:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        schema = self.meta['schema']
+
+        columns = {}
+        for column, dtype in schema.items():
+            if column == 'timestamp':
+                values = pd.to_datetime(df[column]).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+            elif column in self._lookup:
+                values = self._encode(column, df[column])
+            else:
+                values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+            columns[column] = np.ascontiguousarray(values, dtype=dtype)
+
+        times = columns['timestamp']
+        last = self.meta.get('last_timestamp')
+        is_sorted = self.meta['sorted'] and bool(np.all(times[1:] >= times[:-1]) and (last is None or times[0] >= last))
+
+        # Сначала колонки, потом атомарная замена meta.json: при сбое посередине
+        # meta описывает прежние строки, а хвост незавершенной записи
+        # обрезается следующим append
+        rows = self.meta['rows']
+        for column, values in columns.items():
+            with open(self._column_path(column), 'ab') as f:
+                f.truncate(rows * values.itemsize)
+                values.tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.meta['sorted'] = is_sorted
+        self.meta['last_timestamp'] = int(times.max() if last is None else max(last, times.max()))
+        self.meta['rows'] = rows + len(df)
+        self._save_meta()
+        self._maps.clear()
+
+    # ---------- чтение ----------
+
+    def __len__(self) -> int:
+        return self.meta['rows']
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.meta['schema'])
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Колонка как numpy.memmap только для чтения (без копирования)
+
+        Для словарных колонок возвращаются коды, см. dictionary()
+        """
+        if name not in self.meta['schema']:
+            raise KeyError(f"Колонки {name} нет в архиве")
+        rows = self.meta['rows']
+        if rows == 0:
+            return np.empty(0, dtype=self.meta['schema'][name])
+        if name not in self._maps:
+            self._maps[name] = np.memmap(self._column_path(name), dtype=self.meta['schema'][name],
+                                         mode='r', shape=(rows,))
+        return self._maps[name]
+
+    def dictionary(self, name: str) -> np.ndarray:
+        """Значения словарной колонки по кодам"""
+        return np.asarray(self.meta['dictionaries'][name], dtype=object)
+
+    def time_range(self, start=None, end=None) -> slice:
+        """
+        Диапазон строк с start <= timestamp < end
+
+        Для упорядоченного архива - бинарный поиск по memmap; иначе ValueError
+        (используйте mask_time).
+        """
+        if not self.meta['sorted']:
+            raise ValueError("Архив не упорядочен по времени, используйте mask_time()")
+        times = self.column('timestamp')
+        lo = 0 if start is None else int(np.searchsorted(times, pd.Timestamp(start).value, side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, pd.Timestamp(end).value, side='left'))
+        return slice(lo, max(lo, hi))
+
+    def mask_time(self, start=None, end=None) -> np.ndarray:
+        """Булева маска строк с start <= timestamp < end (для любого порядка строк)"""
+        times = self.column('timestamp')
+        mask = np.ones(len(times), dtype=bool)
+        if start is not None:
+            mask &= times >= pd.Timestamp(start).value
+        if end is not None:
+            mask &= times < pd.Timestamp(end).value
+        return mask
+
+    def slice_time(self, start=None, end=None, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Колонки за период без разбора и (для упорядоченного архива) без копирования
+
+        Args:
+            start, end: Границы периода [start, end)
+            columns: Нужные колонки (по умолчанию все)
+
+        Returns:
+            Словарь {колонка: массив}; словарные колонки - коды
+        """
+        selector = self.time_range(start, end) if self.meta['sorted'] else self.mask_time(start, end)
+        return {name: self.column(name)[selector] for name in (columns or self.columns)}
+
+    def to_frame(self, start=None, end=None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Период архива в формате sensors_data.csv (с раскодированием строк)
+
+        Returns:
+            DataFrame
+        """
+        data = self.slice_time(start, end, columns)
+        frame = {}
+        for name, values in data.items():
+            if name == 'timestamp':
+                frame[name] = pd.to_datetime(np.asarray(values))
+            elif name in self.meta['dictionaries']:
+                frame[name] = self.dictionary(name)[values]
+            else:
+                frame[name] = np.asarray(values, dtype=float)
+        return pd.DataFrame(frame)
+
+
+def write_archive(df: pd.DataFrame, path: str) -> SensorArchive:
+    """
+    Запись DataFrame показаний в новый архив
+
+    Args:
+        df: Показания (sensors_data.csv)
+        path: Папка архива (не должна содержать архив)
+
+    Returns:
+        SensorArchive
+    """
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        raise FileExistsError(f"Архив {path} уже существует")
+    archive = SensorArchive(path)
+    archive.append(df.sort_values('timestamp', kind='stable'))
+    return archive
+
+
+def remove_archive(path: str):
+    """Удаление файлов архива (meta.json первым: без него колонки не читаются)"""
+    meta_path = os.path.join(path, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    for name in os.listdir(path) if os.path.isdir(path) else []:
+        if name.endswith('.bin') or name.endswith('.tmp'):
+            os.remove(os.path.join(path, name))
+
+
+def archive_csv(csv_path: str, path: str, chunksize: int = 100_000,
+                append: bool = False, overwrite: bool = False) -> SensorArchive:
+    """
+    Потоковая конвертация CSV в архив (память ограничена размером чанка)
+
+    Повторный запуск на том же CSV без append/overwrite не дублирует строки,
+    а завершается ошибкой.
+
+    Args:
+        csv_path: Путь к sensors_data.csv
+        path: Папка архива
+        chunksize: Строк в чанке
+        append: Дописать строки в существующий архив
+        overwrite: Заменить существующий архив
+
+    Returns:
+        SensorArchive
+
+    Raises:
+        FileExistsError: Архив уже существует, а append и overwrite не заданы
+    """
+    if append and overwrite:
+        raise ValueError("append и overwrite взаимоисключающие")
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        if overwrite:
+            remove_archive(path)
+        elif not append:
+            raise FileExistsError(f"Архив {path} уже существует (append=True - дописать, "
+                                  f"overwrite=True - заменить)")
+    archive = SensorArchive(path)
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        archive.append(chunk)
+    return archive
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Конвертация sensors_data.csv в бинарный архив')
+    parser.add_argument('csv_path')
+    parser.add_argument('archive_path')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--append', action='store_true', help='Дописать строки в существующий архив')
+    mode.add_argument('--overwrite', action='store_true', help='Заменить существующий архив')
+    args = parser.parse_args()
+
+    try:
+        archive = archive_csv(args.csv_path, args.archive_path, args.chunksize, args.append, args.overwrite)
+    except FileExistsError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Архив {args.archive_path}: {len(archive)} строк, "
+          f"упорядочен по времени: {'да' if archive.meta['sorted'] else 'нет'}")
@@ -0,0 +1,227 @@
+"""
+Модуль дискового кэша результатов этапов анализа
+
+Результат каждого этапа (метрики, аномалии, прогноз, графики) хранится
+в файле, имя которого - хэш названия этапа, версий входных данных (хэшей
+содержимого таблиц) и параметров. Если ни данные, ни параметры не
+менялись, повторный запуск ноутбуков или create_dashboard.py берет готовый
+результат, не выполняя этап. В ключ входит и хэш исходного кода проекта,
+поэтому после изменения кода этапы пересчитываются. Размер кэша ограничен:
+при превышении удаляются записи, к которым дольше всего не обращались (LRU
+по времени изменения файла, которое обновляется при каждом попадании).
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Sequence
+
+import pandas as pd
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_DIR, '.cache', 'results')
+# Код, от которого зависят результаты этапов: его изменение сбрасывает кэш
+CODE_PATHS = ('src', 'models', 'templates', 'create_dashboard.py', 'create_portfolio.py')
+CODE_SUFFIXES = ('.py', '.html', '.css', '.js')
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+DEFAULT_MAX_ENTRIES = 2000
+# Входит в ключ: увеличивается при изменении формата самого кэша
+CACHE_VERSION = 2
+
+_MISSING = object()
+
+
+def data_version(*frames: pd.DataFrame) -> str:
+    """Версия данных: хэш содержимого таблиц (меняется при любом изменении значений)"""
+    digest = hashlib.sha1()
+    for frame in frames:
+        if frame is None:
+            digest.update(b'none')
+            continue
+        digest.update(','.join(map(str, frame.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_version(project_dir: str = PROJECT_DIR, paths: Sequence[str] = CODE_PATHS) -> str:
+    """
+    Версия кода: хэш содержимого исходных файлов проекта (считается один раз на процесс)
+
+    Хэшируется содержимое, а не время изменения, поэтому переключение веток
+    и повторное клонирование дают ту же версию для того же кода.
+    """
+    digest = hashlib.sha1()
+    files = []
+    for path in paths:
+        full = os.path.join(project_dir, path)
+        if os.path.isfile(full):
+            files.append(full)
+        for root, dirs, names in os.walk(full):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            files.extend(os.path.join(root, name) for name in names if name.endswith(CODE_SUFFIXES))
+    for file in sorted(files):
+        digest.update(os.path.relpath(file, project_dir).encode())
+        with open(file, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Кэш результатов на диске с адресацией по содержимому и вытеснением LRU"""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, code: Optional[str] = None):
+        """
+        Args:
+            directory: Папка кэша
+            max_bytes: Максимальный суммарный размер записей
+            max_entries: Максимальное число записей
+            code: Версия кода в ключах (по умолчанию code_version(): любое
+                изменение исходников проекта делает старые записи недоступными,
+                и они вытесняются по LRU)
+        """
+        self.code = code if code is not None else code_version()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, stage: str, versions: Sequence[str] = (), **params) -> str:
+        """
+        Ключ записи: хэш версии кода, этапа, версий входных данных и параметров
+
+        Args:
+            stage: Название этапа (для get_or_compute - вместе с именем вычисляющей функции)
+            versions: Версии входных данных (data_version)
+            params: Параметры этапа (приводятся к JSON, неизвестные типы - через str)
+        """
+        payload = json.dumps({'cache_version': CACHE_VERSION, 'code': self.code, 'stage': stage,
+                              'versions': list(versions), 'params': params},
+                             sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.pkl')
+
+    def get(self, key: str, default=None):
+        """Значение по ключу или default; попадание обновляет время доступа записи"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return default
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Поврежденная или устаревшая запись считается промахом
+            self._remove(path)
+            return default
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value):
+        """Атомарная запись значения (временный файл + os.replace) и вытеснение лишнего"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def get_or_compute(self, stage: str, versions: Sequence[str], compute: Callable[[], object], **params):
+        """
+        Результат этапа из кэша или вычисленный и сохраненный
+
+        Args:
+            stage: Название этапа
+            versions: Версии входных данных
+            compute: Функция без аргументов, вычисляющая результат
+            params: Параметры этапа, влияющие на результат
+
+        Returns:
+            Результат этапа
+        """
+        # Имя функции разделяет одноименные этапы разных скриптов
+        function = f"{getattr(compute, '__module__', '')}.{getattr(compute, '__qualname__', '')}"
+        key = self.key(f'{stage}@{function}', versions, **params)
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.pkl'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self) -> int:
+        """
+        Удаление давно не использованных записей сверх лимитов
+
+        Returns:
+            Число удаленных записей
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes and len(entries) - removed <= self.max_entries:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Удаление всех записей"""
+        for _, _, path in self._entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, object]:
+        """Попадания, промахи, число и размер записей"""
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries)
+        }
+
+
+def cached_stage(cache: Optional[ResultCache], stage: str, versions: Sequence[str],
+                 compute: Callable[[], object], **params):
+    """Этап через кэш, если он задан, иначе прямое вычисление"""
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(stage, versions, compute, **params)
@@ -0,0 +1,265 @@
+"""
+Модуль обнаружения точек смены режима (change points)
+
+Базовый уровень потребления энергии и температуры зон сдвигается: сезонное
+отопление (месяцы 1, 2, 11, 12 в _generate_energy_data), замена
+оборудования, смена графика работы. Глобальное среднее и правило трех
+сигм такие сдвиги не видят. Здесь ряд агрегируется до суток, и точки
+смены среднего ищутся методом PELT (Pruned Exact Linear Time): стоимость
+сегмента считается за O(1) по накопленным суммам, а отсечение кандидатов
+делает поиск почти линейным по длине ряда. Найденные сдвиги оформляются
+в формате таблицы аномалий дашборда.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+ENERGY_COLUMNS = ['electricity_kwh', 'heating_gcal']
+# Минимальная длина сегмента в шагах агрегации (неделя при суточном шаге),
+# чтобы выходные не принимались за смену режима
+MIN_SEGMENT = 7
+# Сдвиги меньше MIN_SHIFT_PCT процентов от прежнего уровня не выводятся
+MIN_SHIFT_PCT = 5.0
+
+
+def robust_variance(values: np.ndarray) -> float:
+    """Оценка дисперсии шума по MAD первых разностей (нечувствительна к сдвигам уровня)"""
+    diffs = np.diff(values)
+    if len(diffs) == 0:
+        return 0.0
+    mad = np.median(np.abs(diffs - np.median(diffs)))
+    return float((1.4826 * mad) ** 2 / 2)
+
+
+def pelt(values, penalty: Optional[float] = None, min_size: int = 2) -> List[int]:
+    """
+    Точки смены среднего методом PELT
+
+    Стоимость сегмента - сумма квадратов отклонений от его среднего,
+    штраф за каждую точку по умолчанию 2 * sigma^2 * ln(n) (BIC).
+
+    Args:
+        values: Ряд без пропусков
+        penalty: Штраф за точку смены
+        min_size: Минимальная длина сегмента
+
+    Returns:
+        Индексы начала новых сегментов (по возрастанию)
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if n < 2 * min_size:
+        return []
+    if penalty is None:
+        penalty = 2 * max(robust_variance(y), 1e-12) * np.log(n)
+
+    cum = np.concatenate([[0.0], np.cumsum(y)])
+    cum_sq = np.concatenate([[0.0], np.cumsum(y * y)])
+
+    def segment_cost(starts: np.ndarray, end: int) -> np.ndarray:
+        length = end - starts
+        total = cum[end] - cum[starts]
+        return cum_sq[end] - cum_sq[starts] - total * total / length
+
+    # Концы короче min_size недостижимы: стоимость бесконечна, а не мусор np.empty
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    last = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.array([0], dtype=np.int64)
+    pruned = {}
+
+    for end in range(min_size, n + 1):
+        if end in pruned:
+            candidates = candidates[~np.isin(candidates, pruned.pop(end))]
+        costs = best[candidates] + segment_cost(candidates, end)
+        i = int(np.argmin(costs))
+        best[end] = costs[i] + penalty
+        last[end] = candidates[i]
+        # Отсечение PELT: кандидат, проигрывающий уже сейчас, не выиграет и позже.
+        # Довод опирается на разбиение в точке end, а оно допустимо только для
+        # концов от end + min_size, поэтому кандидат удаляется с задержкой
+        losers = candidates[costs > best[end]]
+        if len(losers):
+            pruned[end + min_size] = losers
+        # Новая точка начала допустима, только если перед ней помещается сегмент min_size
+        start = end - min_size + 1
+        if start >= min_size:
+            candidates = np.append(candidates, start)
+
+    change_points = []
+    end = n
+    while end > 0:
+        end = int(last[end])
+        if end > 0:
+            change_points.append(end)
+    return change_points[::-1]
+
+
+def segment_shifts(series: pd.Series, change_points: Sequence[int]) -> pd.DataFrame:
+    """
+    Уровни соседних сегментов в точках смены
+
+    Returns:
+        DataFrame: timestamp (начало нового сегмента), before_mean, after_mean, shift, shift_pct
+    """
+    bounds = [0, *change_points, len(series)]
+    means = [series.iloc[lo:hi].mean() for lo, hi in zip(bounds[:-1], bounds[1:])]
+    before, after = np.array(means[:-1]), np.array(means[1:])
+    return pd.DataFrame({
+        'timestamp': series.index[list(change_points)],
+        'before_mean': before,
+        'after_mean': after,
+        'shift': after - before,
+        'shift_pct': np.where(before != 0, (after - before) / np.abs(np.where(before != 0, before, 1)) * 100, np.nan)
+    })
+
+
+def detect_change_points(series: pd.Series, freq: str = '1D', how: str = 'sum',
+                         penalty: Optional[float] = None, min_size: int = MIN_SEGMENT,
+                         min_shift_pct: float = MIN_SHIFT_PCT) -> pd.DataFrame:
+    """
+    Точки смены уровня ряда с индексом времени
+
+    Args:
+        series: Ряд с DatetimeIndex
+        freq: Шаг агрегации (суточный уровень скрывает суточный цикл нагрузки)
+        how: Агрегация ('sum' для потребления, 'mean' для температуры)
+        penalty: Штраф PELT (по умолчанию BIC)
+        min_size: Минимальная длина сегмента в шагах freq
+        min_shift_pct: Минимальный относительный сдвиг, %
+
+    Returns:
+        DataFrame: timestamp, before_mean, after_mean, shift, shift_pct
+    """
+    resampled = series.resample(freq)
+    # Неполные периоды (сутки с пропусками) не должны выглядеть как провал уровня
+    level = (resampled.mean() if how == 'mean' else resampled.mean() * resampled.count().max()).dropna()
+    if len(level) == 0:
+        return segment_shifts(level, [])
+
+    shifts = segment_shifts(level, pelt(level.to_numpy(), penalty, min_size))
+    return shifts[shifts['shift_pct'].abs().fillna(np.inf) >= min_shift_pct].reset_index(drop=True)
+
+
+def energy_change_points(energy: pd.DataFrame, columns: Sequence[str] = ENERGY_COLUMNS,
+                         freq: str = '1D', penalty: Optional[float] = None,
+                         min_size: int = MIN_SEGMENT) -> pd.DataFrame:
+    """
+    Смены уровня потребления по колонкам energy_data.csv
+
+    Returns:
+        DataFrame: series, timestamp, before_mean, after_mean, shift, shift_pct
+    """
+    energy = energy.set_index(pd.to_datetime(energy['timestamp'])).sort_index()
+    frames = []
+    for column in columns:
+        if column in energy.columns:
+            shifts = detect_change_points(energy[column], freq, 'sum', penalty, min_size)
+            frames.append(shifts.assign(series=column))
+    return _concat(frames)
+
+
+def zone_temperature_change_points(sensors: pd.DataFrame, freq: str = '1D', penalty: Optional[float] = None,
+                                   min_size: int = MIN_SEGMENT) -> pd.DataFrame:
+    """
+    Смены уровня средней температуры по зонам
+
+    Returns:
+        DataFrame: series ('temperature'), zone, timestamp, before_mean, after_mean, shift, shift_pct
+    """
+    sensors = sensors.set_index(pd.to_datetime(sensors['timestamp'])).sort_index()
+    frames = []
+    for zone, temperature in sensors.groupby('zone')['temperature']:
+        shifts = detect_change_points(temperature, freq, 'mean', penalty, min_size, min_shift_pct=0)
+        frames.append(shifts.assign(series='temperature', zone=zone))
+    return _concat(frames)
+
+
+def _concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    columns = ['series', 'zone', 'timestamp', 'before_mean', 'after_mean', 'shift', 'shift_pct']
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    result = pd.concat(frames, ignore_index=True).reindex(columns=columns)
+    return result.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+# Подписи рядов в таблице аномалий
+SERIES_LABELS = {
+    'electricity_kwh': 'электроэнергия',
+    'heating_gcal': 'отопление',
+    'temperature': 'температура'
+}
+# Единицы сдвига уровня (энергия - суточные суммы)
+SERIES_UNITS = {
+    'electricity_kwh': ' кВт·ч/сут',
+    'heating_gcal': ' Гкал/сут',
+    'temperature': '°C'
+}
+
+
+def change_point_alerts(sensors: Optional[pd.DataFrame] = None, energy: Optional[pd.DataFrame] = None,
+                        freq: str = '1D', min_size: int = MIN_SEGMENT) -> pd.DataFrame:
+    """
+    Смены режима в формате таблицы аномалий дашборда
+
+    Args:
+        sensors: Данные датчиков (температура по зонам)
+        energy: Данные энергопотребления
+
+    Returns:
+        DataFrame: timestamp, temperature (новый уровень температуры или NaN),
+        zone, anomaly_type, deviation (сдвиг уровня), unit (единицы сдвига)
+    """
+    frames = []
+    if energy is not None and len(energy) > 0:
+        frames.append(energy_change_points(energy, freq=freq, min_size=min_size))
+    if sensors is not None and len(sensors) > 0:
+        frames.append(zone_temperature_change_points(sensors, freq=freq, min_size=min_size))
+    shifts = _concat(frames)
+
+    direction = np.where(shifts['shift'] > 0, 'рост', 'снижение')
+    labels = shifts['series'].map(SERIES_LABELS).fillna(shifts['series'])
+    labels = labels.where(shifts['zone'].isna(), labels + ', ' + shifts['zone'].astype(str))
+    is_temperature = (shifts['series'] == 'temperature').to_numpy()
+    percent = shifts['shift_pct'].map(lambda value: '' if pd.isna(value) else f' ({value:+.0f}%)')
+
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(shifts['timestamp']),
+        'temperature': np.where(is_temperature, shifts['after_mean'].astype(float), np.nan),
+        'zone': shifts['zone'].fillna('здание'),
+        'anomaly_type': 'смена режима: ' + direction + ' (' + labels + ')' + percent,
+        'deviation': shifts['shift'].astype(float),
+        'unit': shifts['series'].map(SERIES_UNITS).fillna('')
+    })
+
+
+def merge_alerts(anomalies: pd.DataFrame, alerts: pd.DataFrame) -> pd.DataFrame:
+    """Объединение таблицы аномалий со сменами режима в порядке времени"""
+    frames = [frame for frame in (anomalies, alerts) if frame is not None and len(frame) > 0]
+    if not frames:
+        return anomalies if anomalies is not None else alerts
+    merged = pd.concat(frames, ignore_index=True)
+    merged['timestamp'] = pd.to_datetime(merged['timestamp'])
+    return merged.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Точки смены режима потребления и температуры (PELT)')
+    parser.add_argument('--sensors', default='src/data/sensors_data.csv')
+    parser.add_argument('--energy', default='src/data/energy_data.csv')
+    parser.add_argument('--freq', default='1D')
+    parser.add_argument('--min-size', type=int, default=MIN_SEGMENT)
+    parser.add_argument('--output', default='reports/change_points.csv')
+    args = parser.parse_args()
+
+    sensors = pd.read_csv(args.sensors, parse_dates=['timestamp'])
+    energy = pd.read_csv(args.energy, parse_dates=['timestamp'])
+    alerts = change_point_alerts(sensors, energy, args.freq, args.min_size)
+    alerts.to_csv(args.output, index=False)
+    print(f"✅ Найдено смен режима: {len(alerts)}, сохранено в {args.output}")
@@ -0,0 +1,329 @@
+"""
+Модуль корреляционного анализа по зонам и с временным сдвигом
+
+Вместо одной матрицы corr() по всему зданию и вложенных циклов по ее
+элементам матрицы считаются сразу для всех зон через групповые суммы
+(bincount), а взаимные корреляции с лагом - сразу для всех пар рядов и
+всех лагов через БПФ (для коротких лагов - прямым суммированием).
+Результаты кэшируются по версии данных (хэшу содержимого).
+
+Пример:
+    lagged = lagged_correlations(build_aligned_series(sensors, energy, equipment),
+                                 max_lag=8)
+    best_lags(lagged)  # например, co2 -> ventilation: лаг и корреляция
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cache import data_version
+from .data_processor import SENSOR_METRICS
+from .maintenance import EQUIPMENT_ACTIVITY
+
+
+# Прямое суммирование быстрее БПФ, пока лагов немного
+FFT_MIN_LAG = 64
+
+_cache: Dict[tuple, object] = {}
+
+
+def _cached(key: tuple, compute, use_cache: bool):
+    if not use_cache:
+        return compute()
+    if key not in _cache:
+        _cache[key] = compute()
+    return _cache[key].copy()
+
+
+def clear_cache():
+    """Очистка кэша результатов"""
+    _cache.clear()
+
+
+# ---------- корреляции по зонам ----------
+
+def _grouped_correlation(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Матрицы корреляции Пирсона по группам за один проход
+
+    Пропуски исключаются попарно, как в DataFrame.corr().
+
+    Args:
+        values: Массив (строки x колонки)
+        codes: Номер группы каждой строки
+        n_groups: Число групп
+
+    Returns:
+        Массив (группы x колонки x колонки)
+    """
+    n_cols = values.shape[1]
+    # Центрирование по общему среднему снижает потерю точности в суммах квадратов
+    centered = values - np.nanmean(values, axis=0)
+    valid = ~np.isnan(centered)
+    filled = np.where(valid, centered, 0.0)
+
+    result = np.full((n_groups, n_cols, n_cols), np.nan)
+    for i in range(n_cols):
+        for j in range(i, n_cols):
+            both = valid[:, i] & valid[:, j]
+            x = np.where(both, filled[:, i], 0.0)
+            y = np.where(both, filled[:, j], 0.0)
+
+            n = np.bincount(codes, weights=both, minlength=n_groups)
+            sx = np.bincount(codes, weights=x, minlength=n_groups)
+            sy = np.bincount(codes, weights=y, minlength=n_groups)
+            sxx = np.bincount(codes, weights=x * x, minlength=n_groups)
+            syy = np.bincount(codes, weights=y * y, minlength=n_groups)
+            sxy = np.bincount(codes, weights=x * y, minlength=n_groups)
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cov = n * sxy - sx * sy
+                var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+                corr = np.where((n > 1) & (var > 0), cov / np.sqrt(np.maximum(var, 0)), np.nan)
+
+            result[:, i, j] = result[:, j, i] = np.clip(corr, -1.0, 1.0)
+    return result
+
+
+def zone_correlations(sensors: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                      zone_column: str = 'zone', use_cache: bool = True) -> pd.DataFrame:
+    """
+    Матрицы корреляции параметров по каждой зоне и по зданию
+
+    Args:
+        sensors: Данные датчиков
+        columns: Колонки (по умолчанию SENSOR_METRICS)
+        zone_column: Колонка зоны
+        use_cache: Использовать кэш по версии данных
+
+    Returns:
+        DataFrame с индексом (zone, metric) и колонками-метриками; здание - зона 'all'
+    """
+    columns = list(columns or SENSOR_METRICS)
+
+    def compute():
+        codes, zones = pd.factorize(sensors[zone_column], sort=True)
+        values = sensors[columns].to_numpy(dtype=float)
+        by_zone = _grouped_correlation(values, codes, len(zones))
+        total = _grouped_correlation(values, np.zeros(len(values), dtype=np.int64), 1)
+
+        labels = list(zones) + ['all']
+        matrices = np.concatenate([by_zone, total])
+        index = pd.MultiIndex.from_product([labels, columns], names=['zone', 'metric'])
+        return pd.DataFrame(matrices.reshape(-1, len(columns)), index=index, columns=columns)
+
+    key = ('zone_correlations', data_version(sensors[[zone_column] + columns]), tuple(columns))
+    return _cached(key, compute, use_cache)
+
+
+def strong_correlations(matrix: pd.DataFrame, threshold: float = 0.5) -> pd.DataFrame:
+    """
+    Пары параметров с |r| > threshold (как в 02_eda_detailed.ipynb, без циклов)
+
+    Args:
+        matrix: Квадратная матрица корреляций
+        threshold: Порог силы связи
+
+    Returns:
+        DataFrame: Параметр 1, Параметр 2, Корреляция, Связь
+    """
+    values = matrix.to_numpy(dtype=float)
+    rows, cols = np.triu_indices(len(values), k=1)
+    corr = values[rows, cols]
+    keep = np.abs(corr) > threshold
+    rows, cols, corr = rows[keep], cols[keep], corr[keep]
+
+    relationship = np.where(corr > 0, 'прямая', 'обратная')
+    strength = np.where(np.abs(corr) > 0.7, 'сильная', 'средняя')
+    names = np.asarray(matrix.columns, dtype=object)
+
+    return pd.DataFrame({
+        'Параметр 1': names[rows],
+        'Параметр 2': names[cols],
+        'Корреляция': np.char.mod('%.2f', corr),
+        'Связь': relationship.astype(object) + ' (' + strength.astype(object) + ')'
+    })
+
+
+def zone_strong_correlations(sensors: pd.DataFrame, threshold: float = 0.5,
+                             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Сильные корреляции по каждой зоне (колонка zone)"""
+    matrices = zone_correlations(sensors, columns)
+    tables = []
+    for zone, matrix in matrices.groupby(level='zone', sort=False):
+        table = strong_correlations(matrix.droplevel('zone'), threshold)
+        table.insert(0, 'zone', zone)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+
+# ---------- корреляции с лагом ----------
+
+def build_aligned_series(sensors: Optional[pd.DataFrame] = None, energy: Optional[pd.DataFrame] = None,
+                         equipment: Optional[pd.DataFrame] = None, freq: str = '30min',
+                         zone: Optional[str] = None) -> pd.DataFrame:
+    """
+    Ряды на общей временной сетке для корреляций с лагом
+
+    Показания датчиков усредняются по интервалу (для одной зоны или здания),
+    энергопотребление суммируется, статусы оборудования переводятся в
+    степень активности (EQUIPMENT_ACTIVITY) и усредняются.
+
+    Args:
+        sensors, energy, equipment: Исходные данные (любые можно опустить)
+        freq: Шаг сетки
+        zone: Зона для показаний датчиков (None - все здание)
+
+    Returns:
+        DataFrame с индексом timestamp и колонками рядов
+    """
+    series = []
+    if sensors is not None:
+        data = sensors if zone is None else sensors[sensors['zone'] == zone]
+        series.append(data.set_index(pd.to_datetime(data['timestamp']))[SENSOR_METRICS].resample(freq).mean())
+    if energy is not None:
+        data = energy.set_index(pd.to_datetime(energy['timestamp']))
+        series.append(data[['electricity_kwh']].resample(freq).sum(min_count=1))
+    if equipment is not None:
+        activity = pd.DataFrame(index=pd.to_datetime(equipment['timestamp']))
+        for name, (column, levels) in EQUIPMENT_ACTIVITY.items():
+            activity[name] = equipment[column].map(levels).to_numpy()
+        series.append(activity.resample(freq).mean())
+
+    if not series:
+        raise ValueError("Не переданы данные для построения рядов")
+    return pd.concat(series, axis=1).sort_index()
+
+
+def _lagged_direct(centered: np.ndarray, valid: np.ndarray, lags: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Суммы произведений и числа пар для всех пар рядов прямым суммированием"""
+    n, k = centered.shape
+    sums = np.zeros((len(lags), k, k))
+    counts = np.zeros((len(lags), k, k))
+    for idx, lag in enumerate(lags):
+        # Пара (i, j) при лаге: x_i(t) и x_j(t + lag)
+        if lag >= 0:
+            lead, follow = slice(0, n - lag), slice(lag, n)
+        else:
+            lead, follow = slice(-lag, n), slice(0, n + lag)
+        sums[idx] = centered[lead].T @ centered[follow]
+        counts[idx] = valid[lead].T.astype(float) @ valid[follow].astype(float)
+    return sums, counts
+
+
+def _lagged_fft(centered: np.ndarray, valid: np.ndarray, lags: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Суммы произведений и числа пар для всех пар рядов и лагов через БПФ"""
+    n = centered.shape[0]
+    size = 1 << int(np.ceil(np.log2(2 * n - 1)))
+
+    values_f = np.fft.rfft(centered, size, axis=0)
+    valid_f = np.fft.rfft(valid.astype(float), size, axis=0)
+
+    # Взаимная корреляция всех пар: conj(F_i) * F_j, обратное БПФ по оси частот
+    sums = np.fft.irfft(np.conj(values_f)[:, :, None] * values_f[:, None, :], size, axis=0)
+    counts = np.fft.irfft(np.conj(valid_f)[:, :, None] * valid_f[:, None, :], size, axis=0)
+
+    positions = np.where(lags >= 0, lags, size + lags)
+    return sums[positions], np.round(counts[positions])
+
+
+def lagged_correlations(series: pd.DataFrame, max_lag: int = 12, columns: Optional[Sequence[str]] = None,
+                        method: str = 'auto', min_pairs: int = 10, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Взаимные корреляции всех пар рядов на всех лагах от -max_lag до max_lag
+
+    corr(leader, follower, lag) - корреляция leader(t) и follower(t + lag):
+    положительный лаг означает, что leader опережает follower на lag интервалов.
+    Пропуски исключаются попарно, нормировка - по общим средним и
+    дисперсиям рядов.
+
+    Args:
+        series: Ряды на регулярной сетке (см. build_aligned_series)
+        max_lag: Наибольший лаг в интервалах сетки (лаги не короче ряда дают NaN)
+        columns: Ряды (по умолчанию все колонки)
+        method: 'direct', 'fft' или 'auto' (БПФ при max_lag >= FFT_MIN_LAG)
+        min_pairs: Минимум пар наблюдений для оценки
+        use_cache: Использовать кэш по версии данных
+
+    Returns:
+        DataFrame: leader, follower, lag, corr, pairs
+    """
+    columns = list(columns or series.columns)
+
+    def compute():
+        values = series[columns].to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+        centered = np.where(valid, values - mean, 0.0)
+
+        lags = np.arange(-max_lag, max_lag + 1)
+        use_fft = method == 'fft' or (method == 'auto' and max_lag >= FFT_MIN_LAG)
+        # Лаги не короче ряда не дают ни одной пары: для них строки с NaN
+        # (прямой срез иначе не сходится по форме, а БПФ заворачивает ряд)
+        usable = np.abs(lags) < len(values)
+        k = len(columns)
+        sums = np.zeros((len(lags), k, k))
+        counts = np.zeros((len(lags), k, k))
+        if usable.any():
+            sums[usable], counts[usable] = (_lagged_fft if use_fft else _lagged_direct)(centered, valid, lags[usable])
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = sums / np.maximum(counts, 1) / np.outer(std, std)[None, :, :]
+        corr = np.where((counts >= min_pairs) & (counts > 0), np.clip(corr, -1.0, 1.0), np.nan)
+
+        lag_idx, lead_idx, follow_idx = np.meshgrid(np.arange(len(lags)), np.arange(k), np.arange(k),
+                                                    indexing='ij')
+        names = np.asarray(columns, dtype=object)
+        return pd.DataFrame({
+            'leader': names[lead_idx.ravel()],
+            'follower': names[follow_idx.ravel()],
+            'lag': lags[lag_idx.ravel()],
+            'corr': corr.ravel(),
+            'pairs': counts.ravel().astype(int)
+        })
+
+    key = ('lagged_correlations', data_version(series[columns]), tuple(columns), max_lag, method, min_pairs)
+    return _cached(key, compute, use_cache)
+
+
+def best_lags(lagged: pd.DataFrame, pairs: Optional[List[Tuple[str, str]]] = None,
+              min_lag: int = 0) -> pd.DataFrame:
+    """
+    Лаг с наибольшей по модулю корреляцией для каждой пары рядов
+
+    Args:
+        lagged: Результат lagged_correlations
+        pairs: Пары (leader, follower) (по умолчанию все разные пары)
+        min_lag: Минимальный лаг (0 - только опережение leader)
+
+    Returns:
+        DataFrame: leader, follower, lag, corr, pairs
+    """
+    data = lagged[(lagged['leader'] != lagged['follower']) & (lagged['lag'] >= min_lag)].dropna(subset=['corr'])
+    if pairs is not None:
+        wanted = pd.MultiIndex.from_tuples(pairs)
+        data = data[pd.MultiIndex.from_arrays([data['leader'], data['follower']]).isin(wanted)]
+
+    best = data.loc[data['corr'].abs().groupby([data['leader'], data['follower']]).idxmax()]
+    return best.sort_values('corr', key=np.abs, ascending=False).reset_index(drop=True)
+
+
+def zone_lagged_correlations(sensors: pd.DataFrame, energy: Optional[pd.DataFrame] = None,
+                             equipment: Optional[pd.DataFrame] = None, max_lag: int = 12,
+                             freq: str = '30min', method: str = 'auto') -> pd.DataFrame:
+    """
+    Корреляции с лагом по каждой зоне (ряды зоны + общие ряды здания)
+
+    Returns:
+        DataFrame: zone, leader, follower, lag, corr, pairs
+    """
+    tables = []
+    for zone in sorted(sensors['zone'].dropna().unique()):
+        series = build_aligned_series(sensors, energy, equipment, freq, zone=zone)
+        table = lagged_correlations(series, max_lag, method=method)
+        table.insert(0, 'zone', zone)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
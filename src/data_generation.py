@@ -9,6 +9,15 @@ import random
 from typing import Dict, Tuple
 
 
+# Допустимые диапазоны показаний датчиков (генератор ограничивает значения ими)
+SENSOR_RANGES = {
+    'temperature': (18, 28),
+    'humidity': (30, 70),
+    'co2': (350, 1500),
+    'light_level': (0, 800)
+}
+
+
 class BMSDataGenerator:
     """Генератор данных для системы управления зданием"""
     
@@ -114,10 +123,10 @@ class BMSDataGenerator:
             light += random.uniform(-10, 10)
             
             # Ограничиваем диапазоны
-            temperature = max(18, min(28, temperature))
-            humidity = max(30, min(70, humidity))
-            co2 = max(350, min(1500, co2))
-            light = max(0, min(800, light))
+            temperature = max(SENSOR_RANGES['temperature'][0], min(SENSOR_RANGES['temperature'][1], temperature))
+            humidity = max(SENSOR_RANGES['humidity'][0], min(SENSOR_RANGES['humidity'][1], humidity))
+            co2 = max(SENSOR_RANGES['co2'][0], min(SENSOR_RANGES['co2'][1], co2))
+            light = max(SENSOR_RANGES['light_level'][0], min(SENSOR_RANGES['light_level'][1], light))
             
             data.append({
                 'timestamp': ts,
@@ -1,2 +1,390 @@
 # data_processor.py
-#   BMS Analytics
+# Модуль проекта BMS Analytics
+"""
+Модуль обработки данных: однопроходная статистика по числовым колонкам
+
+Вместо отдельных вызовов .mean()/.std()/.quantile() на каждую колонку
+статистики считаются сразу по двумерному блоку NumPy (строки x колонки)
+с учетом пропусков. Накопители статистики объединяемы, поэтому большие
+или разбитые на части наборы данных не требуется склеивать в один DataFrame.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .sketches import COMFORT_QUANTILES, build_metric_sketches, quantile_label
+
+
+SENSOR_METRICS = ['temperature', 'humidity', 'co2', 'light_level']
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Сетка гистограмм для объединяемых квантилей: (минимум, максимум, ширина корзины).
+# Погрешность квантиля не превышает ширины корзины; значения вне сетки
+# попадают в крайние корзины, а min/max при этом остаются точными.
+HISTOGRAM_GRIDS = {
+    'temperature': (0.0, 50.0, 0.05),
+    'humidity': (0.0, 100.0, 0.1),
+    'co2': (0.0, 5000.0, 1.0),
+    'light_level': (0.0, 2000.0, 1.0),
+    'electricity_kwh': (0.0, 1000.0, 0.1),
+    'heating_gcal': (0.0, 10.0, 0.001),
+    'total_power_kw': (0.0, 2000.0, 0.1),
+    'equipment_load': (0.0, 1.0, 0.001)
+}
+
+
+def compute_block_stats(values: np.ndarray,
+                        quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, np.ndarray]:
+    """
+    Статистики сразу для всех колонок двумерного блока
+
+    Args:
+        values: Массив (строки x колонки) с NaN на месте пропусков
+        quantiles: Уровни квантилей
+
+    Returns:
+        Словарь массивов по колонкам: count, nan_count, mean, std, min, max
+        и quantiles (уровни x колонки)
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+
+    missing = np.isnan(values)
+    nan_count = missing.sum(axis=0)
+    count = values.shape[0] - nan_count
+    has_data = count > 0
+    safe_count = np.maximum(count, 1)
+
+    filled = np.where(missing, 0.0, values)
+    mean = filled.sum(axis=0) / safe_count
+    centered = np.where(missing, 0.0, values - mean)
+    m2 = (centered * centered).sum(axis=0)
+
+    result = {
+        'count': count,
+        'nan_count': nan_count,
+        'mean': np.where(has_data, mean, np.nan),
+        'std': np.where(count > 1, np.sqrt(m2 / np.maximum(count - 1, 1)), np.nan),
+        'min': np.where(has_data, np.where(missing, np.inf, values).min(axis=0, initial=np.inf), np.nan),
+        'max': np.where(has_data, np.where(missing, -np.inf, values).max(axis=0, initial=-np.inf), np.nan),
+        'quantiles': np.full((len(quantiles), values.shape[1]), np.nan)
+    }
+
+    if len(quantiles) > 0 and has_data.any():
+        result['quantiles'][:, has_data] = np.nanquantile(values[:, has_data], quantiles, axis=0)
+
+    return result
+
+
+class StatsAccumulator:
+    """Объединяемый накопитель статистик по набору числовых колонок"""
+
+    def __init__(self, columns: Optional[List[str]] = None,
+                 quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                 grids: Optional[Dict[str, Tuple[float, float, float]]] = None):
+        """
+        Инициализация накопителя
+
+        Args:
+            columns: Колонки (по умолчанию SENSOR_METRICS)
+            quantiles: Уровни квантилей в результате
+            grids: Сетки гистограмм для колонок, которых нет в HISTOGRAM_GRIDS
+        """
+        self.columns = list(columns or SENSOR_METRICS)
+        self.quantiles = tuple(quantiles)
+        grids = {**HISTOGRAM_GRIDS, **(grids or {})}
+
+        missing = [col for col in self.columns if col not in grids]
+        if missing:
+            raise ValueError(f"Нет сетки гистограммы для колонок: {missing}")
+
+        n_cols = len(self.columns)
+        self._low = np.array([grids[col][0] for col in self.columns])
+        self._width = np.array([grids[col][2] for col in self.columns])
+        self._n_bins = np.array([int(round((grids[col][1] - grids[col][0]) / grids[col][2]))
+                                 for col in self.columns])
+        self._offsets = np.concatenate([[0], np.cumsum(self._n_bins)[:-1]])
+
+        self.count = np.zeros(n_cols)
+        self.nan_count = np.zeros(n_cols)
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.min = np.full(n_cols, np.inf)
+        self.max = np.full(n_cols, -np.inf)
+        self.histogram = np.zeros(int(self._n_bins.sum()))
+
+    def update(self, data) -> 'StatsAccumulator':
+        """
+        Добавление блока данных
+
+        Args:
+            data: DataFrame с нужными колонками или массив (строки x колонки)
+
+        Returns:
+            self
+        """
+        if isinstance(data, pd.DataFrame):
+            data = data[self.columns].to_numpy(dtype=float)
+        values = np.asarray(data, dtype=float)
+        if len(values) == 0:
+            return self
+
+        missing = np.isnan(values)
+        count = (~missing).sum(axis=0).astype(float)
+        filled = np.where(missing, 0.0, values)
+        mean = filled.sum(axis=0) / np.maximum(count, 1)
+        centered = np.where(missing, 0.0, values - mean)
+
+        self._merge_moments(count, mean, (centered * centered).sum(axis=0))
+        self.nan_count += missing.sum(axis=0)
+        self.min = np.minimum(self.min, np.where(missing, np.inf, values).min(axis=0))
+        self.max = np.maximum(self.max, np.where(missing, -np.inf, values).max(axis=0))
+
+        # Одна гистограмма для всех колонок: индексы корзин смещены по колонкам
+        bins = np.floor((values - self._low) / self._width)
+        bins = np.clip(np.nan_to_num(bins, nan=0), 0, self._n_bins - 1).astype(np.int64)
+        flat = (bins + self._offsets)[~missing]
+        self.histogram += np.bincount(flat, minlength=len(self.histogram))
+        return self
+
+    def _merge_moments(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray):
+        """Объединение среднего и суммы квадратов отклонений (формула Чана)"""
+        total = self.count + count
+        safe_total = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / safe_total
+        self.m2 = self.m2 + m2 + delta * delta * self.count * count / safe_total
+        self.count = total
+
+    def merge(self, other: 'StatsAccumulator') -> 'StatsAccumulator':
+        """
+        Объединение с накопителем по другой части данных
+
+        Args:
+            other: Накопитель с теми же колонками
+
+        Returns:
+            self
+        """
+        if other.columns != self.columns:
+            raise ValueError("Нельзя объединить накопители с разными колонками")
+
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.nan_count += other.nan_count
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.histogram += other.histogram
+        return self
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Квантиль уровня q по гистограмме (с линейной интерполяцией внутри корзины)"""
+        result = np.full(len(self.columns), np.nan)
+
+        for j in range(len(self.columns)):
+            if self.count[j] == 0:
+                continue
+            start = self._offsets[j]
+            hist = self.histogram[start:start + self._n_bins[j]]
+            cumulative = np.cumsum(hist)
+            target = q * cumulative[-1]
+            b = min(int(np.searchsorted(cumulative, target)), len(hist) - 1)
+            below = cumulative[b] - hist[b]
+            fraction = (target - below) / hist[b] if hist[b] > 0 else 0.0
+            estimate = self._low[j] + (b + fraction) * self._width[j]
+            result[j] = min(max(estimate, self.min[j]), self.max[j])
+
+        return result
+
+    def count_outside(self, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+        """
+        Оценка числа значений вне [lower, upper] по гистограмме
+
+        Корзины целиком за границей учитываются полностью, корзина с границей -
+        пропорционально доле ее ширины за границей.
+
+        Args:
+            lower, upper: Границы по каждой колонке
+
+        Returns:
+            Массив оценок по колонкам
+        """
+        lower = np.broadcast_to(np.asarray(lower, dtype=float), (len(self.columns),))
+        upper = np.broadcast_to(np.asarray(upper, dtype=float), (len(self.columns),))
+        result = np.zeros(len(self.columns))
+
+        for j in range(len(self.columns)):
+            start = self._offsets[j]
+            hist = self.histogram[start:start + self._n_bins[j]]
+            # Положение границ в корзинах (дробная часть - доля корзины)
+            low_pos = np.clip((lower[j] - self._low[j]) / self._width[j], 0, len(hist))
+            high_pos = np.clip((upper[j] - self._low[j]) / self._width[j], 0, len(hist))
+            cumulative = np.concatenate([[0.0], np.cumsum(hist)])
+
+            def below(pos):
+                b = min(int(pos), len(hist) - 1)
+                return cumulative[b] + (pos - b) * hist[b]
+
+            result[j] = below(low_pos) + cumulative[-1] - below(high_pos)
+
+        return result
+
+    def result(self) -> pd.DataFrame:
+        """
+        Итоговые статистики
+
+        Returns:
+            DataFrame: строки - колонки данных; столбцы - count, nan_count, mean,
+            std, min, max и квантили (p5, p50, ...)
+        """
+        has_data = self.count > 0
+        table = pd.DataFrame({
+            'count': self.count.astype(int),
+            'nan_count': self.nan_count.astype(int),
+            'mean': np.where(has_data, self.mean, np.nan),
+            'std': np.where(self.count > 1, np.sqrt(self.m2 / np.maximum(self.count - 1, 1)), np.nan),
+            'min': np.where(has_data, self.min, np.nan),
+            'max': np.where(has_data, self.max, np.nan)
+        }, index=self.columns)
+
+        for q in self.quantiles:
+            table[quantile_label(q)] = self.quantile(q)
+        return table
+
+
+class ZoneStatsAccumulator:
+    """Объединяемые статистики по каждой зоне и по зданию в целом"""
+
+    def __init__(self, columns: Optional[List[str]] = None, zone_column: str = 'zone', **kwargs):
+        """
+        Args:
+            columns: Колонки (по умолчанию SENSOR_METRICS)
+            zone_column: Колонка с идентификатором зоны
+            **kwargs: Параметры StatsAccumulator
+        """
+        self.columns = list(columns or SENSOR_METRICS)
+        self.zone_column = zone_column
+        self.kwargs = kwargs
+        self.zones = {}
+        self.total = StatsAccumulator(self.columns, **kwargs)
+
+    def update(self, df: pd.DataFrame) -> 'ZoneStatsAccumulator':
+        """Добавление части данных (блок разбивается по зонам одной сортировкой)"""
+        if len(df) == 0:
+            return self
+
+        values = df[self.columns].to_numpy(dtype=float)
+        self.total.update(values)
+
+        codes, zones = pd.factorize(df[self.zone_column], sort=True)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(zones) + 1))
+
+        for i, zone in enumerate(zones):
+            block = values[order[bounds[i]:bounds[i + 1]]]
+            if zone not in self.zones:
+                self.zones[zone] = StatsAccumulator(self.columns, **self.kwargs)
+            self.zones[zone].update(block)
+        return self
+
+    def merge(self, other: 'ZoneStatsAccumulator') -> 'ZoneStatsAccumulator':
+        """Объединение с накопителем по другой части данных"""
+        self.total.merge(other.total)
+        for zone, acc in other.zones.items():
+            if zone in self.zones:
+                self.zones[zone].merge(acc)
+            else:
+                self.zones[zone] = StatsAccumulator(self.columns, **self.kwargs).merge(acc)
+        return self
+
+    def result(self) -> pd.DataFrame:
+        """
+        Returns:
+            DataFrame с индексом (zone, metric); итог по зданию - зона 'all'
+        """
+        tables = {zone: self.zones[zone].result() for zone in sorted(self.zones)}
+        tables['all'] = self.total.result()
+        return pd.concat(tables, names=['zone', 'metric'])
+
+
+def compute_zone_stats(df: pd.DataFrame, columns: Optional[List[str]] = None,
+                       chunks: Optional[Iterable[pd.DataFrame]] = None, **kwargs) -> pd.DataFrame:
+    """
+    Статистики всех метрик по зонам за один проход
+
+    Args:
+        df: Данные датчиков (или None, если переданы chunks)
+        columns: Колонки (по умолчанию SENSOR_METRICS)
+        chunks: Итератор частей данных (например, pd.read_csv(..., chunksize=...))
+        **kwargs: Параметры ZoneStatsAccumulator
+
+    Returns:
+        DataFrame с индексом (zone, metric)
+    """
+    accumulator = ZoneStatsAccumulator(columns, **kwargs)
+    for chunk in (chunks if chunks is not None else [df]):
+        accumulator.update(chunk)
+    return accumulator.result()
+
+
+def build_analysis_report(sensors: pd.DataFrame, energy: pd.DataFrame,
+                          quantiles: Sequence[float] = COMFORT_QUANTILES) -> pd.DataFrame:
+    """
+    Таблица analysis_report.csv: средние, статусы и процентили по KLL-скетчам
+
+    Args:
+        sensors: Данные датчиков
+        energy: Данные энергопотребления
+        quantiles: Уровни процентилей (колонки p5, p50, p95)
+
+    Returns:
+        DataFrame в формате reports/analysis_report.csv с колонками процентилей
+    """
+    means = compute_block_stats(sensors[SENSOR_METRICS].to_numpy(dtype=float), quantiles=())['mean']
+    energy_mean = energy['electricity_kwh'].mean()
+    peak_hour = energy.groupby(pd.to_datetime(energy['timestamp']).dt.hour)['electricity_kwh'].mean().idxmax()
+
+    sketches = build_metric_sketches(sensors, SENSOR_METRICS)
+    sketches.update(build_metric_sketches(energy, ['electricity_kwh']))
+    percentiles = {col: sketch.quantiles(quantiles) for col, sketch in sketches.items()}
+
+    return format_analysis_report(dict(zip(SENSOR_METRICS, means)), energy_mean, peak_hour,
+                                  percentiles, quantiles)
+
+
+def format_analysis_report(means: Dict[str, float], energy_mean: float, peak_hour: int,
+                           percentiles: Dict[str, Sequence[float]],
+                           quantiles: Sequence[float] = COMFORT_QUANTILES) -> pd.DataFrame:
+    """
+    Таблица analysis_report.csv из готовых агрегатов
+
+    Args:
+        means: Средние по SENSOR_METRICS
+        energy_mean: Среднее электропотребление
+        peak_hour: Час пикового потребления
+        percentiles: Значения процентилей по SENSOR_METRICS и electricity_kwh
+        quantiles: Уровни процентилей
+
+    Returns:
+        DataFrame в формате reports/analysis_report.csv
+    """
+    temp, humidity, co2, light = (means[col] for col in SENSOR_METRICS)
+    rows = [
+        ('Температура', f"{temp:.1f}°C", '✅ В норме' if 20 <= temp <= 24 else '⚠️ Требует внимания', '{:.1f}°C'),
+        ('Влажность', f"{humidity:.1f}%", '✅ В норме' if 40 <= humidity <= 60 else '⚠️ Требует внимания', '{:.1f}%'),
+        ('CO2', f"{co2:.0f} ppm", '✅ В норме' if co2 <= 800 else '⚠️ Требует внимания', '{:.0f} ppm'),
+        ('Освещенность', f"{light:.0f} lux", '✅ В норме' if light >= 300 else '⚠️ Требует внимания', '{:.0f} lux'),
+        ('Энергопотребление', f"{energy_mean:.1f} кВт·ч", f"Пик в {peak_hour}:00", '{:.1f} кВт·ч')
+    ]
+    sources = SENSOR_METRICS + ['electricity_kwh']
+
+    report = []
+    for (name, mean_text, status, fmt), col in zip(rows, sources):
+        row = {'Параметр': name, 'Среднее значение': mean_text, 'Статус': status}
+        for q, value in zip(quantiles, percentiles[col]):
+            row[quantile_label(q)] = fmt.format(value)
+        report.append(row)
+
+    return pd.DataFrame(report)
@@ -0,0 +1,324 @@
+"""
+Модуль профилирования качества данных датчиков
+
+Помимо подсчета NaN (check_missing в 02_eda_detailed.ipynb) измеряются
+неисправности, которые вносят add_missing_values, add_anomalies и реальные
+BMS: распределение интервалов опроса и пропуски по каждому датчику,
+"залипшие" серии одинаковых значений, доля значений вне допустимого
+диапазона и дрейф часов датчика. Все расчеты - векторные diff/cumsum по
+данным, отсортированным по (датчик, время), и bincount по кодам датчиков,
+без циклов по датчикам, поэтому профиль 10 тыс. датчиков за год строится
+за один проход. Результат - таблица по датчикам и JSON-отчет.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .data_generation import SENSOR_RANGES
+
+
+QUALITY_METRICS = ['temperature', 'humidity', 'co2', 'light_level']
+# Интервал считается пропуском, если он длиннее типичного в GAP_FACTOR раз
+GAP_FACTOR = 2.0
+# Серия из STUCK_MIN_RUN и более одинаковых подряд значений считается залипанием
+STUCK_MIN_RUN = 10
+# Корзины распределения интервалов опроса в долях типичного интервала
+GAP_RATIO_BINS = (0, 0.5, 1.5, 2.5, 5, 10, 100, np.inf)
+
+
+def _group_sum(codes: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """Сумма значений по кодам групп"""
+    return np.bincount(codes, weights=values, minlength=n_groups)
+
+
+def _group_max(codes: np.ndarray, values: np.ndarray, n_groups: int, initial: float = 0.0) -> np.ndarray:
+    """Максимум значений по кодам групп (codes отсортированы: группы - непрерывные отрезки)"""
+    result = np.full(n_groups, initial, dtype=float)
+    if len(codes):
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        result[codes[starts]] = np.maximum.reduceat(values, starts)
+    return result
+
+
+def _sensor_order(codes: np.ndarray, times: np.ndarray, n_sensors: int) -> np.ndarray:
+    """
+    Порядок строк по (датчик, время)
+
+    Две устойчивые сортировки вместо lexsort: по времени (данные обычно уже
+    упорядочены по времени, и timsort проходит их за O(n)) и по коду датчика
+    в узком целом типе (поразрядная сортировка).
+    """
+    by_time = np.argsort(times, kind='stable')
+    return by_time[np.argsort(codes[by_time], kind='stable')]
+
+
+def _factorize_sensors(sensors: pd.DataFrame):
+    """Коды датчиков в узком целом типе, имена датчиков и метки времени в нс"""
+    codes, names = pd.factorize(sensors['sensor_id'], sort=True)
+    codes = codes.astype(np.int16 if len(names) < 2 ** 15 else np.int32)
+    times = pd.to_datetime(sensors['timestamp']).to_numpy().astype('datetime64[ns]').astype(np.int64)
+    return codes, names, times
+
+
+def _stuck_runs(codes: np.ndarray, values: np.ndarray, n_groups: int, min_run: int) -> Dict[str, np.ndarray]:
+    """
+    Серии одинаковых подряд значений одного датчика
+
+    Начало серии - смена датчика, смена значения или NaN; номер серии -
+    накопленная сумма начал, длина серии - bincount по номерам.
+    """
+    valid = ~np.isnan(values)
+    starts = np.ones(len(values), dtype=bool)
+    starts[1:] = (codes[1:] != codes[:-1]) | (values[1:] != values[:-1]) | ~valid[1:] | ~valid[:-1]
+    run_id = np.cumsum(starts) - 1
+    lengths = np.bincount(run_id)
+    run_codes = codes[starts]
+    stuck = (lengths >= min_run) & valid[starts]
+
+    return {
+        'stuck_runs': np.bincount(run_codes[stuck], minlength=n_groups),
+        'stuck_points': np.bincount(run_codes[stuck], weights=lengths[stuck], minlength=n_groups),
+        'longest_run': _group_max(run_codes, np.where(valid[starts], lengths, 0), n_groups)
+    }
+
+
+def profile_sensors(sensors: pd.DataFrame, metrics: Sequence[str] = QUALITY_METRICS,
+                    ranges: Optional[Dict[str, tuple]] = None, gap_factor: float = GAP_FACTOR,
+                    stuck_min_run: int = STUCK_MIN_RUN,
+                    nominal_interval: Optional[float] = None) -> pd.DataFrame:
+    """
+    Профиль качества по каждому датчику
+
+    Args:
+        sensors: Данные в формате sensors_data.csv
+        metrics: Проверяемые показатели
+        ranges: Допустимые диапазоны {показатель: (мин, макс)} (по умолчанию SENSOR_RANGES)
+        gap_factor: Во сколько раз интервал должен превышать типичный, чтобы считаться пропуском
+        stuck_min_run: Минимальная длина залипшей серии
+        nominal_interval: Номинальный интервал опроса в секундах для оценки
+            дрейфа часов (по умолчанию - медиана интервалов, округленная до секунды)
+
+    Returns:
+        DataFrame с индексом sensor_id: число записей, интервалы опроса
+        (медиана, p95, максимум в секундах), пропуски и полнота, дубли и
+        обратные скачки времени, дрейф часов (мс/сутки), а по каждому
+        показателю - доли NaN, вне диапазона, в залипших сериях и длина
+        самой длинной серии
+    """
+    ranges = ranges or SENSOR_RANGES
+    metrics = [metric for metric in metrics if metric in sensors.columns]
+
+    codes, names, times = _factorize_sensors(sensors)
+    n_sensors = len(names)
+
+    # Обратные скачки времени - в исходном порядке записей каждого датчика
+    file_order = np.argsort(codes, kind='stable')
+    file_codes = codes[file_order]
+    backward = (file_codes[1:] == file_codes[:-1]) & (np.diff(times[file_order]) < 0)
+    backward_jumps = np.bincount(file_codes[1:][backward], minlength=n_sensors)
+
+    order = _sensor_order(codes, times, n_sensors)
+    codes, times = codes[order], times[order]
+    n_rows = np.bincount(codes, minlength=n_sensors)
+
+    # Интервалы опроса внутри датчика (первая запись датчика интервала не имеет)
+    same = np.zeros(len(codes), dtype=bool)
+    same[1:] = codes[1:] == codes[:-1]
+    dt = np.zeros(len(codes), dtype=float)
+    dt[1:] = np.diff(times) / 1e9
+    interval_codes, intervals = codes[same], dt[same]
+
+    interval_quantiles = (pd.Series(intervals).groupby(interval_codes).quantile([0.5, 0.95])
+                          .unstack().reindex(range(n_sensors)))
+    typical = interval_quantiles[0.5].to_numpy()
+    p95 = interval_quantiles[0.95].to_numpy()
+    typical_row = typical[interval_codes]
+
+    ratio = intervals / np.where(typical_row > 0, typical_row, np.nan)
+    gap = ratio > gap_factor
+    # Пропущенные опросы: сколько типичных интервалов поместилось бы в пропуск
+    missed = np.where(gap, np.round(ratio) - 1, 0.0)
+    missed_total = _group_sum(interval_codes, missed, n_sensors)
+
+    # Дрейф часов: смещение меток от сетки с номинальным шагом опроса (по
+    # умолчанию - типичный интервал, округленный до секунды), накопленное по
+    # числу шагов; наклон смещения к номинальному времени сетки (а не к
+    # показаниям самих уходящих часов) - по групповым суммам
+    nominal = np.round(typical) if nominal_interval is None else np.full(n_sensors, float(nominal_interval))
+    nominal_row = nominal[interval_codes]
+    steps = np.round(intervals / np.where(nominal_row > 0, nominal_row, np.nan))
+    step_nominal = np.where(np.isnan(steps), intervals, np.nan_to_num(steps) * np.nan_to_num(nominal_row))
+    group_start = np.flatnonzero(~same)
+    group_lengths = np.diff(np.r_[group_start, len(codes)])
+
+    def since_start(step_values: np.ndarray) -> np.ndarray:
+        """Накопленная от первой записи датчика сумма шаговых величин"""
+        per_row = np.zeros(len(codes), dtype=float)
+        per_row[same] = step_values
+        cumulative = np.cumsum(per_row)
+        return cumulative - np.repeat(cumulative[group_start], group_lengths)
+
+    offset = since_start(intervals - step_nominal)
+    elapsed = since_start(step_nominal)
+
+    n = np.maximum(n_rows, 1)
+    mean_t = _group_sum(codes, elapsed, n_sensors) / n
+    mean_o = _group_sum(codes, offset, n_sensors) / n
+    cov = _group_sum(codes, elapsed * offset, n_sensors) / n - mean_t * mean_o
+    var = _group_sum(codes, elapsed ** 2, n_sensors) / n - mean_t ** 2
+    drift = np.where(var > 0, cov / np.where(var > 0, var, 1), np.nan) * 86400 * 1000
+
+    profile = pd.DataFrame({
+        'rows': n_rows,
+        'first': pd.to_datetime(times[group_start]),
+        'last': pd.to_datetime(times[np.r_[group_start[1:], len(codes)] - 1]),
+        'interval_median_sec': typical,
+        'interval_p95_sec': p95,
+        'interval_max_sec': _group_max(interval_codes, intervals, n_sensors),
+        'gaps': np.bincount(interval_codes[gap], minlength=n_sensors),
+        'missed_samples': missed_total,
+        'completeness': n_rows / (n_rows + missed_total),
+        'duplicate_timestamps': np.bincount(interval_codes[intervals == 0], minlength=n_sensors),
+        'backward_jumps': backward_jumps,
+        'clock_drift_ms_per_day': drift
+    }, index=pd.Index(names, name='sensor_id'))
+
+    for metric in metrics:
+        values = sensors[metric].to_numpy(dtype=float)[order]
+        missing = np.isnan(values)
+        low, high = ranges.get(metric, (-np.inf, np.inf))
+        outside = ~missing & ((values < low) | (values > high))
+        runs = _stuck_runs(codes, values, n_sensors, stuck_min_run)
+
+        profile[f'{metric}_missing_rate'] = np.bincount(codes[missing], minlength=n_sensors) / n
+        profile[f'{metric}_out_of_range_rate'] = np.bincount(codes[outside], minlength=n_sensors) / n
+        profile[f'{metric}_stuck_runs'] = runs['stuck_runs']
+        profile[f'{metric}_stuck_rate'] = runs['stuck_points'] / n
+        profile[f'{metric}_longest_run'] = runs['longest_run'].astype(np.int64)
+
+    return profile
+
+
+def gap_distribution(sensors: pd.DataFrame, bins: Sequence[float] = GAP_RATIO_BINS) -> Dict[str, int]:
+    """
+    Распределение интервалов опроса в долях типичного интервала датчика
+
+    Returns:
+        Словарь {'<lo>-<hi>': число интервалов}
+    """
+    codes, names, times = _factorize_sensors(sensors)
+    order = _sensor_order(codes, times, len(names))
+    codes, times = codes[order], times[order]
+
+    same = codes[1:] == codes[:-1]
+    intervals = np.diff(times)[same].astype(float)
+    interval_codes = codes[1:][same]
+    typical = pd.Series(intervals).groupby(interval_codes).median()
+    ratio = intervals / typical.reindex(interval_codes).to_numpy()
+
+    counts, _ = np.histogram(ratio[np.isfinite(ratio)], bins=np.asarray(bins, dtype=float))
+    labels = [f'{lo:g}-{hi:g}' for lo, hi in zip(bins[:-1], bins[1:])]
+    return dict(zip(labels, counts.tolist()))
+
+
+def _json_value(value):
+    """Приведение значения numpy/pandas к типу JSON"""
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return None if np.isnan(value) else round(float(value), 6)
+    return value
+
+
+def build_quality_report(sensors: pd.DataFrame, metrics: Sequence[str] = QUALITY_METRICS,
+                         ranges: Optional[Dict[str, tuple]] = None, gap_factor: float = GAP_FACTOR,
+                         stuck_min_run: int = STUCK_MIN_RUN) -> Dict[str, object]:
+    """
+    Машиночитаемый отчет о качестве данных
+
+    Args:
+        sensors: Данные в формате sensors_data.csv
+        metrics, ranges, gap_factor, stuck_min_run: См. profile_sensors
+
+    Returns:
+        Словарь: параметры проверки, сводка по всем датчикам,
+        распределение интервалов и профили датчиков
+    """
+    ranges = ranges or SENSOR_RANGES
+    profile = profile_sensors(sensors, metrics, ranges, gap_factor, stuck_min_run)
+    metrics = [metric for metric in metrics if metric in sensors.columns]
+    weights = profile['rows'] / max(profile['rows'].sum(), 1)
+
+    summary = {
+        'rows': int(profile['rows'].sum()),
+        'sensors': len(profile),
+        'gaps': int(profile['gaps'].sum()),
+        'missed_samples': int(profile['missed_samples'].sum()),
+        'completeness': profile['rows'].sum() / max(profile['rows'].sum() + profile['missed_samples'].sum(), 1),
+        'duplicate_timestamps': int(profile['duplicate_timestamps'].sum()),
+        'backward_jumps': int(profile['backward_jumps'].sum()),
+        'max_abs_clock_drift_ms_per_day': profile['clock_drift_ms_per_day'].abs().max(),
+        'metrics': {
+            metric: {
+                'missing_rate': (profile[f'{metric}_missing_rate'] * weights).sum(),
+                'out_of_range_rate': (profile[f'{metric}_out_of_range_rate'] * weights).sum(),
+                'stuck_rate': (profile[f'{metric}_stuck_rate'] * weights).sum(),
+                'stuck_runs': int(profile[f'{metric}_stuck_runs'].sum()),
+                'sensors_with_stuck_runs': int((profile[f'{metric}_stuck_runs'] > 0).sum())
+            }
+            for metric in metrics
+        }
+    }
+
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'period': {'start': _json_value(profile['first'].min()), 'end': _json_value(profile['last'].max())},
+        'thresholds': {
+            'gap_factor': gap_factor,
+            'stuck_min_run': stuck_min_run,
+            'ranges': {metric: list(ranges[metric]) for metric in metrics if metric in ranges}
+        },
+        'summary': json.loads(json.dumps(summary, default=_json_value)),
+        'gap_distribution': gap_distribution(sensors),
+        'sensors': [
+            {key: _json_value(value) for key, value in record.items()}
+            for record in profile.reset_index().to_dict('records')
+        ]
+    }
+
+
+def save_quality_report(report: Dict[str, object], path: str):
+    """Сохранение отчета о качестве в JSON"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Отчет о качестве данных датчиков')
+    parser.add_argument('--sensors', default='src/data/sensors_data.csv', help='CSV данных датчиков')
+    parser.add_argument('--output', default='reports/data_quality.json')
+    parser.add_argument('--gap-factor', type=float, default=GAP_FACTOR)
+    parser.add_argument('--stuck-min-run', type=int, default=STUCK_MIN_RUN)
+    args = parser.parse_args()
+
+    sensors = pd.read_csv(args.sensors, parse_dates=['timestamp'])
+    report = build_quality_report(sensors, gap_factor=args.gap_factor, stuck_min_run=args.stuck_min_run)
+    save_quality_report(report, args.output)
+
+    summary = report['summary']
+    print(f"✅ Отчет о качестве сохранен: {args.output}")
+    print(f"   Датчиков: {summary['sensors']}, записей: {summary['rows']:,}, полнота: {summary['completeness']:.1%}")
+    print(f"   Пропусков опроса: {summary['gaps']}, дублей времени: {summary['duplicate_timestamps']}")
+    for metric, stats in summary['metrics'].items():
+        print(f"   {metric}: NaN {stats['missing_rate']:.2%}, вне диапазона {stats['out_of_range_rate']:.2%}, "
+              f"залипание {stats['stuck_rate']:.2%}")
@@ -0,0 +1,283 @@
+"""
+Модуль хранилища признаков для прогноза энергопотребления
+
+Временные признаки (час, день недели, выходной, суточные синус/косинус,
+ночь, пик) и лаговые/скользящие признаки целевого ряда считаются один раз
+на временную метку и хранятся в таблице с индексом timestamp. При поступлении
+новых данных досчитываются только новые строки (и строки, чьи лаги
+зависят от исправленных значений). Для потока новых меток хранится только
+хвост ряда длиной в историю признаков, поэтому стоимость обновления не
+зависит от накопленной истории. Обучающие матрицы и векторы для
+онлайн-прогноза выдаются из одного и того же кэша.
+"""
+
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+TIME_FEATURES = ['hour', 'day_of_week', 'is_weekend', 'day_sin', 'day_cos', 'is_night', 'is_peak']
+
+
+def compute_time_features(timestamps) -> pd.DataFrame:
+    """
+    Временные признаки для набора меток (векторно)
+
+    Args:
+        timestamps: Временные метки (DatetimeIndex, Series или список)
+
+    Returns:
+        DataFrame с колонками TIME_FEATURES
+    """
+    timestamps = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    hour = timestamps.hour.to_numpy()
+    day_of_week = timestamps.dayofweek.to_numpy()
+
+    return pd.DataFrame({
+        'hour': hour,
+        'day_of_week': day_of_week,
+        'is_weekend': (day_of_week >= 5).astype(int),
+        'day_sin': np.sin(2 * np.pi * hour / 24),
+        'day_cos': np.cos(2 * np.pi * hour / 24),
+        'is_night': ((hour >= 22) | (hour <= 6)).astype(int),
+        'is_peak': (((hour >= 8) & (hour <= 10)) | ((hour >= 18) & (hour <= 20))).astype(int)
+    })
+
+
+@lru_cache(maxsize=48)
+def hour_features(hour: int, is_weekend: int = 0) -> Tuple[float, ...]:
+    """
+    Временные признаки для часа суток без даты (кэшируются)
+
+    Returns:
+        Кортеж значений в порядке TIME_FEATURES (day_of_week = 5 для выходного, иначе 0)
+    """
+    timestamp = pd.Timestamp('2024-01-06' if is_weekend else '2024-01-01') + pd.Timedelta(hours=hour)
+    return tuple(compute_time_features([timestamp]).iloc[0].astype(float))
+
+
+class FeatureStore:
+    """Кэш временных и лаговых признаков ряда с ключом timestamp"""
+
+    def __init__(self, freq: str = '30min', target: str = 'electricity_kwh',
+                 lags: Sequence[int] = (48,), rolling_windows: Sequence[int] = (48,),
+                 rolling_offset: int = 48):
+        """
+        Args:
+            freq: Шаг ряда
+            target: Целевая колонка
+            lags: Лаги в шагах (признаки lag_<k>)
+            rolling_windows: Окна скользящего среднего в шагах (rolling_mean_<w>)
+            rolling_offset: Сдвиг окна в прошлое в шагах: окно заканчивается за
+                rolling_offset шагов до метки (48 = значение известно за сутки вперед)
+        """
+        self.freq = pd.Timedelta(freq)
+        self.target = target
+        self.lags = tuple(lags)
+        self.rolling_windows = tuple(rolling_windows)
+        self.rolling_offset = rolling_offset
+        self.lag_features = ([f'lag_{lag}' for lag in self.lags]
+                             + [f'rolling_mean_{window}' for window in self.rolling_windows])
+        self.feature_names = TIME_FEATURES + self.lag_features
+        self.data = pd.DataFrame(columns=[self.target] + self.feature_names,
+                                 index=pd.DatetimeIndex([], name='timestamp'), dtype=float)
+        self.computed_rows = 0
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """Таблица признаков (пакеты потоковых обновлений склеиваются при первом чтении)"""
+        if self._pending:
+            frames = [frame for frame in [self._data, *self._pending] if len(frame)]
+            self._data = pd.concat(frames) if len(frames) > 1 else frames[0]
+            self._pending = []
+        return self._data
+
+    @data.setter
+    def data(self, value: pd.DataFrame):
+        self._data = value
+        self._pending = []
+        # Хвост ряда восстанавливается из таблицы при следующем обновлении
+        self._tail = None
+
+    def _history_tail(self) -> pd.Series:
+        """Последние _history шагов целевого ряда (состояние лагов и скользящих окон)"""
+        if self._tail is None:
+            series = self.data[self.target]
+            if len(series):
+                cut = series.index[-1] - self._history * self.freq
+                series = series.iloc[series.index.searchsorted(cut, side='left'):]
+            self._tail = series
+        return self._tail
+
+    @property
+    def _history(self) -> int:
+        """Сколько шагов истории нужно для признаков одной строки"""
+        rolling = self.rolling_offset + max(self.rolling_windows) if self.rolling_windows else 0
+        return max(max(self.lags, default=0), rolling)
+
+    def update(self, df: pd.DataFrame) -> int:
+        """
+        Добавление новых наблюдений с досчетом признаков
+
+        Временные признаки считаются только для новых меток. Если все метки
+        позже сохраненных (поток), признаки новых строк считаются по хвосту
+        ряда длиной _history шагов за O(_history + len(df)). Иначе лаговые
+        признаки пересчитываются только для строк, на которые влияют
+        пришедшие значения: от самой ранней пришедшей метки до самой поздней
+        плюс _history шагов.
+
+        Args:
+            df: DataFrame с колонками timestamp и target
+
+        Returns:
+            Число строк, для которых считались признаки
+        """
+        if len(df) == 0:
+            return 0
+        incoming = pd.Series(df[self.target].to_numpy(dtype=float),
+                             index=pd.DatetimeIndex(pd.to_datetime(df['timestamp']), name='timestamp'))
+        incoming = incoming[~incoming.index.duplicated(keep='last')].sort_index()
+
+        tail = self._history_tail()
+        if len(tail) == 0 or incoming.index[0] > tail.index[-1]:
+            return self._append(incoming, tail)
+
+        new_index = incoming.index.difference(self.data.index)
+
+        if len(new_index):
+            new_rows = compute_time_features(new_index)
+            new_rows.index = new_index
+            new_rows[self.target] = np.nan
+            for name in self.lag_features:
+                new_rows[name] = np.nan
+            self.data = pd.concat([self.data, new_rows[self.data.columns]])
+            if not self.data.index.is_monotonic_increasing:
+                self.data = self.data.sort_index()
+
+        self.data.loc[incoming.index, self.target] = incoming.to_numpy()
+
+        horizon_end = incoming.index.max() + self._history * self.freq
+        affected = ((self.data.index >= incoming.index.min()) & (self.data.index <= horizon_end)
+                    | self.data.index.isin(new_index))
+        self._compute_lags(affected)
+
+        self._tail = None
+        computed = int(affected.sum())
+        self.computed_rows += computed
+        return computed
+
+    def _append(self, incoming: pd.Series, tail: pd.Series) -> int:
+        """Признаки меток позже всех сохраненных: по хвосту ряда, без обращения к истории"""
+        rows = compute_time_features(incoming.index).astype(float)
+        rows.index = incoming.index
+        rows.insert(0, self.target, incoming.to_numpy())
+
+        series = pd.concat([tail, incoming]) if len(tail) else incoming
+        for lag in self.lags:
+            rows[f'lag_{lag}'] = series.reindex(incoming.index - lag * self.freq).to_numpy()
+        for window in self.rolling_windows:
+            rolling = series.rolling(window * self.freq, min_periods=window).mean()
+            rows[f'rolling_mean_{window}'] = rolling.reindex(incoming.index - self.rolling_offset * self.freq).to_numpy()
+
+        self._pending.append(rows[self._data.columns])
+        cut = incoming.index[-1] - self._history * self.freq
+        self._tail = series.iloc[series.index.searchsorted(cut, side='left'):]
+
+        self.computed_rows += len(rows)
+        return len(rows)
+
+    def _compute_lags(self, rows: np.ndarray):
+        """Лаговые и скользящие признаки для выбранных строк"""
+        if not rows.any():
+            return
+        index = self.data.index[rows]
+        series = self.data[self.target]
+
+        for lag in self.lags:
+            self.data.loc[index, f'lag_{lag}'] = series.reindex(index - lag * self.freq).to_numpy()
+
+        if self.rolling_windows:
+            # Окна считаются только по нужному хвосту истории
+            start = index.min() - self._history * self.freq
+            history = series[series.index >= start]
+            for window in self.rolling_windows:
+                rolling = history.rolling(window * self.freq, min_periods=window).mean()
+                self.data.loc[index, f'rolling_mean_{window}'] = (
+                    rolling.reindex(index - self.rolling_offset * self.freq).to_numpy())
+
+    def training_matrix(self, features: Optional[Sequence[str]] = None, start=None, end=None,
+                        dropna: bool = True) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Обучающая матрица из кэша
+
+        Args:
+            features: Признаки (по умолчанию все)
+            start, end: Период [start, end)
+            dropna: Удалить строки с неполными лагами
+
+        Returns:
+            (X, y)
+        """
+        features = list(features or self.feature_names)
+        frame = self.data
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame.index < pd.Timestamp(end)]
+        if dropna:
+            frame = frame.dropna(subset=features + [self.target])
+        return frame[features], frame[self.target]
+
+    def inference_matrix(self, timestamps, features: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Признаки для онлайн-прогноза
+
+        Известные метки берутся из кэша, для будущих временные признаки
+        считаются на лету, а лаги берутся из сохраненной истории.
+
+        Args:
+            timestamps: Метки прогноза
+            features: Признаки (по умолчанию все)
+
+        Returns:
+            DataFrame признаков с индексом timestamp
+        """
+        features = list(features or self.feature_names)
+        index = pd.DatetimeIndex(pd.to_datetime(timestamps), name='timestamp')
+        known = index.isin(self.data.index)
+
+        result = pd.DataFrame(index=index, columns=self.feature_names, dtype=float)
+        if known.any():
+            result.loc[index[known]] = self.data.loc[index[known], self.feature_names].to_numpy()
+
+        if (~known).any():
+            unknown = index[~known]
+            time_features = compute_time_features(unknown)
+            result.loc[unknown, TIME_FEATURES] = time_features.to_numpy(dtype=float)
+
+            series = self.data[self.target]
+            for lag in self.lags:
+                result.loc[unknown, f'lag_{lag}'] = series.reindex(unknown - lag * self.freq).to_numpy()
+            history = series[series.index >= unknown.min() - self._history * self.freq]
+            for window in self.rolling_windows:
+                rolling = history.rolling(window * self.freq, min_periods=window).mean()
+                result.loc[unknown, f'rolling_mean_{window}'] = (
+                    rolling.reindex(unknown - self.rolling_offset * self.freq).to_numpy())
+
+        return result[features]
+
+    def save(self, path: str):
+        """Сохранение кэша признаков (pickle)"""
+        self.data.to_pickle(path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'FeatureStore':
+        """Загрузка кэша, сохраненного save (параметры должны совпадать)"""
+        store = cls(**kwargs)
+        store.data = pd.read_pickle(path)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.data)
@@ -0,0 +1,404 @@
+"""
+Модуль приема потоковых показаний датчиков от реальных BMS
+
+Показания в формате sensors_data.csv принимаются из сокета, stdin или
+дописываемого файла, разбираются микро-пакетами, проверяются на допустимые
+диапазоны и передаются в хранилище через ограниченную asyncio-очередь
+(при переполнении очереди чтение источника приостанавливается).
+"""
+
+import asyncio
+import io
+import os
+import sys
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .data_generation import BMSDataGenerator, SENSOR_RANGES
+
+
+# Колонки формата sensors_data.csv
+SENSOR_COLUMNS = ['timestamp', 'sensor_id', 'temperature', 'humidity', 'co2', 'light_level', 'zone']
+NUMERIC_COLUMNS = ['temperature', 'humidity', 'co2', 'light_level']
+
+
+def parse_batch(lines: List[str]) -> pd.DataFrame:
+    """
+    Разбор микро-пакета CSV-строк одним вызовом C-парсера pandas
+
+    Args:
+        lines: Строки в формате sensors_data.csv (без заголовка)
+
+    Returns:
+        DataFrame с колонками SENSOR_COLUMNS
+    """
+    buffer = io.StringIO(''.join(line if line.endswith('\n') else line + '\n' for line in lines))
+    df = pd.read_csv(buffer, header=None, names=SENSOR_COLUMNS,
+                     dtype={'sensor_id': str, 'zone': str}, on_bad_lines='skip')
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    for col in NUMERIC_COLUMNS:
+        if df[col].dtype == object:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def validate_batch(df: pd.DataFrame, ranges: Optional[Dict[str, tuple]] = None) -> np.ndarray:
+    """
+    Векторная проверка диапазонов показаний
+
+    Пропуски (NaN) допустимы, как и в данных генератора; отклоняются строки
+    без временной метки и строки, где хотя бы одно значение вне диапазона.
+
+    Args:
+        df: Разобранный пакет
+        ranges: Допустимые диапазоны {колонка: (мин, макс)}
+
+    Returns:
+        Булева маска корректных строк
+    """
+    ranges = ranges or SENSOR_RANGES
+    valid = df['timestamp'].notna().to_numpy().copy()
+
+    for col, (low, high) in ranges.items():
+        values = df[col].to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):
+            in_range = (values >= low) & (values <= high)
+        valid &= in_range | np.isnan(values)
+
+    return valid
+
+
+class MemoryStorage:
+    """Хранилище в памяти (для тестов и последующей обработки)"""
+
+    def __init__(self):
+        self.batches = []
+
+    def append(self, df: pd.DataFrame):
+        self.batches.append(df)
+
+    def to_frame(self) -> pd.DataFrame:
+        if not self.batches:
+            return pd.DataFrame(columns=SENSOR_COLUMNS)
+        return pd.concat(self.batches, ignore_index=True)
+
+
+class CSVStorage:
+    """Хранилище, дописывающее пакеты в CSV в формате sensors_data.csv"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+
+    def append(self, df: pd.DataFrame):
+        df.to_csv(self.path, mode='a', header=self._write_header, index=False,
+                  date_format='%Y-%m-%d %H:%M:%S')
+        self._write_header = False
+
+
+class IngestionPipeline:
+    """Конвейер приема показаний с микро-пакетами и обратным давлением"""
+
+    def __init__(self, storage, batch_size: int = 5000, max_pending_batches: int = 8,
+                 flush_interval: float = 0.5, quarantine=None,
+                 ranges: Optional[Dict[str, tuple]] = None):
+        """
+        Инициализация конвейера
+
+        Args:
+            storage: Хранилище с методом append(df)
+            batch_size: Максимальное число строк в микро-пакете
+            max_pending_batches: Размер очереди пакетов (граница обратного давления)
+            flush_interval: Максимальное время накопления пакета, сек
+            quarantine: Хранилище для отклоненных строк (None - отбрасывать)
+            ranges: Допустимые диапазоны (по умолчанию SENSOR_RANGES)
+        """
+        self.storage = storage
+        self.batch_size = batch_size
+        self.max_pending_batches = max_pending_batches
+        self.flush_interval = flush_interval
+        self.quarantine = quarantine
+        self.ranges = ranges or SENSOR_RANGES
+        self.stats = {
+            'received': 0,
+            'accepted': 0,
+            'rejected': 0,
+            'batches': 0,
+            'backpressure_waits': 0,
+            'elapsed_sec': 0.0
+        }
+
+    async def _produce(self, source: AsyncIterator[str], queue: asyncio.Queue):
+        """
+        Чтение источника и формирование микро-пакетов
+
+        Пакет отправляется по заполнению или через flush_interval после
+        первой строки пакета. Срок проверяет отдельная задача-таймер, поэтому
+        пакет уходит вовремя, даже если источник (сокет, tail) затих.
+        Отправку таймера нельзя отменять: пакет уже забран и учтен в received,
+        поэтому в конце источника она дожидается завершения.
+        """
+        state = {'batch': [], 'deadline': 0.0, 'pending': None}
+
+        async def flush():
+            # Пакет забирается до ожидания очереди: новые строки идут в следующий
+            batch, state['batch'] = state['batch'], []
+            if batch:
+                await self._put(queue, batch)
+
+        async def timer():
+            while True:
+                delay = state['deadline'] - time.monotonic() if state['batch'] else self.flush_interval
+                await asyncio.sleep(max(delay, 0.001))
+                if state['batch'] and time.monotonic() >= state['deadline']:
+                    # shield: отмена таймера не прерывает put уже забранного пакета
+                    state['pending'] = asyncio.ensure_future(flush())
+                    await asyncio.shield(state['pending'])
+
+        timer_task = asyncio.ensure_future(timer())
+        try:
+            async for line in source:
+                if not line.strip() or line.startswith('timestamp'):
+                    continue
+                if not state['batch']:
+                    state['deadline'] = time.monotonic() + self.flush_interval
+                state['batch'].append(line)
+
+                if len(state['batch']) >= self.batch_size:
+                    await flush()
+        finally:
+            timer_task.cancel()
+            if state['pending'] is not None:
+                await state['pending']
+
+        await flush()
+        await queue.put(None)
+
+    async def _put(self, queue: asyncio.Queue, batch: List[str]):
+        """Постановка пакета в очередь с учетом ожиданий из-за переполнения"""
+        if queue.full():
+            self.stats['backpressure_waits'] += 1
+        self.stats['received'] += len(batch)
+        await queue.put(batch)
+
+    async def _consume(self, queue: asyncio.Queue):
+        """Разбор, проверка и запись пакетов в хранилище"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                break
+
+            # Разбор выполняется в пуле потоков, чтобы не блокировать чтение источника
+            df, valid = await loop.run_in_executor(None, self._process_batch, batch)
+
+            accepted = df[valid]
+            if len(accepted) > 0:
+                self.storage.append(accepted)
+            if self.quarantine is not None and (~valid).any():
+                self.quarantine.append(df[~valid])
+
+            self.stats['accepted'] += len(accepted)
+            self.stats['rejected'] += len(batch) - len(accepted)
+            self.stats['batches'] += 1
+
+    def _process_batch(self, batch: List[str]):
+        df = parse_batch(batch)
+        return df, validate_batch(df, self.ranges)
+
+    async def run(self, source: AsyncIterator[str]) -> Dict[str, float]:
+        """
+        Прием всех показаний источника
+
+        Args:
+            source: Асинхронный итератор CSV-строк
+
+        Returns:
+            Статистика приема (в т.ч. readings_per_sec)
+        """
+        queue = asyncio.Queue(maxsize=self.max_pending_batches)
+        start = time.perf_counter()
+
+        await asyncio.gather(self._produce(source, queue), self._consume(queue))
+
+        self.stats['elapsed_sec'] = time.perf_counter() - start
+        elapsed = self.stats['elapsed_sec']
+        self.stats['readings_per_sec'] = self.stats['received'] / elapsed if elapsed > 0 else 0.0
+        return self.stats
+
+
+async def stream_reader_source(reader: asyncio.StreamReader) -> AsyncIterator[str]:
+    """Строки из asyncio.StreamReader (сокет, pipe)"""
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        yield line.decode('utf-8', errors='replace')
+
+
+async def stdin_source() -> AsyncIterator[str]:
+    """Строки из стандартного ввода"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=2 ** 20)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    async for line in stream_reader_source(reader):
+        yield line
+
+
+async def socket_source(host: str = '0.0.0.0', port: int = 9100) -> AsyncIterator[str]:
+    """
+    Строки от всех TCP-клиентов, подключенных к серверу приема
+
+    Клиенты отправляют строки формата sensors_data.csv; чтение из сокета
+    останавливается, пока конвейер не разгрузит очередь.
+    """
+    lines = asyncio.Queue(maxsize=10000)
+
+    async def handle_client(reader, writer):
+        async for line in stream_reader_source(reader):
+            await lines.put(line)
+        writer.close()
+
+    server = await asyncio.start_server(handle_client, host, port)
+    print(f"📡 Прием показаний на {host}:{port}")
+
+    async with server:
+        while True:
+            yield await lines.get()
+
+
+async def tail_file_source(path: str, follow: bool = True,
+                           poll_interval: float = 0.2) -> AsyncIterator[str]:
+    """
+    Строки из дописываемого файла (аналог tail -f)
+
+    Args:
+        path: Путь к CSV-файлу
+        follow: Ожидать новые строки после достижения конца файла
+        poll_interval: Интервал опроса файла, сек
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        pending = ''
+        while True:
+            chunk = f.readline()
+            if chunk:
+                pending += chunk
+                if pending.endswith('\n'):
+                    yield pending
+                    pending = ''
+                continue
+            if not follow:
+                break
+            await asyncio.sleep(poll_interval)
+
+        if pending:
+            yield pending
+
+
+async def generator_source(days: int = 1, seed: int = 42,
+                           chunk_size: int = 10000) -> AsyncIterator[str]:
+    """
+    Локальный источник для тестирования: показания BMSDataGenerator в виде CSV-строк
+
+    Args:
+        days: Количество дней данных
+        seed: Seed генератора
+        chunk_size: Количество строк, сериализуемых за один раз
+    """
+    generator = BMSDataGenerator(seed=seed)
+    sensors = generator.generate_sensor_data(days=days, freq='2min')
+    sensors = generator.add_missing_values(sensors)
+    sensors = generator.add_anomalies(sensors)
+
+    for start in range(0, len(sensors), chunk_size):
+        chunk = sensors.iloc[start:start + chunk_size]
+        text = chunk.to_csv(header=False, index=False, date_format='%Y-%m-%d %H:%M:%S')
+        for line in text.splitlines(keepends=True):
+            yield line
+        # Отдаем управление циклу событий, чтобы потребитель успевал разбирать пакеты
+        await asyncio.sleep(0)
+
+
+async def replay_source(lines: List[str], chunk_size: int = 10000) -> AsyncIterator[str]:
+    """Строки из заранее подготовленного списка (без затрат на генерацию и ввод-вывод)"""
+    for start in range(0, len(lines), chunk_size):
+        for line in lines[start:start + chunk_size]:
+            yield line
+        await asyncio.sleep(0)
+
+
+def benchmark(readings: int = 500_000, seed: int = 42, **kwargs) -> Dict[str, float]:
+    """
+    Замер пропускной способности конвейера (цель - не менее 50 000 показаний/сек)
+
+    Неделя показаний BMSDataGenerator сериализуется заранее и повторяется
+    до нужного объема, поэтому замеряются только чтение, разбор, проверка
+    и запись в MemoryStorage.
+
+    Args:
+        readings: Число показаний в замере
+        seed: Seed генератора
+        **kwargs: Параметры IngestionPipeline
+
+    Returns:
+        Статистика приема (readings_per_sec - итоговая пропускная способность)
+    """
+    generator = BMSDataGenerator(seed=seed)
+    sensors = generator.generate_sensor_data(days=7, freq='2min')
+    sensors = generator.add_anomalies(generator.add_missing_values(sensors))
+    week = sensors.to_csv(header=False, index=False, date_format='%Y-%m-%d %H:%M:%S').splitlines(keepends=True)
+    lines = (week * (readings // len(week) + 1))[:readings]
+    return ingest(replay_source(lines), MemoryStorage(), **kwargs)
+
+
+def ingest(source: AsyncIterator[str], storage, **kwargs) -> Dict[str, float]:
+    """
+    Синхронная обертка: прием всех показаний источника в хранилище
+
+    Args:
+        source: Асинхронный итератор CSV-строк
+        storage: Хранилище с методом append(df)
+        **kwargs: Параметры IngestionPipeline
+
+    Returns:
+        Статистика приема
+    """
+    pipeline = IngestionPipeline(storage, **kwargs)
+    return asyncio.run(pipeline.run(source))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Прием показаний датчиков BMS')
+    parser.add_argument('--source', choices=['stdin', 'socket', 'file', 'generator'], default='stdin')
+    parser.add_argument('--path', help='Файл для режима file')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--output', default='src/data/ingested_sensors_data.csv')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help='Замер пропускной способности на N показаниях (без записи на диск)')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        stats = benchmark(args.benchmark, batch_size=args.batch_size)
+        print(f"⏱️  {stats['received']:,} показаний за {stats['elapsed_sec']:.2f} с: "
+              f"{stats['readings_per_sec']:,.0f} показаний/сек (цель - 50 000)")
+        sys.exit(0)
+
+    if args.source == 'stdin':
+        src = stdin_source()
+    elif args.source == 'socket':
+        src = socket_source(port=args.port)
+    elif args.source == 'file':
+        src = tail_file_source(args.path)
+    else:
+        src = generator_source()
+
+    stats = ingest(src, CSVStorage(args.output), batch_size=args.batch_size)
+    print(f"✅ Принято {stats['accepted']:,} показаний, отклонено {stats['rejected']:,} "
+          f"({stats['readings_per_sec']:,.0f} показаний/сек)")
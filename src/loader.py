@@ -0,0 +1,140 @@
+"""
+Модуль конкурентной загрузки входных данных дашборда
+
+Источники (датчики, энергия, аномалии, рекомендации) читаются и разбираются
+одновременно в пуле потоков под управлением asyncio, у каждого источника
+свой тайм-аут. Время загрузки ограничено самым медленным источником, а не
+суммой всех. Ошибки не глушатся: каждая оформляется типизированным
+исключением с именем источника. Для обязательных источников исключение
+пробрасывается, для необязательных подставляется пустая таблица, а ошибка
+возвращается вызывающему коду.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+
+class DataLoadError(Exception):
+    """Ошибка загрузки источника данных"""
+
+    def __init__(self, source: str, message: str):
+        super().__init__(f"{source}: {message}")
+        self.source = source
+
+
+class DataSourceNotFoundError(DataLoadError):
+    """Файл источника не найден"""
+
+
+class DataSourceTimeoutError(DataLoadError):
+    """Источник не загрузился за отведенное время"""
+
+
+class DataSourceParseError(DataLoadError):
+    """Файл источника не удалось разобрать"""
+
+
+class DataSource:
+    """Описание источника данных: CSV-файл и параметры разбора"""
+
+    def __init__(self, name: str, path: str, required: bool = True,
+                 parse_dates: Optional[List[str]] = None, timeout: float = 30.0):
+        """
+        Args:
+            name: Ключ источника в результате загрузки
+            path: Путь к CSV-файлу
+            required: Обязательный источник (ошибка прерывает загрузку)
+            parse_dates: Колонки дат
+            timeout: Тайм-аут загрузки в секундах
+        """
+        self.name = name
+        self.path = path
+        self.required = required
+        self.parse_dates = parse_dates or []
+        self.timeout = timeout
+
+    def read(self) -> pd.DataFrame:
+        """Синхронное чтение источника с переводом ошибок в типизированные"""
+        if not os.path.exists(self.path):
+            raise DataSourceNotFoundError(self.name, f"файл не найден: {self.path}")
+        try:
+            df = pd.read_csv(self.path)
+            for column in self.parse_dates:
+                if column in df.columns:
+                    df[column] = pd.to_datetime(df[column])
+            return df
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError, ValueError) as e:
+            raise DataSourceParseError(self.name, f"ошибка разбора {self.path}: {e}") from e
+        except OSError as e:
+            raise DataLoadError(self.name, f"ошибка чтения {self.path}: {e}") from e
+
+
+async def _load_source(source: DataSource, executor: ThreadPoolExecutor) -> Tuple[pd.DataFrame, float]:
+    """Загрузка одного источника в пуле потоков с тайм-аутом"""
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        df = await asyncio.wait_for(loop.run_in_executor(executor, source.read), source.timeout)
+    except asyncio.TimeoutError:
+        raise DataSourceTimeoutError(source.name, f"нет данных за {source.timeout:g} с") from None
+    return df, time.perf_counter() - start
+
+
+async def load_sources_async(sources: Sequence[DataSource],
+                             max_workers: Optional[int] = None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, DataLoadError]]:
+    """
+    Одновременная загрузка источников
+
+    Поток, не уложившийся в тайм-аут, не прерывается (Python не умеет
+    останавливать потоки), но его результат больше не ожидается.
+
+    Args:
+        sources: Источники данных
+        max_workers: Размер пула потоков (по умолчанию - по числу источников)
+
+    Returns:
+        (данные по именам источников, ошибки необязательных источников)
+
+    Raises:
+        DataLoadError: Ошибка обязательного источника
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers or max(len(sources), 1))
+    try:
+        results = await asyncio.gather(*(_load_source(source, executor) for source in sources),
+                                       return_exceptions=True)
+    finally:
+        executor.shutdown(wait=False)
+
+    data: Dict[str, pd.DataFrame] = {}
+    errors: Dict[str, DataLoadError] = {}
+    for source, result in zip(sources, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, DataLoadError):
+                result = DataLoadError(source.name, repr(result))
+            if source.required:
+                raise result
+            errors[source.name] = result
+            data[source.name] = pd.DataFrame()
+            print(f"⚠️  {result}")
+        else:
+            df, elapsed = result
+            data[source.name] = df
+            print(f"✅ {source.name}: {len(df):,} строк за {elapsed:.2f} с")
+
+    return data, errors
+
+
+def load_sources(sources: Sequence[DataSource],
+                 max_workers: Optional[int] = None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, DataLoadError]]:
+    """
+    Синхронная обертка над load_sources_async
+
+    В Jupyter, где цикл событий уже запущен, следует вызывать
+    await load_sources_async(...) напрямую.
+    """
+    return asyncio.run(load_sources_async(sources, max_workers))
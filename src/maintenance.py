@@ -0,0 +1,200 @@
+"""
+Модуль прогнозного обслуживания оборудования по equipment_data.csv
+
+Признаки считаются векторно через накопленные суммы: скользящая доля
+времени работы (duty cycle), число переключений состояния, среднее и
+дисперсия загрузки по нескольким окнам. Модель риска отказа оценивает
+все оборудование за каждую минуту одним матричным проходом.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Степень активности оборудования по статусам equipment_data.csv
+EQUIPMENT_ACTIVITY = {
+    'hvac': ('hvac_status', {'cooling': 1.0, 'heating': 1.0, 'idle': 0.0, 'off': 0.0}),
+    'lighting': ('lighting_status', {'on': 1.0, 'off': 0.0}),
+    'ventilation': ('ventilation_status', {'high': 1.0, 'medium': 0.5, 'low': 0.0, 'off': 0.0})
+}
+DEFAULT_WINDOWS = (15, 60, 240)
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Скользящая сумма по окну из window строк через накопленную сумму (O(n))"""
+    cumulative = np.concatenate([[0.0], np.cumsum(values, dtype=float)])
+    n = len(values)
+    idx = np.arange(1, n + 1)
+    return cumulative[idx] - cumulative[np.maximum(idx - window, 0)]
+
+
+def extract_equipment_features(equipment: pd.DataFrame,
+                               windows: Sequence[int] = DEFAULT_WINDOWS) -> pd.DataFrame:
+    """
+    Скользящие признаки состояния оборудования
+
+    Данные должны идти с шагом 1 минута (как в _generate_equipment_data),
+    поэтому окно в минутах равно окну в строках. В начале ряда окна неполные
+    и нормируются на фактическое число строк.
+
+    Args:
+        equipment: Данные оборудования
+        windows: Окна в минутах
+
+    Returns:
+        DataFrame: timestamp и признаки вида hvac_duty_60, hvac_transitions_60,
+        hvac_offline_60, load_mean_60, load_std_60
+    """
+    equipment = equipment.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    n = len(equipment)
+    features = {'timestamp': pd.to_datetime(equipment['timestamp']).to_numpy()}
+
+    load = equipment['equipment_load'].to_numpy(dtype=float)
+    load_valid = ~np.isnan(load)
+    load = np.where(load_valid, load, 0.0)
+
+    signals = {}
+    for name, (column, levels) in EQUIPMENT_ACTIVITY.items():
+        status = equipment[column].astype(str).to_numpy()
+        codes, _ = pd.factorize(status)
+        signals[name] = {
+            'activity': pd.Series(status).map(levels).fillna(0.0).to_numpy(),
+            'transition': np.concatenate([[0.0], (codes[1:] != codes[:-1]).astype(float)]),
+            'offline': (status == 'off').astype(float) if name == 'hvac' else None
+        }
+
+    for window in windows:
+        rows = np.minimum(np.arange(1, n + 1), window)
+
+        for name, signal in signals.items():
+            features[f'{name}_duty_{window}'] = _rolling_sum(signal['activity'], window) / rows
+            features[f'{name}_transitions_{window}'] = _rolling_sum(signal['transition'], window)
+            if signal['offline'] is not None:
+                features[f'{name}_offline_{window}'] = _rolling_sum(signal['offline'], window) / rows
+
+        count = np.maximum(_rolling_sum(load_valid.astype(float), window), 1.0)
+        mean = _rolling_sum(load, window) / count
+        mean_sq = _rolling_sum(load * load, window) / count
+        features[f'load_mean_{window}'] = mean
+        features[f'load_std_{window}'] = np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+    return pd.DataFrame(features)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class FailureRiskModel:
+    """Модель риска отказа оборудования по скользящим признакам"""
+
+    def __init__(self, equipment: Optional[List[str]] = None, threshold: float = 2.0,
+                 steepness: float = 2.0):
+        """
+        Args:
+            equipment: Оборудование для оценки (по умолчанию все из EQUIPMENT_ACTIVITY)
+            threshold: Среднеквадратичное z-отклонение, при котором риск равен 0.5
+            steepness: Крутизна перехода риска от 0 к 1
+        """
+        self.equipment = list(equipment or EQUIPMENT_ACTIVITY)
+        self.threshold = threshold
+        self.steepness = steepness
+        self.feature_names = None
+        self.classifiers = {}
+
+    def _groups(self, feature_names: List[str]) -> np.ndarray:
+        """Матрица принадлежности признаков оборудованию (признаки x оборудование)"""
+        groups = np.zeros((len(feature_names), len(self.equipment)))
+        for j, name in enumerate(self.equipment):
+            for i, feature in enumerate(feature_names):
+                # Признаки загрузки общие для всего оборудования
+                if feature.startswith(name + '_') or feature.startswith('load_'):
+                    groups[i, j] = 1.0
+        return groups
+
+    def fit(self, features: pd.DataFrame, labels: Optional[pd.DataFrame] = None) -> 'FailureRiskModel':
+        """
+        Обучение модели
+
+        Без меток запоминается профиль нормальной работы (среднее и разброс
+        признаков); риск растет с отклонением от него. С метками отказов
+        (колонки с именами оборудования, 0/1) для каждого оборудования
+        обучается логистическая регрессия.
+
+        Args:
+            features: Результат extract_equipment_features
+            labels: Метки отказов по оборудованию (необязательно)
+
+        Returns:
+            self
+        """
+        self.feature_names = [col for col in features.columns if col != 'timestamp']
+        values = features[self.feature_names].to_numpy(dtype=float)
+
+        self.mean_ = np.nanmean(values, axis=0)
+        self.std_ = np.nanstd(values, axis=0)
+        self.std_[self.std_ == 0] = 1.0
+        self.groups_ = self._groups(self.feature_names)
+
+        if labels is not None:
+            from sklearn.linear_model import LogisticRegression
+
+            scaled = np.nan_to_num((values - self.mean_) / self.std_)
+            for j, name in enumerate(self.equipment):
+                if name in labels.columns and labels[name].nunique() > 1:
+                    columns = self.groups_[:, j] > 0
+                    model = LogisticRegression(max_iter=1000)
+                    model.fit(scaled[:, columns], labels[name].to_numpy())
+                    self.classifiers[name] = (columns, model)
+        return self
+
+    def predict_risk(self, features: pd.DataFrame) -> pd.DataFrame:
+        """
+        Риск отказа всего оборудования за каждую минуту
+
+        Args:
+            features: Результат extract_equipment_features
+
+        Returns:
+            DataFrame: timestamp, risk_<оборудование>, risk_max
+        """
+        if self.feature_names is None:
+            raise RuntimeError("Модель не обучена: сначала вызовите fit()")
+
+        values = features[self.feature_names].to_numpy(dtype=float)
+        scaled = np.nan_to_num((values - self.mean_) / self.std_)
+
+        # Среднеквадратичное отклонение по группе признаков - одно матричное умножение
+        rms = np.sqrt((scaled * scaled) @ self.groups_ / self.groups_.sum(axis=0))
+        risk = _sigmoid(self.steepness * (rms - self.threshold))
+
+        for j, name in enumerate(self.equipment):
+            if name in self.classifiers:
+                columns, model = self.classifiers[name]
+                risk[:, j] = model.predict_proba(scaled[:, columns])[:, 1]
+
+        result = pd.DataFrame(risk, columns=[f'risk_{name}' for name in self.equipment])
+        result.insert(0, 'timestamp', features['timestamp'].to_numpy())
+        result['risk_max'] = risk.max(axis=1)
+        return result
+
+
+def score_equipment(equipment: pd.DataFrame, windows: Sequence[int] = DEFAULT_WINDOWS,
+                    model: Optional[FailureRiskModel] = None) -> pd.DataFrame:
+    """
+    Признаки и оценка риска отказа по данным оборудования за один вызов
+
+    Args:
+        equipment: Данные оборудования
+        windows: Окна признаков в минутах
+        model: Обученная модель (по умолчанию обучается профиль нормы на этих же данных)
+
+    Returns:
+        DataFrame с рисками по оборудованию за каждую минуту
+    """
+    features = extract_equipment_features(equipment, windows)
+    if model is None:
+        model = FailureRiskModel().fit(features)
+    return model.predict_risk(features)
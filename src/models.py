@@ -1,2 +1,402 @@
 # models.py
-#   BMS Analytics
+# Модуль проекта BMS Analytics
+"""
+Модуль моделей BMS: декларативная рекомендательная система
+
+Пороговые правила рекомендательной системы из 03_ml_models.ipynb
+вынесены в таблицы (условия статуса и приоритета по каждому параметру).
+Правила вычисляются векторными масками сразу по всем строкам агрегатов
+"зона x временное окно", поэтому за один проход получаются рекомендации
+по каждой зоне и часу, а не пять общих по зданию.
+"""
+
+import pickle
+import string
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .feature_store import compute_time_features
+
+
+ENERGY_MODEL_PATH = 'models/energy_forecast_model.pkl'
+# Признаки модели прогноза энергопотребления (как в 03_ml_models.ipynb)
+ENERGY_FEATURES = ['hour', 'day_sin', 'day_cos', 'is_weekend', 'is_night', 'is_peak']
+
+PRIORITY_ORDER = {'Высокий': 1, 'Средний': 2, 'Низкий': 3}
+DEFAULT_ACTION = 'Поддерживать текущие настройки'
+
+# Таблицы правил. Условия статуса проверяются по порядку (как цепочка if/elif),
+# первое сработавшее определяет статус и действие; иначе берется default.
+# Приоритет определяется отдельной таблицей условий с default_priority.
+# В шаблонах значения и действия доступны колонки агрегатов: {temperature:.1f}.
+RECOMMENDATION_RULES = {
+    'Температура': {
+        'metric': 'temperature',
+        'value_format': '{temperature:.1f}°C',
+        'rules': [
+            ('<', 20, '❄️ СЛИШКОМ ХОЛОДНО', 'Увеличить обогрев на 2°C'),
+            ('>', 24, '🔥 СЛИШКОМ ЖАРКО', 'Снизить температуру кондиционирования на 2°C')
+        ],
+        'default': ('✅ В НОРМЕ', DEFAULT_ACTION),
+        'priority': [('<', 18, 'Высокий'), ('>', 26, 'Высокий')],
+        'default_priority': 'Средний'
+    },
+    'Влажность': {
+        'metric': 'humidity',
+        'value_format': '{humidity:.1f}%',
+        'rules': [
+            ('<', 40, '🏜️ СЛИШКОМ СУХО', 'Включить увлажнители воздуха'),
+            ('>', 60, '🌧️ СЛИШКОМ ВЛАЖНО', 'Увеличить работу вентиляции')
+        ],
+        'default': ('✅ В НОРМЕ', DEFAULT_ACTION),
+        'priority': [('<', 30, 'Высокий'), ('>', 70, 'Высокий')],
+        'default_priority': 'Средний'
+    },
+    'CO2': {
+        'metric': 'co2',
+        'value_format': '{co2:.0f} ppm',
+        'rules': [
+            ('>', 800, '🌫️ ВЫШЕ НОРМЫ', 'Увеличить приток свежего воздуха'),
+            ('>', 600, '⚠️ НОРМАЛЬНО', 'Контролировать уровень CO2')
+        ],
+        'default': ('✅ ХОРОШО', DEFAULT_ACTION),
+        'priority': [('>', 1000, 'Высокий'), ('>', 800, 'Средний')],
+        'default_priority': 'Низкий'
+    },
+    'Освещенность': {
+        'metric': 'light_level',
+        'value_format': '{light_level:.0f} lux',
+        'rules': [
+            ('<', 200, '🌑 ОЧЕНЬ ТЕМНО', 'Добавить источники освещения'),
+            ('<', 300, '🌘 ТЕМНО', 'Увеличить яркость освещения')
+        ],
+        'default': ('✅ НОРМАЛЬНО', DEFAULT_ACTION),
+        'priority': [('<', 200, 'Высокий'), ('<', 300, 'Средний')],
+        'default_priority': 'Низкий'
+    },
+    'Энергопотребление': {
+        'metric': 'peak_ratio',
+        'value_format': '{electricity_kwh:.1f} кВт·ч (пик в {peak_hour:d}:00)',
+        'rules': [
+            ('>', 1.5, '⚡ ВЫСОКИЕ ПИКИ', 'Сместить нагрузку с {peak_hour:d}:00 на другие часы')
+        ],
+        'default': ('✅ СТАБИЛЬНО', 'Оптимизировать график работы оборудования'),
+        'priority': [('>', 2, 'Высокий')],
+        'default_priority': 'Средний'
+    }
+}
+
+_OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal
+}
+
+
+def _render_template(template: str, frame: pd.DataFrame) -> np.ndarray:
+    """
+    Векторная подстановка колонок в шаблон вида 'пик в {peak_hour:d}:00'
+
+    Строки собираются конкатенацией массивов, без форматирования по строкам.
+    """
+    result = np.full(len(frame), '', dtype=object)
+
+    for literal, field, spec, _ in string.Formatter().parse(template):
+        result = result + literal
+        if field is None:
+            continue
+
+        values = frame[field].to_numpy()
+        if spec.endswith('d'):
+            formatted = np.char.mod('%d', np.nan_to_num(values.astype(float)).astype(np.int64))
+        elif spec:
+            formatted = np.char.mod('%' + spec, values.astype(float))
+        else:
+            formatted = values.astype(str)
+        result = result + formatted.astype(object)
+
+    return result
+
+
+class RecommendationEngine:
+    """Декларативный движок правил, вычисляемых векторными масками"""
+
+    def __init__(self, rules: Optional[Dict[str, dict]] = None):
+        """
+        Args:
+            rules: Таблицы правил (по умолчанию RECOMMENDATION_RULES)
+        """
+        self.rules = rules or RECOMMENDATION_RULES
+
+    def evaluate(self, rollup: pd.DataFrame, id_columns: Optional[List[str]] = None,
+                 actionable_only: bool = False, sort_by_priority: bool = True) -> pd.DataFrame:
+        """
+        Вычисление правил по всем строкам агрегатов
+
+        Args:
+            rollup: Агрегаты (строка = зона x окно), колонки метрик из правил
+            id_columns: Колонки-идентификаторы строки (например, zone, timestamp)
+            actionable_only: Оставить только строки, требующие действий
+            sort_by_priority: Сортировать по приоритету (иначе - в порядке таблиц правил)
+
+        Returns:
+            DataFrame в формате system_recommendations.csv с колонками id_columns
+        """
+        if id_columns is None:
+            id_columns = [col for col in ('zone', 'timestamp') if col in rollup.columns]
+
+        frames = []
+        for parameter, table in self.rules.items():
+            metric = table['metric']
+            if metric not in rollup.columns:
+                continue
+
+            data = rollup[rollup[metric].notna()]
+            if len(data) == 0:
+                continue
+            values = data[metric].to_numpy(dtype=float)
+
+            conditions = [_OPERATORS[op](values, threshold) for op, threshold, _, _ in table['rules']]
+            status = np.select(conditions, [rule[2] for rule in table['rules']],
+                               default=table['default'][0]).astype(object)
+
+            # Действия с шаблонами формируются только для строк, где сработало правило
+            action = np.full(len(data), table['default'][1], dtype=object)
+            fired = np.zeros(len(data), dtype=bool)
+            for condition, (_, _, _, template) in zip(conditions, table['rules']):
+                rows = condition & ~fired
+                if rows.any():
+                    action[rows] = _render_template(template, data[rows])
+                fired |= condition
+
+            priority = np.select(
+                [_OPERATORS[op](values, threshold) for op, threshold, _ in table['priority']],
+                [rule[2] for rule in table['priority']],
+                default=table['default_priority']
+            ).astype(object)
+
+            frame = data[id_columns].reset_index(drop=True)
+            frame['Параметр'] = parameter
+            frame['Текущее значение'] = _render_template(table['value_format'], data)
+            frame['Статус'] = status
+            frame['Рекомендация'] = action
+            frame['Приоритет'] = priority
+
+            if actionable_only:
+                frame = frame[fired | (priority == 'Высокий')]
+            frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame(columns=id_columns + ['Параметр', 'Текущее значение', 'Статус',
+                                                      'Рекомендация', 'Приоритет'])
+
+        result = pd.concat(frames, ignore_index=True)
+        if not sort_by_priority:
+            return result
+        order = result['Приоритет'].map(PRIORITY_ORDER)
+        return result.iloc[np.argsort(order.to_numpy(), kind='stable')].reset_index(drop=True)
+
+
+def build_zone_rollup(sensors: pd.DataFrame, freq: str = '1h') -> pd.DataFrame:
+    """
+    Средние показатели по каждой зоне и временному окну
+
+    Args:
+        sensors: Данные датчиков
+        freq: Длина окна ('1h', '1D')
+
+    Returns:
+        DataFrame: zone, timestamp (начало окна), temperature, humidity, co2, light_level
+    """
+    windows = pd.to_datetime(sensors['timestamp']).dt.floor(freq)
+    metrics = ['temperature', 'humidity', 'co2', 'light_level']
+    rollup = sensors.groupby([sensors['zone'], windows.rename('timestamp')])[metrics].mean()
+    return rollup.reset_index()
+
+
+def build_energy_rollup(energy: pd.DataFrame, freq: str = '1D') -> pd.DataFrame:
+    """
+    Пиковость энергопотребления по окнам
+
+    Args:
+        energy: Данные энергопотребления
+        freq: Окно, внутри которого ищется пиковый час
+
+    Returns:
+        DataFrame: zone ('building'), timestamp, electricity_kwh (среднее),
+        peak_hour, peak_value (среднее в пиковый час), peak_ratio
+    """
+    timestamps = pd.to_datetime(energy['timestamp'])
+    frame = pd.DataFrame({
+        'timestamp': timestamps.dt.floor(freq),
+        'hour': timestamps.dt.hour,
+        'electricity_kwh': energy['electricity_kwh'].to_numpy()
+    })
+
+    by_hour = frame.groupby(['timestamp', 'hour'])['electricity_kwh'].mean().reset_index()
+    peaks = by_hour.loc[by_hour.groupby('timestamp')['electricity_kwh'].idxmax()]
+    peaks = peaks.rename(columns={'hour': 'peak_hour', 'electricity_kwh': 'peak_value'})
+
+    rollup = frame.groupby('timestamp')['electricity_kwh'].mean().reset_index()
+    rollup = rollup.merge(peaks, on='timestamp')
+    rollup['peak_ratio'] = rollup['peak_value'] / rollup['electricity_kwh']
+    rollup.insert(0, 'zone', 'building')
+    return rollup
+
+
+def generate_recommendations(sensors: pd.DataFrame, energy: Optional[pd.DataFrame] = None,
+                             freq: str = '1h', energy_freq: str = '1D',
+                             actionable_only: bool = True) -> pd.DataFrame:
+    """
+    Рекомендации по каждой зоне и временному окну за один проход
+
+    Args:
+        sensors: Данные датчиков
+        energy: Данные энергопотребления (рекомендации по пикам на уровне здания)
+        freq: Окно агрегатов по зонам
+        energy_freq: Окно поиска пикового часа
+        actionable_only: Оставить только рекомендации, требующие действий
+
+    Returns:
+        DataFrame рекомендаций с колонками zone и timestamp
+    """
+    engine = RecommendationEngine()
+    rollups = [build_zone_rollup(sensors, freq)]
+    if energy is not None and len(energy) > 0:
+        rollups.append(build_energy_rollup(energy, energy_freq))
+
+    rollup = pd.concat(rollups, ignore_index=True)
+    return engine.evaluate(rollup, id_columns=['zone', 'timestamp'], actionable_only=actionable_only)
+
+
+def generate_building_recommendations(sensors: pd.DataFrame,
+                                      energy: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Рекомендации по зданию в целом (как в 03_ml_models.ipynb) на общих средних
+
+    Returns:
+        DataFrame в формате reports/system_recommendations.csv
+    """
+    row = sensors[['temperature', 'humidity', 'co2', 'light_level']].mean().to_dict()
+
+    if energy is not None and len(energy) > 0:
+        by_hour = energy.groupby(pd.to_datetime(energy['timestamp']).dt.hour)['electricity_kwh'].mean()
+        row['electricity_kwh'] = energy['electricity_kwh'].mean()
+        row['peak_hour'] = by_hour.idxmax()
+        row['peak_ratio'] = by_hour.max() / row['electricity_kwh']
+
+    return building_summary_recommendations(row)
+
+
+def building_summary_recommendations(summary: Dict[str, float]) -> pd.DataFrame:
+    """
+    Рекомендации по зданию из готовых средних (например, накопленных по частям данных)
+
+    Args:
+        summary: temperature, humidity, co2, light_level и, если есть данные
+            энергопотребления, electricity_kwh, peak_hour, peak_ratio
+
+    Returns:
+        DataFrame в формате reports/system_recommendations.csv
+    """
+    return RecommendationEngine().evaluate(pd.DataFrame([summary]), id_columns=[], sort_by_priority=False)
+
+
+_energy_models = {}
+
+
+def load_energy_model(path: str = ENERGY_MODEL_PATH):
+    """
+    Загрузка модели прогноза энергопотребления (один раз на процесс)
+
+    Args:
+        path: Путь к pickle-файлу модели
+
+    Returns:
+        Обученная модель с методом predict
+    """
+    if path not in _energy_models:
+        with open(path, 'rb') as f:
+            _energy_models[path] = pickle.load(f)
+    return _energy_models[path]
+
+
+def build_energy_features(timestamps) -> pd.DataFrame:
+    """
+    Матрица признаков ENERGY_FEATURES для набора временных меток
+
+    Args:
+        timestamps: Временные метки (DatetimeIndex, Series или список)
+
+    Returns:
+        DataFrame с колонками ENERGY_FEATURES
+    """
+    return compute_time_features(timestamps)[ENERGY_FEATURES]
+
+
+def forecast_energy(start, hours: int = 24, freq: str = '30min', model=None) -> pd.DataFrame:
+    """
+    Прогноз энергопотребления на горизонт 24/168 часов одним вызовом predict
+
+    Модель обучена на 30-минутных интервалах energy_data.csv, поэтому
+    прогноз - кВт·ч за интервал freq.
+
+    Args:
+        start: Начало горизонта
+        hours: Длина горизонта в часах
+        freq: Шаг прогноза
+        model: Модель (по умолчанию load_energy_model())
+
+    Returns:
+        DataFrame: timestamp, forecast_kwh
+    """
+    model = model if model is not None else load_energy_model()
+    timestamps = pd.date_range(pd.Timestamp(start), periods=int(pd.Timedelta(hours=hours) / pd.Timedelta(freq)),
+                               freq=freq)
+    predictions = model.predict(build_energy_features(timestamps))
+    return pd.DataFrame({'timestamp': timestamps, 'forecast_kwh': np.maximum(predictions, 0)})
+
+
+def fit_energy_model(energy: pd.DataFrame):
+    """
+    Обучение модели прогноза энергопотребления здания (как в 03_ml_models.ipynb)
+
+    Args:
+        energy: Данные энергопотребления
+
+    Returns:
+        Обученная LinearRegression на признаках ENERGY_FEATURES
+    """
+    from sklearn.linear_model import LinearRegression
+
+    model = LinearRegression()
+    model.fit(build_energy_features(energy['timestamp']), energy['electricity_kwh'].to_numpy())
+    return model
+
+
+def detect_temperature_anomalies(sensors: pd.DataFrame, n_sigma: float = 3.0) -> pd.DataFrame:
+    """
+    Аномалии температуры по правилу трех сигм (как в 03_ml_models.ipynb)
+
+    Args:
+        sensors: Данные датчиков
+        n_sigma: Ширина нормального диапазона в стандартных отклонениях
+
+    Returns:
+        DataFrame в формате reports/temperature_anomalies.csv:
+        timestamp, temperature, zone, anomaly_type, deviation
+    """
+    temperature = sensors['temperature']
+    lower = temperature.mean() - n_sigma * temperature.std()
+    upper = temperature.mean() + n_sigma * temperature.std()
+
+    anomalies = sensors[(temperature < lower) | (temperature > upper)].copy()
+    too_cold = anomalies['temperature'] < lower
+    anomalies['anomaly_type'] = np.where(too_cold, 'слишком холодно', 'слишком жарко')
+    anomalies['deviation'] = np.where(too_cold, anomalies['temperature'] - lower,
+                                      anomalies['temperature'] - upper)
+
+    return anomalies[['timestamp', 'temperature', 'zone', 'anomaly_type', 'deviation']].reset_index(drop=True)
@@ -0,0 +1,297 @@
+"""
+Модуль HTTP-сервиса прогноза энергопотребления
+
+Модель загружается один раз при старте сервиса. Одиночные запросы прогноза
+на час (GET /predict?hour=8&is_weekend=0) от многих контроллеров BMS
+собираются в микро-пакеты в коротком окне времени, и на весь пакет
+выполняется один векторный predict. Задержки запросов, задержки predict и
+размеры пакетов накапливаются в гистограммах, доступных по GET /metrics.
+
+Запуск:
+    python -m src.prediction_service --port 8080
+"""
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from .feature_store import TIME_FEATURES, hour_features
+from .models import ENERGY_FEATURES, ENERGY_MODEL_PATH, load_energy_model
+
+
+# Границы корзин гистограммы задержек, мс (примерно логарифмическая шкала)
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Границы корзин гистограммы размеров пакетов
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class Histogram:
+    """Потокобезопасная гистограмма с фиксированными границами корзин"""
+
+    def __init__(self, bounds: Sequence[float]):
+        """
+        Args:
+            bounds: Верхние границы корзин по возрастанию (последняя корзина - +inf)
+        """
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Добавить наблюдение"""
+        bucket = int(np.searchsorted(self.bounds, value, side='left'))
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля сверху: граница корзины, в которую попадает квантиль"""
+        with self._lock:
+            counts = self.counts.copy()
+            maximum = self.max
+        n = counts.sum()
+        if n == 0:
+            return float('nan')
+        bucket = int(np.searchsorted(np.cumsum(counts), q * n, side='left'))
+        return float(self.bounds[bucket]) if bucket < len(self.bounds) else maximum
+
+    def to_dict(self) -> Dict[str, object]:
+        """Сводка для /metrics: число, среднее, p50/p95/p99, максимум и корзины"""
+        with self._lock:
+            counts = self.counts.tolist()
+            total, maximum = self.total, self.max
+        n = sum(counts)
+        labels = [f'le_{bound:g}' for bound in self.bounds] + ['le_inf']
+        return {
+            'count': n,
+            'mean': round(total / n, 3) if n else None,
+            'p50': self.quantile(0.50) if n else None,
+            'p95': self.quantile(0.95) if n else None,
+            'p99': self.quantile(0.99) if n else None,
+            'max': round(maximum, 3) if n else None,
+            'buckets': dict(zip(labels, counts))
+        }
+
+
+def feature_rows(hours: Sequence[int], weekends: Sequence[int]) -> pd.DataFrame:
+    """
+    Матрица признаков ENERGY_FEATURES для пар (час, выходной)
+
+    Признаки часа берутся из кэша hour_features хранилища признаков.
+    """
+    positions = [TIME_FEATURES.index(name) for name in ENERGY_FEATURES]
+    rows = [[hour_features(int(hour), int(weekend))[i] for i in positions]
+            for hour, weekend in zip(hours, weekends)]
+    return pd.DataFrame(rows, columns=ENERGY_FEATURES)
+
+
+class MicroBatcher:
+    """Сборщик одиночных запросов прогноза в микро-пакеты"""
+
+    def __init__(self, model, window_ms: float = 5.0, max_batch: int = 256):
+        """
+        Args:
+            model: Модель с методом predict
+            window_ms: Сколько ждать новых запросов после первого запроса пакета, мс
+            max_batch: Максимальный размер пакета
+        """
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batch_latency = Histogram(LATENCY_BUCKETS_MS)
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, hour: int, is_weekend: int = 0) -> Future:
+        """
+        Поставить запрос в очередь
+
+        Returns:
+            Future с прогнозом в кВт·ч
+        """
+        if not 0 <= hour <= 23:
+            raise ValueError(f"Час должен быть в диапазоне 0-23: {hour}")
+        future = Future()
+        self._queue.put((int(hour), int(bool(is_weekend)), future))
+        return future
+
+    def predict(self, hour: int, is_weekend: int = 0, timeout: Optional[float] = 10.0) -> float:
+        """Синхронный прогноз через общий пакет"""
+        return self.submit(hour, is_weekend).result(timeout)
+
+    def _collect(self) -> List[Tuple[int, int, Future]]:
+        """Первый запрос ожидается без ограничения, остальные - до конца окна"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            hours, weekends, futures = zip(*batch)
+            start = time.perf_counter()
+            try:
+                predictions = np.round(self.model.predict(feature_rows(hours, weekends)), 2)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            self.batch_latency.observe((time.perf_counter() - start) * 1000)
+            self.batch_sizes.observe(len(batch))
+            for future, prediction in zip(futures, predictions):
+                future.set_result(float(prediction))
+
+
+class PredictionService(ThreadingHTTPServer):
+    """HTTP-сервер прогноза: каждый запрос обрабатывается в своем потоке, predict - в пакете"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], model, window_ms: float = 5.0, max_batch: int = 256):
+        super().__init__(address, PredictionHandler)
+        self.batcher = MicroBatcher(model, window_ms, max_batch)
+        self.request_latency = Histogram(LATENCY_BUCKETS_MS)
+        self.started = time.time()
+
+    def metrics(self) -> Dict[str, object]:
+        return {
+            'uptime_sec': round(time.time() - self.started, 1),
+            'window_ms': self.batcher.window * 1000,
+            'max_batch': self.batcher.max_batch,
+            'request_latency_ms': self.request_latency.to_dict(),
+            'batch_predict_latency_ms': self.batcher.batch_latency.to_dict(),
+            'batch_size': self.batcher.batch_sizes.to_dict()
+        }
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик запросов:
+        GET  /predict?hour=8&is_weekend=0  - прогноз на час
+        POST /predict {"requests": [{"hour": 8, "is_weekend": 0}, ...]} - прогноз на несколько часов
+        GET  /metrics - гистограммы задержек и размеров пакетов
+        GET  /health  - проверка доступности
+    """
+
+    server: PredictionService
+
+    def _send_json(self, status: int, payload: Dict[str, object]):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _predict(self, items: List[Dict[str, object]]) -> List[Dict[str, object]]:
+        # Все запросы ставятся в очередь сразу и попадают в один пакет
+        futures = [self.server.batcher.submit(int(item['hour']), int(item.get('is_weekend', 0)))
+                   for item in items]
+        return [{'hour': int(item['hour']), 'is_weekend': int(item.get('is_weekend', 0)),
+                 'prediction_kwh': future.result(timeout=10)}
+                for item, future in zip(items, futures)]
+
+    def _handle(self, items_from_request):
+        start = time.perf_counter()
+        try:
+            items = items_from_request()
+            predictions = self._predict(items)
+        except (KeyError, ValueError, TypeError) as e:
+            self._send_json(400, {'error': f"Некорректный запрос: {e}"})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        self.server.request_latency.observe((time.perf_counter() - start) * 1000)
+        self._send_json(200, predictions[0] if len(predictions) == 1 and self.command == 'GET'
+                        else {'predictions': predictions})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/predict':
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            self._handle(lambda: [params])
+        elif url.path == '/metrics':
+            self._send_json(200, self.server.metrics())
+        elif url.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"Неизвестный путь: {url.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/predict':
+            self._send_json(404, {'error': f"Неизвестный путь: {url.path}"})
+            return
+
+        def read_items():
+            length = int(self.headers.get('Content-Length', 0))
+            return json.loads(self.rfile.read(length) or b'{}')['requests']
+
+        self._handle(read_items)
+
+    def log_message(self, format, *args):
+        # Журнал каждого запроса не пишется: при сотнях контроллеров он только тормозит сервис
+        pass
+
+
+def serve(host: str = '127.0.0.1', port: int = 8080, model_path: str = ENERGY_MODEL_PATH,
+          window_ms: float = 5.0, max_batch: int = 256) -> PredictionService:
+    """
+    Создание сервиса прогноза (запуск - service.serve_forever())
+
+    Args:
+        host: Адрес
+        port: Порт (0 - свободный порт)
+        model_path: Путь к модели
+        window_ms: Окно сбора пакета, мс
+        max_batch: Максимальный размер пакета
+
+    Returns:
+        Сервер PredictionService
+    """
+    model = load_energy_model(model_path)
+    return PredictionService((host, port), model, window_ms, max_batch)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='HTTP-сервис прогноза энергопотребления с микро-пакетами')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--model', default=ENERGY_MODEL_PATH)
+    parser.add_argument('--window-ms', type=float, default=5.0, help='Окно сбора пакета, мс')
+    parser.add_argument('--max-batch', type=int, default=256)
+    args = parser.parse_args()
+
+    service = serve(args.host, args.port, args.model, args.window_ms, args.max_batch)
+    print(f"🚀 Сервис прогноза: http://{args.host}:{service.server_address[1]}/predict?hour=8&is_weekend=0")
+    print("   Метрики: /metrics | Ctrl+C - остановка")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Сервис остановлен")
+    finally:
+        service.server_close()
@@ -0,0 +1,216 @@
+"""
+Модуль воспроизведения исторических данных BMS в ускоренном времени
+
+Файлы sensors_data.csv, energy_data.csv и equipment_data.csv объединяются
+по временной метке k-путевым слиянием на куче и выдаются в приемник
+событий со скоростью 1×, 100× или без ограничения скорости. По итогам
+воспроизведения сообщается достигнутая пропускная способность и отставание.
+"""
+
+import heapq
+import os
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Источники воспроизведения: имя -> файл в папке данных
+REPLAY_SOURCES = {
+    'sensors': 'sensors_data.csv',
+    'energy': 'energy_data.csv',
+    'equipment': 'equipment_data.csv'
+}
+
+
+def load_replay_sources(data_dir: str = 'src/data',
+                        sources: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Загрузка исторических файлов для воспроизведения
+
+    Args:
+        data_dir: Папка с CSV-файлами
+        sources: Имена источников (по умолчанию все из REPLAY_SOURCES)
+
+    Returns:
+        Словарь {источник: DataFrame, отсортированный по timestamp}
+    """
+    frames = {}
+    for name in sources or list(REPLAY_SOURCES):
+        df = pd.read_csv(os.path.join(data_dir, REPLAY_SOURCES[name]), parse_dates=['timestamp'])
+        frames[name] = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    return frames
+
+
+def _source_stream(name: str, df: pd.DataFrame) -> Iterator[Tuple[int, str, dict]]:
+    """Поток (время в нс, источник, запись) одного отсортированного файла"""
+    times = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    columns = [col for col in df.columns if col != 'timestamp']
+    rows = df[columns].itertuples(index=False, name=None)
+
+    for ts, values in zip(times, rows):
+        yield int(ts), name, dict(zip(columns, values))
+
+
+def merge_sources(frames: Dict[str, pd.DataFrame]) -> Iterator[Tuple[int, str, dict]]:
+    """
+    K-путевое слияние источников по времени (куча на k головах потоков)
+
+    При равных временных метках порядок определяется порядком источников.
+
+    Args:
+        frames: Отсортированные по времени DataFrame
+
+    Returns:
+        Итератор (время в нс, источник, запись) в порядке возрастания времени
+    """
+    streams = [_source_stream(name, df) for name, df in frames.items()]
+    heap = []
+
+    for rank, stream in enumerate(streams):
+        head = next(stream, None)
+        if head is not None:
+            heap.append((head[0], rank, head, stream))
+    heapq.heapify(heap)
+
+    while heap:
+        ts, rank, event, stream = heap[0]
+        yield event
+
+        head = next(stream, None)
+        if head is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (head[0], rank, head, stream))
+
+
+class ListSink:
+    """Приемник, сохраняющий события в список"""
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event: dict):
+        self.events.append(event)
+
+
+class CountingSink:
+    """Приемник, только подсчитывающий события по источникам (замер пропускной способности)"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def __call__(self, event: dict):
+        self.counts[event['source']] = self.counts.get(event['source'], 0) + 1
+
+
+class HistoricalReplayer:
+    """Воспроизведение исторических данных в ускоренном времени"""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], speed: Optional[float] = 100.0):
+        """
+        Инициализация воспроизведения
+
+        Args:
+            frames: Источники {имя: DataFrame с колонкой timestamp}
+            speed: Ускорение относительно реального времени
+                   (1.0 - реальное время, None - без ограничения скорости)
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("Скорость воспроизведения должна быть положительной")
+
+        self.frames = frames
+        self.speed = speed
+
+    def run(self, sink: Callable[[dict], None], limit: Optional[int] = None) -> Dict[str, float]:
+        """
+        Воспроизведение событий в приемник
+
+        Событие - словарь {'source', 'timestamp', 'data'}. Отставание - разница
+        между фактическим и плановым моментом выдачи события; оно растет, если
+        приемник не успевает обрабатывать поток с заданной скоростью.
+
+        Args:
+            sink: Вызываемый объект, принимающий событие
+            limit: Максимальное количество событий
+
+        Returns:
+            Отчет: events, elapsed_sec, events_per_sec, mean_lag_sec, max_lag_sec, by_source
+        """
+        n_events = 0
+        lag_sum = 0.0
+        max_lag = 0.0
+        by_source = {}
+
+        first_ts = None
+        start_wall = time.perf_counter()
+
+        for ts, source, data in merge_sources(self.frames):
+            if limit is not None and n_events >= limit:
+                break
+            if first_ts is None:
+                first_ts = ts
+
+            if self.speed is not None:
+                # Плановый момент выдачи события в масштабе воспроизведения
+                target = start_wall + (ts - first_ts) / 1e9 / self.speed
+                now = time.perf_counter()
+                if target > now:
+                    time.sleep(target - now)
+                else:
+                    lag = now - target
+                    lag_sum += lag
+                    max_lag = max(max_lag, lag)
+
+            sink({'source': source, 'timestamp': pd.Timestamp(ts), 'data': data})
+
+            n_events += 1
+            by_source[source] = by_source.get(source, 0) + 1
+
+        elapsed = time.perf_counter() - start_wall
+        return {
+            'events': n_events,
+            'elapsed_sec': elapsed,
+            'events_per_sec': n_events / elapsed if elapsed > 0 else 0.0,
+            'mean_lag_sec': lag_sum / n_events if n_events else 0.0,
+            'max_lag_sec': max_lag,
+            'by_source': by_source
+        }
+
+
+def replay(sink: Callable[[dict], None], data_dir: str = 'src/data',
+           speed: Optional[float] = 100.0, limit: Optional[int] = None) -> Dict[str, float]:
+    """
+    Воспроизведение всех исторических файлов в приемник
+
+    Args:
+        sink: Приемник событий
+        data_dir: Папка с CSV-файлами
+        speed: Ускорение (1.0, 100.0, ... или None - без ограничения)
+        limit: Максимальное количество событий
+
+    Returns:
+        Отчет о воспроизведении
+    """
+    replayer = HistoricalReplayer(load_replay_sources(data_dir), speed=speed)
+    return replayer.run(sink, limit=limit)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Воспроизведение исторических данных BMS')
+    parser.add_argument('--data-dir', default='src/data')
+    parser.add_argument('--speed', type=float, default=None,
+                        help='Ускорение (по умолчанию без ограничения скорости)')
+    parser.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args()
+
+    report = replay(CountingSink(), data_dir=args.data_dir, speed=args.speed, limit=args.limit)
+    print(f"✅ Воспроизведено {report['events']:,} событий за {report['elapsed_sec']:.2f} сек")
+    print(f"   • Пропускная способность: {report['events_per_sec']:,.0f} событий/сек")
+    print(f"   • Отставание: среднее {report['mean_lag_sec'] * 1000:.1f} мс, "
+          f"максимальное {report['max_lag_sec'] * 1000:.1f} мс")
+    for source, count in report['by_source'].items():
+        print(f"   • {source}: {count:,}")
@@ -0,0 +1,347 @@
+"""
+Модуль потоковой генерации отчетов
+
+Все разделы analysis_report.csv, system_recommendations.csv,
+recommendations_report.txt и ml_final_report.txt считаются за один проход
+по частям данных объединяемыми накопителями: моменты и гистограммы
+(StatsAccumulator), KLL-скетчи процентилей, суммы по часам для пикового
+часа и суммы ошибок модели для MAE/R². Отчет строится за любой период
+многолетней истории без загрузки ее целиком (CSV по чанкам или архив
+SensorArchive).
+
+Пример:
+    python -m src.reporting --start 2024-01-02 --end 2024-01-05 --output reports/range
+"""
+
+import os
+from datetime import datetime
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .data_processor import SENSOR_METRICS, StatsAccumulator, format_analysis_report
+from .models import build_energy_features, building_summary_recommendations
+from .sketches import COMFORT_QUANTILES, KLLSketch
+
+
+# Отчеты за период пишутся отдельно, чтобы не затирать отчеты ноутбуков в reports/
+PERIOD_REPORTS_DIR = os.path.join('reports', 'period')
+
+
+def iter_csv_chunks(path: str, start=None, end=None, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    Части CSV за период [start, end)
+
+    Если файл упорядочен по времени, чтение прекращается после end.
+
+    Args:
+        path: Путь к CSV с колонкой timestamp
+        start, end: Границы периода
+        chunksize: Строк в чанке
+
+    Yields:
+        DataFrame с разобранной колонкой timestamp
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    last_seen = None
+    ordered = True
+
+    for chunk in pd.read_csv(path, chunksize=chunksize, parse_dates=['timestamp']):
+        times = chunk['timestamp']
+        if len(times) == 0:
+            continue
+        ordered = ordered and times.is_monotonic_increasing and (last_seen is None or times.iloc[0] >= last_seen)
+        last_seen = times.iloc[-1]
+
+        mask = np.ones(len(chunk), dtype=bool)
+        if start is not None:
+            mask &= (times >= start).to_numpy()
+        if end is not None:
+            mask &= (times < end).to_numpy()
+        if mask.any():
+            yield chunk[mask]
+
+        if ordered and end is not None and last_seen >= end:
+            break
+
+
+def iter_archive_chunks(archive, start=None, end=None, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    Части архива SensorArchive за период [start, end) (чтение через memmap)
+
+    Yields:
+        DataFrame в формате sensors_data.csv
+    """
+    data = archive.slice_time(start, end)
+    n_rows = len(data['timestamp'])
+    dictionaries = {name: archive.dictionary(name) for name in archive.meta['dictionaries']}
+
+    for offset in range(0, n_rows, chunksize):
+        frame = {}
+        for name, values in data.items():
+            block = np.asarray(values[offset:offset + chunksize])
+            if name == 'timestamp':
+                frame[name] = pd.to_datetime(block)
+            elif name in dictionaries:
+                frame[name] = dictionaries[name][block]
+            else:
+                frame[name] = block.astype(float)
+        yield pd.DataFrame(frame)
+
+
+class ReportAccumulator:
+    """Объединяемые накопители всех разделов отчетов"""
+
+    def __init__(self, quantiles: Sequence[float] = COMFORT_QUANTILES, k: int = 200,
+                 model=None, n_sigma: float = 3.0, seed: int = 42):
+        """
+        Args:
+            quantiles: Уровни процентилей analysis_report
+            k: Точность KLL-скетчей
+            model: Модель прогноза энергопотребления для MAE/R² (None - раздел пропускается)
+            n_sigma: Ширина нормального диапазона температуры для подсчета аномалий
+            seed: Зерно скетчей
+        """
+        self.quantiles = tuple(quantiles)
+        self.model = model
+        self.n_sigma = n_sigma
+
+        self.sensor_stats = StatsAccumulator(SENSOR_METRICS, quantiles=())
+        self.sketches = {col: KLLSketch(k, seed=seed + i)
+                         for i, col in enumerate(SENSOR_METRICS + ['electricity_kwh'])}
+        self.sensor_start = self.sensor_end = None
+
+        self.energy_sum = np.zeros(24)
+        self.energy_count = np.zeros(24)
+        # n, сумма |ошибок|, сумма квадратов ошибок, сумма y, сумма y²
+        self.model_sums = np.zeros(5)
+
+    def update_sensors(self, chunk: pd.DataFrame) -> 'ReportAccumulator':
+        """Добавление части данных датчиков"""
+        if len(chunk) == 0:
+            return self
+        values = chunk[SENSOR_METRICS].to_numpy(dtype=float)
+        self.sensor_stats.update(values)
+        for j, col in enumerate(SENSOR_METRICS):
+            self.sketches[col].update(values[:, j])
+
+        times = pd.to_datetime(chunk['timestamp'])
+        first, last = times.min(), times.max()
+        self.sensor_start = first if self.sensor_start is None else min(self.sensor_start, first)
+        self.sensor_end = last if self.sensor_end is None else max(self.sensor_end, last)
+        return self
+
+    def update_energy(self, chunk: pd.DataFrame) -> 'ReportAccumulator':
+        """Добавление части данных энергопотребления"""
+        if len(chunk) == 0:
+            return self
+        values = chunk['electricity_kwh'].to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        hours = pd.to_datetime(chunk['timestamp']).dt.hour.to_numpy()
+
+        self.energy_sum += np.bincount(hours[valid], weights=values[valid], minlength=24)
+        self.energy_count += np.bincount(hours[valid], minlength=24)
+        self.sketches['electricity_kwh'].update(values)
+
+        if self.model is not None and valid.any():
+            y = values[valid]
+            errors = y - self.model.predict(build_energy_features(chunk['timestamp'][valid]))
+            self.model_sums += [len(y), np.abs(errors).sum(), (errors * errors).sum(), y.sum(), (y * y).sum()]
+        return self
+
+    def merge(self, other: 'ReportAccumulator') -> 'ReportAccumulator':
+        """Объединение с накопителем по другой части данных"""
+        self.sensor_stats.merge(other.sensor_stats)
+        for col, sketch in self.sketches.items():
+            sketch.merge(other.sketches[col])
+        for attr, pick in (('sensor_start', min), ('sensor_end', max)):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            setattr(self, attr, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        self.energy_sum += other.energy_sum
+        self.energy_count += other.energy_count
+        self.model_sums += other.model_sums
+        return self
+
+    # ---------- разделы отчетов ----------
+
+    def summary(self) -> dict:
+        """Средние показатели по зданию (вход для правил рекомендаций)"""
+        row = dict(zip(SENSOR_METRICS, self.sensor_stats.mean))
+        total = self.energy_count.sum()
+        if total > 0:
+            by_hour = np.where(self.energy_count > 0, self.energy_sum / np.maximum(self.energy_count, 1), -np.inf)
+            row['electricity_kwh'] = self.energy_sum.sum() / total
+            row['peak_hour'] = int(np.argmax(by_hour))
+            row['peak_ratio'] = by_hour.max() / row['electricity_kwh']
+        return row
+
+    def analysis_report(self) -> pd.DataFrame:
+        """Таблица analysis_report.csv"""
+        summary = self.summary()
+        percentiles = {col: sketch.quantiles(self.quantiles) for col, sketch in self.sketches.items()}
+        return format_analysis_report(summary, summary.get('electricity_kwh', np.nan),
+                                      summary.get('peak_hour', 0), percentiles, self.quantiles)
+
+    def recommendations(self) -> pd.DataFrame:
+        """Таблица system_recommendations.csv"""
+        return building_summary_recommendations(self.summary())
+
+    def temperature_anomalies(self) -> dict:
+        """Число аномалий температуры по правилу n_sigma (оценка по гистограмме)"""
+        j = SENSOR_METRICS.index('temperature')
+        table = self.sensor_stats.result()
+        mean, std = table.loc['temperature', 'mean'], table.loc['temperature', 'std']
+        lower, upper = mean - self.n_sigma * std, mean + self.n_sigma * std
+        count = self.sensor_stats.count_outside(lower, upper)[j]
+        return {'lower': lower, 'upper': upper, 'count': int(round(count))}
+
+    def model_metrics(self) -> Optional[dict]:
+        """MAE и R² модели прогноза за период"""
+        n, abs_sum, sq_sum, y_sum, y2_sum = self.model_sums
+        if n == 0:
+            return None
+        total_ss = y2_sum - y_sum * y_sum / n
+        return {'n': int(n), 'mae': abs_sum / n, 'r2': 1 - sq_sum / total_ss if total_ss > 0 else np.nan}
+
+    def recommendations_text(self) -> str:
+        """Текст recommendations_report.txt"""
+        summary = self.summary()
+        recommendations = self.recommendations()
+        statuses = dict(zip(recommendations['Параметр'], recommendations['Статус']))
+
+        def actions(priority):
+            return recommendations[recommendations['Приоритет'] == priority]['Рекомендация'].tolist()
+
+        high, medium, low = actions('Высокий'), actions('Средний'), actions('Низкий')
+        lines = [
+            '',
+            '📋 ОТЧЕТ РЕКОМЕНДАТЕЛЬНОЙ СИСТЕМЫ',
+            '================================',
+            '',
+            f'📅 Период: {self._period()}',
+            '',
+            '📊 ТЕКУЩЕЕ СОСТОЯНИЕ:',
+            f"• Температура: {summary['temperature']:.1f}°C ({statuses.get('Температура', '')})",
+            f"• Влажность: {summary['humidity']:.1f}% ({statuses.get('Влажность', '')})",
+            f"• CO2: {summary['co2']:.0f} ppm ({statuses.get('CO2', '')})",
+            f"• Освещенность: {summary['light_level']:.0f} lux ({statuses.get('Освещенность', '')})"
+        ]
+        if 'electricity_kwh' in summary:
+            lines.append(f"• Энергопотребление: {summary['electricity_kwh']:.1f} кВт·ч "
+                         f"({statuses.get('Энергопотребление', '')})")
+
+        lines += ['', '🎯 ПРИОРИТЕТНЫЕ ДЕЙСТВИЯ:'] + [f'• {action}' for action in high]
+        lines += ['', '📅 ПЛАН РАБОТЫ:']
+        for i, (title, items) in enumerate([('НЕМЕДЛЕННО', high), ('В БЛИЖАЙШЕЕ ВРЕМЯ', medium),
+                                            ('ОПТИМИЗАЦИЯ', low)], start=1):
+            lines.append(f'{i}. {title} ({len(items)} действий):')
+            lines += [f'   - {action}' for action in items]
+            lines.append('')
+        return '\n'.join(lines)
+
+    def ml_report_text(self) -> str:
+        """Текст ml_final_report.txt за период"""
+        anomalies = self.temperature_anomalies()
+        metrics = self.model_metrics()
+        recommendations = self.recommendations()
+
+        if metrics is not None:
+            model_line = f"   • Метрики за период: R² = {metrics['r2']:.2f}, MAE = {metrics['mae']:.2f} кВт·ч ({metrics['n']} интервалов)"
+        else:
+            model_line = '   • Метрики за период: N/A (нет модели или данных энергопотребления)'
+
+        return '\n'.join([
+            '',
+            '🤖 ОТЧЕТ ПО МОДЕЛЯМ ЗА ПЕРИОД',
+            '=============================',
+            '',
+            f"📅 Дата создания: {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+            f'📅 Период данных: {self._period()}',
+            f'📊 Показаний датчиков: {int((self.sensor_stats.count + self.sensor_stats.nan_count).max())}',
+            '',
+            '1. 📈 МОДЕЛЬ ПРОГНОЗА ЭНЕРГОПОТРЕБЛЕНИЯ',
+            '   • Тип: Линейная регрессия',
+            model_line,
+            '',
+            '2. 🌡️ МОДЕЛЬ ОБНАРУЖЕНИЯ АНОМАЛИЙ ТЕМПЕРАТУРЫ',
+            f'   • Тип: Статистический анализ (правило {self.n_sigma:g} сигм)',
+            f"   • Нормальный диапазон: {anomalies['lower']:.1f} - {anomalies['upper']:.1f}°C",
+            f"   • Обнаружено аномалий: {anomalies['count']}",
+            '',
+            '3. 💡 РЕКОМЕНДАТЕЛЬНАЯ СИСТЕМА',
+            f'   • Количество рекомендаций: {len(recommendations)}',
+            f"   • Высокого приоритета: {int((recommendations['Приоритет'] == 'Высокий').sum())}",
+            ''
+        ])
+
+    def _period(self) -> str:
+        if self.sensor_start is None:
+            return 'нет данных'
+        return f"{self.sensor_start:%Y-%m-%d %H:%M} - {self.sensor_end:%Y-%m-%d %H:%M}"
+
+
+def build_reports(sensor_chunks, energy_chunks=None, output_dir: str = PERIOD_REPORTS_DIR,
+                  model=None, quantiles: Sequence[float] = COMFORT_QUANTILES) -> ReportAccumulator:
+    """
+    Все отчеты за один проход по частям данных
+
+    Args:
+        sensor_chunks: Итератор частей данных датчиков
+        energy_chunks: Итератор частей данных энергопотребления
+        output_dir: Папка для отчетов (по умолчанию отдельная от отчетов ноутбуков в reports/)
+        model: Модель прогноза энергопотребления
+        quantiles: Уровни процентилей
+
+    Returns:
+        ReportAccumulator с накопленными агрегатами
+    """
+    accumulator = ReportAccumulator(quantiles, model=model)
+    for chunk in sensor_chunks:
+        accumulator.update_sensors(chunk)
+    for chunk in (energy_chunks or []):
+        accumulator.update_energy(chunk)
+
+    if accumulator.sensor_start is None:
+        raise ValueError("Нет данных датчиков за выбранный период")
+
+    os.makedirs(output_dir, exist_ok=True)
+    accumulator.analysis_report().to_csv(os.path.join(output_dir, 'analysis_report.csv'),
+                                         index=False, encoding='utf-8')
+    accumulator.recommendations().to_csv(os.path.join(output_dir, 'system_recommendations.csv'),
+                                         index=False, encoding='utf-8')
+    with open(os.path.join(output_dir, 'recommendations_report.txt'), 'w', encoding='utf-8') as f:
+        f.write(accumulator.recommendations_text())
+    with open(os.path.join(output_dir, 'ml_final_report.txt'), 'w', encoding='utf-8') as f:
+        f.write(accumulator.ml_report_text())
+    return accumulator
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .models import ENERGY_MODEL_PATH, load_energy_model
+
+    parser = argparse.ArgumentParser(description='Отчеты за период одним потоковым проходом')
+    parser.add_argument('--sensors', default='src/data/sensors_data.csv', help='CSV данных датчиков')
+    parser.add_argument('--archive', default=None, help='Архив SensorArchive вместо CSV датчиков')
+    parser.add_argument('--energy', default='src/data/energy_data.csv')
+    parser.add_argument('--model', default=ENERGY_MODEL_PATH)
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--output', default=PERIOD_REPORTS_DIR)
+    args = parser.parse_args()
+
+    if args.archive:
+        from .archive import SensorArchive
+        sensor_chunks = iter_archive_chunks(SensorArchive(args.archive), args.start, args.end, args.chunksize)
+    else:
+        sensor_chunks = iter_csv_chunks(args.sensors, args.start, args.end, args.chunksize)
+    energy_chunks = (iter_csv_chunks(args.energy, args.start, args.end, args.chunksize)
+                     if args.energy and os.path.exists(args.energy) else None)
+    model = load_energy_model(args.model) if args.model and os.path.exists(args.model) else None
+
+    accumulator = build_reports(sensor_chunks, energy_chunks, args.output, model)
+    print(f"✅ Отчеты за период {accumulator._period()} сохранены в {args.output}")
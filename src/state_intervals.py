@@ -0,0 +1,211 @@
+"""
+Модуль интервального (run-length) хранения статусов оборудования
+
+_generate_equipment_data записывает строку в минуту с тремя строковыми
+статусами, которые в основном повторяются. Здесь ряды статусов хранятся
+как интервалы (начало, конец, состояние), а запросы "состояние в момент t"
+и "сколько минут охлаждения в марте" выполняются бинарным поиском, т.е.
+пропорционально числу смен состояния, а не числу минут.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+EQUIPMENT_STATUS_COLUMNS = ['hvac_status', 'lighting_status', 'ventilation_status']
+
+
+def _to_ns(value) -> int:
+    return int(pd.Timestamp(value).value)
+
+
+class StateIntervals:
+    """Ряд состояний в виде непересекающихся интервалов [start, end)"""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, codes: np.ndarray,
+                 categories: np.ndarray, name: Optional[str] = None):
+        """
+        Args:
+            starts, ends: Границы интервалов в наносекундах (int64), по возрастанию
+            codes: Код состояния каждого интервала
+            categories: Названия состояний по кодам
+            name: Имя ряда (например, hvac_status)
+        """
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.categories = np.asarray(categories, dtype=object)
+        self.name = name
+
+    @classmethod
+    def encode(cls, timestamps, states, step: str = '1min',
+               name: Optional[str] = None) -> 'StateIntervals':
+        """
+        Кодирование поминутного ряда состояний в интервалы
+
+        Каждая точка покрывает [t, t + step). Новый интервал начинается при смене
+        состояния или при разрыве в данных больше step.
+
+        Args:
+            timestamps: Временные метки
+            states: Состояния в те же моменты
+            step: Период дискретизации ряда
+            name: Имя ряда
+
+        Returns:
+            StateIntervals
+        """
+        times = pd.to_datetime(pd.Series(timestamps)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+        codes, categories = pd.factorize(pd.Series(states).astype(str).to_numpy()[order])
+        step_ns = pd.Timedelta(step).value
+
+        if len(times) == 0:
+            return cls(np.empty(0), np.empty(0), np.empty(0), np.asarray(categories), name)
+
+        boundary = np.ones(len(times), dtype=bool)
+        boundary[1:] = (codes[1:] != codes[:-1]) | (np.diff(times) > step_ns)
+        first = np.flatnonzero(boundary)
+        last = np.append(first[1:], len(times)) - 1
+
+        return cls(times[first], times[last] + step_ns, codes[first], np.asarray(categories), name)
+
+    def decode(self, step: str = '1min') -> pd.DataFrame:
+        """
+        Восстановление поминутного ряда
+
+        Returns:
+            DataFrame: timestamp, state
+        """
+        step_ns = pd.Timedelta(step).value
+        lengths = (self.ends - self.starts) // step_ns
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        times = np.repeat(self.starts, lengths) + offsets * step_ns
+
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(times),
+            'state': self.categories[np.repeat(self.codes, lengths)]
+        })
+
+    def to_frame(self) -> pd.DataFrame:
+        """Интервалы в виде DataFrame: start, end, state"""
+        return pd.DataFrame({
+            'start': pd.to_datetime(self.starts),
+            'end': pd.to_datetime(self.ends),
+            'state': self.categories[self.codes]
+        })
+
+    def state_at(self, when):
+        """
+        Состояние в момент времени (бинарный поиск)
+
+        Args:
+            when: Момент времени или массив моментов
+
+        Returns:
+            Состояние (None вне интервалов) или массив состояний
+        """
+        scalar = np.ndim(when) == 0 and not isinstance(when, (list, pd.Series, pd.DatetimeIndex))
+        times = pd.to_datetime(pd.Series([when] if scalar else when)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        idx = np.searchsorted(self.starts, times, side='right') - 1
+        inside = (idx >= 0) & (times < self.ends[np.maximum(idx, 0)])
+        result = np.where(inside, self.categories[self.codes[np.maximum(idx, 0)]], None)
+        return result[0] if scalar else result
+
+    def _window(self, start, end):
+        """Интервалы, пересекающие [start, end), и их обрезанные длительности"""
+        start_ns = _to_ns(start) if start is not None else int(self.starts[0]) if len(self.starts) else 0
+        end_ns = _to_ns(end) if end is not None else int(self.ends[-1]) if len(self.ends) else 0
+
+        lo = np.searchsorted(self.ends, start_ns, side='right')
+        hi = np.searchsorted(self.starts, end_ns, side='left')
+        overlap = np.minimum(self.ends[lo:hi], end_ns) - np.maximum(self.starts[lo:hi], start_ns)
+        return self.codes[lo:hi], np.maximum(overlap, 0), end_ns - start_ns
+
+    def durations(self, start=None, end=None) -> pd.Series:
+        """
+        Суммарная длительность каждого состояния в периоде
+
+        Returns:
+            Series: состояние -> минуты
+        """
+        codes, overlap, _ = self._window(start, end)
+        totals = np.bincount(codes, weights=overlap, minlength=len(self.categories))
+        return pd.Series(totals / 60e9, index=self.categories, name='minutes')
+
+    def total_minutes(self, state: str, start=None, end=None) -> float:
+        """
+        Минуты в состоянии за период, например total_minutes('cooling', '2024-03-01', '2024-04-01')
+        """
+        return float(self.durations(start, end).get(state, 0.0))
+
+    def duty_cycle(self, state: str, start=None, end=None) -> float:
+        """Доля покрытого данными времени периода, проведенная в состоянии"""
+        durations = self.durations(start, end)
+        covered = durations.sum()
+        return float(durations.get(state, 0.0) / covered) if covered > 0 else np.nan
+
+    def transitions(self, start=None, end=None) -> int:
+        """Количество смен состояния внутри периода"""
+        codes, overlap, _ = self._window(start, end)
+        codes = codes[overlap > 0]
+        return int((codes[1:] != codes[:-1]).sum()) if len(codes) > 1 else 0
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+def encode_equipment(equipment: pd.DataFrame, step: str = '1min',
+                     columns=None) -> Dict[str, StateIntervals]:
+    """
+    Интервальное кодирование статусов оборудования
+
+    Args:
+        equipment: Данные оборудования (equipment_data.csv)
+        step: Период дискретизации
+        columns: Колонки статусов (по умолчанию EQUIPMENT_STATUS_COLUMNS)
+
+    Returns:
+        Словарь {колонка: StateIntervals}
+    """
+    return {
+        col: StateIntervals.encode(equipment['timestamp'], equipment[col], step=step, name=col)
+        for col in (columns or EQUIPMENT_STATUS_COLUMNS)
+    }
+
+
+def save_intervals(series: Dict[str, StateIntervals], path: str):
+    """
+    Сохранение интервальных рядов в один .npz-файл
+
+    Args:
+        series: Словарь {имя: StateIntervals}
+        path: Путь к файлу
+    """
+    arrays = {}
+    for name, intervals in series.items():
+        arrays[f'{name}__starts'] = intervals.starts
+        arrays[f'{name}__ends'] = intervals.ends
+        arrays[f'{name}__codes'] = intervals.codes
+        arrays[f'{name}__categories'] = intervals.categories.astype(str)
+    np.savez_compressed(path, **arrays)
+
+
+def load_intervals(path: str) -> Dict[str, StateIntervals]:
+    """
+    Загрузка интервальных рядов, сохраненных save_intervals
+
+    Returns:
+        Словарь {имя: StateIntervals}
+    """
+    series = {}
+    with np.load(path, allow_pickle=False) as data:
+        names = sorted({key.rsplit('__', 1)[0] for key in data.files})
+        for name in names:
+            series[name] = StateIntervals(data[f'{name}__starts'], data[f'{name}__ends'],
+                                          data[f'{name}__codes'], data[f'{name}__categories'], name)
+    return series
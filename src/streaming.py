@@ -0,0 +1,215 @@
+"""
+Модуль потоковой оконной агрегации показаний с поздними и неупорядоченными данными
+
+_generate_energy_data и _generate_equipment_data считают окна через resample
+по полному отсортированному DataFrame. Реальные BMS присылают точки с
+опозданием и не по порядку, поэтому здесь окна ведутся инкрементально:
+результат окна выдается, когда водяной знак (watermark) по времени событий
+проходит конец окна, а опоздавшие в пределах allowed_lateness точки
+выдаются как исправление того же окна без пересчета всей истории.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+SUPPORTED_AGGREGATIONS = ('mean', 'sum', 'count', 'min', 'max')
+
+# Окна, используемые генератором данных
+ENERGY_WINDOW_AGGREGATIONS = {'temperature': 'mean', 'light_level': 'mean', 'co2': 'mean'}
+EQUIPMENT_WINDOW_AGGREGATIONS = {'temperature': 'mean', 'light_level': 'mean'}
+
+
+class WindowedAggregator:
+    """Агрегатор фиксированных окон по времени событий с водяными знаками"""
+
+    def __init__(self, window: str = '30min', aggregations: Optional[Dict[str, str]] = None,
+                 watermark_delay: str = '0min', allowed_lateness: str = '30min'):
+        """
+        Инициализация агрегатора
+
+        Args:
+            window: Длина окна ('30min', '1min')
+            aggregations: Агрегаты {колонка: 'mean'|'sum'|'count'|'min'|'max'}
+            watermark_delay: Отставание водяного знака от максимального времени события
+                             (ожидаемая степень неупорядоченности потока)
+            allowed_lateness: Сколько окно принимает опоздавшие точки после закрытия
+        """
+        self.aggregations = aggregations or dict(ENERGY_WINDOW_AGGREGATIONS)
+        for col, agg in self.aggregations.items():
+            if agg not in SUPPORTED_AGGREGATIONS:
+                raise ValueError(f"Неподдерживаемая агрегация '{agg}' для колонки {col}")
+
+        self.columns = list(self.aggregations)
+        self.window_ns = pd.Timedelta(window).value
+        self.delay_ns = pd.Timedelta(watermark_delay).value
+        self.lateness_ns = pd.Timedelta(allowed_lateness).value
+
+        # Состояние открытых окон: начало окна -> [count, sum, min, max] x колонки
+        self._state = {}
+        self._revisions = {}
+        self.watermark = np.iinfo(np.int64).min
+        self.stats = {'events': 0, 'dropped_late': 0, 'emitted': 0, 'corrections': 0}
+
+    def add_batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Добавление пакета показаний (в произвольном порядке)
+
+        Args:
+            df: DataFrame с колонкой timestamp и агрегируемыми колонками
+
+        Returns:
+            Выданные результаты окон: первые результаты закрывшихся окон
+            и исправления уже выданных окон (revision > 0)
+        """
+        if len(df) == 0:
+            return self._empty_result()
+
+        times = pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        values = df[self.columns].to_numpy(dtype=float)
+        starts = times // self.window_ns * self.window_ns
+        self.stats['events'] += len(times)
+
+        # Точки, чьи окна уже окончательно закрыты, отбрасываются
+        on_time = starts + self.window_ns + self.lateness_ns > self.watermark
+        self.stats['dropped_late'] += int((~on_time).sum())
+        starts, values = starts[on_time], values[on_time]
+
+        touched = self._update_state(starts, values)
+
+        if on_time.any():
+            self.watermark = max(self.watermark, int(times[on_time].max()) - self.delay_ns)
+        return self._emit(touched)
+
+    def _update_state(self, starts: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Векторное обновление накопителей всех затронутых окон"""
+        if len(starts) == 0:
+            return starts
+
+        windows, inverse = np.unique(starts, return_inverse=True)
+        n_windows, n_cols = len(windows), values.shape[1]
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+
+        counts = np.zeros((n_windows, n_cols))
+        sums = np.zeros((n_windows, n_cols))
+        mins = np.full((n_windows, n_cols), np.inf)
+        maxs = np.full((n_windows, n_cols), -np.inf)
+
+        np.add.at(counts, inverse, valid.astype(float))
+        np.add.at(sums, inverse, filled)
+        np.minimum.at(mins, inverse, np.where(valid, values, np.inf))
+        np.maximum.at(maxs, inverse, np.where(valid, values, -np.inf))
+
+        for i, start in enumerate(windows.tolist()):
+            state = self._state.get(start)
+            if state is None:
+                self._state[start] = np.vstack([counts[i], sums[i], mins[i], maxs[i]])
+            else:
+                state[0] += counts[i]
+                state[1] += sums[i]
+                np.minimum(state[2], mins[i], out=state[2])
+                np.maximum(state[3], maxs[i], out=state[3])
+
+        return windows
+
+    def _emit(self, touched: np.ndarray) -> pd.DataFrame:
+        """Выдача результатов закрывшихся окон и исправлений"""
+        emit = set()
+
+        # Исправления: уже выданные окна, в которые пришли опоздавшие точки
+        for start in touched.tolist():
+            if start in self._revisions:
+                emit.add(start)
+
+        # Первые результаты: окна, конец которых прошел водяной знак
+        for start in self._state:
+            if start not in self._revisions and start + self.window_ns <= self.watermark:
+                emit.add(start)
+
+        result = self._build_result(sorted(emit))
+
+        # Окна за пределами допустимого опоздания больше не изменятся
+        expired = [s for s in self._state if s + self.window_ns + self.lateness_ns <= self.watermark]
+        for start in expired:
+            del self._state[start]
+            self._revisions.pop(start, None)
+
+        return result
+
+    def flush(self) -> pd.DataFrame:
+        """
+        Выдача всех еще не выданных окон (конец потока)
+
+        Returns:
+            Результаты оставшихся окон
+        """
+        pending = sorted(s for s in self._state if s not in self._revisions)
+        result = self._build_result(pending)
+        self._state.clear()
+        self._revisions.clear()
+        return result
+
+    def _build_result(self, starts) -> pd.DataFrame:
+        if not starts:
+            return self._empty_result()
+
+        rows = []
+        for start in starts:
+            count, total, low, high = self._state[start]
+            row = {'timestamp': pd.Timestamp(start)}
+            for j, (col, agg) in enumerate(self.aggregations.items()):
+                if agg == 'count':
+                    row[col] = count[j]
+                elif count[j] == 0:
+                    row[col] = np.nan
+                elif agg == 'mean':
+                    row[col] = total[j] / count[j]
+                elif agg == 'sum':
+                    row[col] = total[j]
+                elif agg == 'min':
+                    row[col] = low[j]
+                else:
+                    row[col] = high[j]
+
+            revision = self._revisions.get(start, -1) + 1
+            self._revisions[start] = revision
+            row['revision'] = revision
+            rows.append(row)
+
+            if revision == 0:
+                self.stats['emitted'] += 1
+            else:
+                self.stats['corrections'] += 1
+
+        return pd.DataFrame(rows)
+
+    def _empty_result(self) -> pd.DataFrame:
+        return pd.DataFrame(columns=['timestamp'] + self.columns + ['revision'])
+
+
+def apply_corrections(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сведение потока результатов к последней ревизии каждого окна
+
+    Args:
+        results: Объединенные результаты add_batch/flush
+
+    Returns:
+        По одной строке на окно, отсортировано по времени
+    """
+    latest = results.sort_values(['timestamp', 'revision']).drop_duplicates('timestamp', keep='last')
+    return latest.reset_index(drop=True)
+
+
+def energy_window_aggregator(**kwargs) -> WindowedAggregator:
+    """Агрегатор 30-минутных окон для расчета энергопотребления (как в _generate_energy_data)"""
+    return WindowedAggregator(window='30min', aggregations=dict(ENERGY_WINDOW_AGGREGATIONS), **kwargs)
+
+
+def equipment_window_aggregator(**kwargs) -> WindowedAggregator:
+    """Агрегатор минутных окон для статусов оборудования (как в _generate_equipment_data)"""
+    kwargs.setdefault('allowed_lateness', '5min')
+    return WindowedAggregator(window='1min', aggregations=dict(EQUIPMENT_WINDOW_AGGREGATIONS), **kwargs)
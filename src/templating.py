@@ -0,0 +1,161 @@
+"""
+Модуль компилируемых HTML-шаблонов
+
+Шаблон из папки templates/ разбирается один раз: текст делится на
+неизменяемые фрагменты и поля ${name}, а статические файлы (CSS/JS)
+читаются и кэшируются на процесс. Отрисовка страницы - одна склейка списка
+строк, а строки таблиц формируются по колонкам и склеиваются через
+''.join, поэтому время растет линейно с числом строк.
+"""
+
+import os
+import string
+from functools import lru_cache
+from html import escape
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+
+class CompiledTemplate:
+    """Шаблон с полями ${name}, разобранный на фрагменты один раз"""
+
+    def __init__(self, source: str):
+        """
+        Args:
+            source: Текст шаблона (синтаксис string.Template: ${name}, $$ - знак доллара)
+        """
+        self.parts: List[str] = []
+        self.fields: List[str] = []
+
+        position = 0
+        literal = []
+        for match in string.Template.pattern.finditer(source):
+            literal.append(source[position:match.start()])
+            position = match.end()
+            if match.group('escaped') is not None:
+                literal.append('$')
+                continue
+            name = match.group('named') or match.group('braced')
+            if name is None:
+                raise ValueError(f"Некорректное поле шаблона в позиции {match.start()}")
+            self.parts.append(''.join(literal))
+            self.fields.append(name)
+            literal = []
+        literal.append(source[position:])
+        self.parts.append(''.join(literal))
+
+    def render(self, context: Mapping[str, object]) -> str:
+        """
+        Подстановка значений полей
+
+        Args:
+            context: Значения полей (приводятся к str)
+
+        Returns:
+            Готовый текст
+        """
+        missing = [name for name in self.fields if name not in context]
+        if missing:
+            raise KeyError(f"Не заданы поля шаблона: {sorted(set(missing))}")
+
+        pieces = [self.parts[0]]
+        for name, part in zip(self.fields, self.parts[1:]):
+            pieces.append(str(context[name]))
+            pieces.append(part)
+        return ''.join(pieces)
+
+    def render_rows(self, columns: Mapping[str, Sequence]) -> str:
+        """
+        Отрисовка строки шаблона для каждой позиции колонок
+
+        Args:
+            columns: Колонки значений одинаковой длины (уже отформатированные)
+
+        Returns:
+            Склеенные строки
+        """
+        missing = [name for name in self.fields if name not in columns]
+        if missing:
+            raise KeyError(f"Не заданы колонки шаблона строки: {sorted(set(missing))}")
+
+        values = [columns[name] for name in self.fields]
+        parts = self.parts
+        pieces = []
+        for row in zip(*values):
+            pieces.append(parts[0])
+            for value, part in zip(row, parts[1:]):
+                pieces.append(value)
+                pieces.append(part)
+        return ''.join(pieces)
+
+
+@lru_cache(maxsize=None)
+def read_static(name: str, template_dir: str = TEMPLATE_DIR) -> str:
+    """Содержимое статического файла из папки шаблонов (кэшируется на процесс)"""
+    with open(os.path.join(template_dir, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def load_template(name: str, template_dir: str = TEMPLATE_DIR) -> CompiledTemplate:
+    """Скомпилированный шаблон из папки шаблонов (кэшируется на процесс)"""
+    return CompiledTemplate(read_static(name, template_dir))
+
+
+def escape_column(values) -> List[str]:
+    """HTML-экранирование колонки значений"""
+    return [escape(str(value)) for value in values]
+
+
+def format_column(values, spec: str) -> List[str]:
+    """
+    Форматирование числовой колонки по спецификации вида '.1f'
+
+    NaN выводится как '—'
+    """
+    values = np.asarray(values, dtype=float)
+    formatted = np.char.mod('%' + spec, np.nan_to_num(values))
+    return np.where(np.isnan(values), '—', formatted).tolist()
+
+
+def format_datetime_column(values, fmt: str) -> List[str]:
+    """Форматирование колонки дат через strftime (векторно в pandas)"""
+    return pd.to_datetime(pd.Series(values)).dt.strftime(fmt).fillna('—').tolist()
+
+
+def page_numbers(n_rows: int, page_size: int = 0) -> List[str]:
+    """
+    Номера страниц строк для пагинации в браузере
+
+    Args:
+        n_rows: Число строк
+        page_size: Строк на странице (0 - без пагинации, все на странице 1)
+
+    Returns:
+        Номера страниц по строкам (строки)
+    """
+    if page_size <= 0:
+        return ['1'] * n_rows
+    return (np.arange(n_rows) // page_size + 1).astype(str).tolist()
+
+
+def pagination_controls(table_id: str, n_rows: int, page_size: int = 0) -> str:
+    """Кнопки страниц таблицы (пусто, если страница одна)"""
+    if page_size <= 0 or n_rows <= page_size:
+        return ''
+    n_pages = -(-n_rows // page_size)
+    return load_template('pagination.html').render({
+        'table_id': table_id,
+        'n_pages': n_pages,
+        'n_rows': n_rows
+    })
+
+
+def render_context(template: str, context: Dict[str, object]) -> str:
+    """Отрисовка шаблона из папки шаблонов по имени"""
+    return load_template(template).render(context)
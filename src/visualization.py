@@ -1,2 +1,201 @@
 # visualization.py
-#   BMS Analytics
+# Модуль проекта BMS Analytics
+"""
+Модуль прореживания рядов для графиков за длинные периоды
+
+Вместо обрезки ряда до последних N точек ряд сводится к фиксированному
+бюджету точек: min-max по корзинам шириной в пиксель (сохраняет все
+экстремумы и выбросы) или Largest-Triangle-Three-Buckets (сохраняет форму
+кривой). Точки, отмеченные как аномалии, сохраняются всегда.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Периоды графиков дашборда: (длительность, подпись)
+CHART_VIEWS = {
+    'day': ('1D', 'сутки'),
+    'week': ('7D', 'неделя'),
+    'month': ('30D', 'месяц'),
+    'year': ('365D', 'год')
+}
+# Около двух точек на пиксель графика шириной 1000 px
+DEFAULT_POINT_BUDGET = 2000
+
+
+def _as_float(x) -> np.ndarray:
+    """Ось X в числах (datetime -> наносекунды)"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def minmax_indices(x, y, n_buckets: int) -> np.ndarray:
+    """
+    Индексы точек min-max прореживания
+
+    Ось X делится на n_buckets равных интервалов (по пикселю); в каждом
+    сохраняются точки минимума и максимума, поэтому пики и провалы
+    не теряются при любом сжатии.
+
+    Args:
+        x: Отсортированная ось X (числа или datetime)
+        y: Значения
+        n_buckets: Число корзин
+
+    Returns:
+        Отсортированные индексы сохраненных точек (не больше 2 * n_buckets)
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= 2 * n_buckets:
+        return valid
+
+    xv, yv = x[valid], y[valid]
+    span = xv[-1] - xv[0]
+    buckets = np.minimum(((xv - xv[0]) / span * n_buckets).astype(np.int64), n_buckets - 1) if span > 0 \
+        else np.zeros(len(xv), dtype=np.int64)
+
+    # Ось X отсортирована, поэтому корзины - непрерывные отрезки: минимумы и
+    # максимумы отрезков и их позиции берутся через reduceat за O(n)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    lengths = np.diff(np.r_[starts, len(yv)])
+    positions = np.arange(len(yv))
+
+    low = np.repeat(np.minimum.reduceat(yv, starts), lengths)
+    high = np.repeat(np.maximum.reduceat(yv, starts), lengths)
+    argmin = np.minimum.reduceat(np.where(yv == low, positions, len(yv)), starts)
+    argmax = np.minimum.reduceat(np.where(yv == high, positions, len(yv)), starts)
+
+    return np.unique(valid[np.concatenate([argmin, argmax])])
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Индексы точек прореживания Largest-Triangle-Three-Buckets
+
+    Первая и последняя точки сохраняются; из каждой промежуточной корзины
+    выбирается точка, образующая наибольший треугольник с выбранной точкой
+    предыдущей корзины и средней точкой следующей.
+
+    Args:
+        x: Отсортированная ось X (числа или datetime)
+        y: Значения
+        n_out: Число точек результата
+
+    Returns:
+        Отсортированные индексы сохраненных точек
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if n <= n_out or n_out < 3:
+        return valid
+
+    xv, yv = x[valid], y[valid]
+    # Границы n_out - 2 промежуточных корзин по точкам 1..n-2
+    edges = (np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+
+    # Средние точки корзин через накопленные суммы
+    cum_x = np.concatenate([[0.0], np.cumsum(xv)])
+    cum_y = np.concatenate([[0.0], np.cumsum(yv)])
+    next_start = np.r_[edges[1:], n - 1]
+    next_end = np.r_[edges[2:], n, n]
+    counts = np.maximum(next_end - next_start, 1)
+    mean_x = (cum_x[next_end] - cum_x[next_start]) / counts
+    mean_y = (cum_y[next_end] - cum_y[next_start]) / counts
+    mean_x[-1], mean_y[-1] = xv[-1], yv[-1]
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Удвоенная площадь треугольника для всех точек корзины сразу
+        area = np.abs((xv[prev] - mean_x[b]) * (yv[lo:hi] - yv[prev])
+                      - (xv[prev] - xv[lo:hi]) * (mean_y[b] - yv[prev]))
+        prev = lo + int(np.argmax(area))
+        selected[b + 1] = prev
+
+    return valid[selected]
+
+
+def decimate(x, y, budget: int = DEFAULT_POINT_BUDGET, method: str = 'minmax',
+             keep: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Прореживание ряда до бюджета точек
+
+    Args:
+        x: Отсортированная ось X
+        y: Значения
+        budget: Максимальное число точек (без учета keep)
+        method: 'minmax' (экстремумы) или 'lttb' (форма кривой)
+        keep: Булева маска точек, сохраняемых всегда (например, аномалий)
+
+    Returns:
+        Отсортированные индексы сохраненных точек
+    """
+    if method == 'minmax':
+        indices = minmax_indices(x, y, max(budget // 2, 1))
+    elif method == 'lttb':
+        indices = lttb_indices(x, y, budget)
+    else:
+        raise ValueError(f"Неизвестный метод прореживания: {method}")
+
+    if keep is not None:
+        indices = np.union1d(indices, np.flatnonzero(np.asarray(keep, dtype=bool)))
+    return indices
+
+
+def select_view(df: pd.DataFrame, view: str, end=None, time_column: str = 'timestamp') -> pd.DataFrame:
+    """
+    Строки за период графика (сутки/неделя/месяц/год), заканчивающийся в end
+
+    Args:
+        df: Данные, отсортированные по времени
+        view: Ключ CHART_VIEWS
+        end: Конец периода (по умолчанию последняя метка данных)
+
+    Returns:
+        Срез df за период
+    """
+    span, _ = CHART_VIEWS[view]
+    times = pd.to_datetime(df[time_column])
+    end = times.max() if end is None else pd.Timestamp(end)
+    start = end - pd.Timedelta(span)
+    lo, hi = np.searchsorted(times.to_numpy(), [np.datetime64(start), np.datetime64(end)], side='right')
+    return df.iloc[lo:hi]
+
+
+def decimate_view(df: pd.DataFrame, column: str, view: str, budget: int = DEFAULT_POINT_BUDGET,
+                  method: str = 'minmax', keep: Optional[np.ndarray] = None,
+                  end=None, time_column: str = 'timestamp') -> Tuple[pd.DataFrame, int]:
+    """
+    Прореженный ряд для графика за период
+
+    Args:
+        df: Данные
+        column: Колонка значений
+        view: Ключ CHART_VIEWS
+        budget: Бюджет точек
+        method: Метод прореживания
+        keep: Маска точек df (в порядке строк df), сохраняемых всегда
+        end: Конец периода
+
+    Returns:
+        (строки для графика, число исходных точек периода)
+    """
+    if keep is not None:
+        keep = pd.Series(np.asarray(keep, dtype=bool), index=df.index)
+    df = df.sort_values(time_column, kind='stable')
+    window = select_view(df, view, end, time_column)
+    window_keep = keep.loc[window.index].to_numpy() if keep is not None else None
+
+    indices = decimate(window[time_column].to_numpy(), window[column].to_numpy(), budget, method, window_keep)
+    return window.iloc[indices], len(window)
@@ -0,0 +1,78 @@
+// Автоматическое обновление
+let refreshTimer = 300; // 5 минут в секундах
+const timerElement = document.createElement('div');
+timerElement.className = 'update-time mt-2';
+timerElement.innerHTML = '<i class="bi bi-arrow-clockwise"></i> Автообновление через: <span id="countdown">' + refreshTimer + '</span> сек';
+document.querySelector('.update-time').parentNode.appendChild(timerElement);
+
+function updateCountdown() {
+    refreshTimer--;
+    document.getElementById('countdown').textContent = refreshTimer;
+
+    if (refreshTimer <= 0) {
+        location.reload();
+    }
+}
+
+setInterval(updateCountdown, 1000);
+
+// Анимация при наведении на метрики
+document.querySelectorAll('.metric-card').forEach(card => {
+    card.addEventListener('mouseenter', function() {
+        this.style.transform = 'translateY(-10px) scale(1.02)';
+    });
+
+    card.addEventListener('mouseleave', function() {
+        this.style.transform = 'translateY(0) scale(1)';
+    });
+});
+
+// Подсветка активных элементов
+document.querySelectorAll('.anomaly-row, .recommendation-item').forEach(el => {
+    el.addEventListener('click', function() {
+        this.classList.toggle('bg-light');
+    });
+});
+
+// Уведомление о новом обновлении
+setTimeout(() => {
+    const alert = document.createElement('div');
+    alert.className = 'alert alert-info alert-dismissible fade show position-fixed bottom-0 end-0 m-3';
+    alert.style.zIndex = '1000';
+    alert.innerHTML = `
+        <i class="bi bi-info-circle"></i> Система мониторинга активна. Данные обновляются автоматически.
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+    document.body.appendChild(alert);
+}, 3000);
+
+// Постраничный вывод больших таблиц: строки размечены data-page
+function showPage(tableId, page) {
+    const container = document.getElementById(tableId);
+    container.querySelectorAll('[data-page]').forEach(row => {
+        row.classList.toggle('d-none', row.dataset.page !== String(page));
+    });
+    document.querySelectorAll('[data-pagination="' + tableId + '"] .page-item').forEach(item => {
+        item.classList.toggle('active', item.dataset.page === String(page));
+    });
+}
+
+document.querySelectorAll('[data-pagination]').forEach(nav => {
+    const tableId = nav.dataset.pagination;
+    const pages = parseInt(nav.dataset.pages, 10);
+    const list = document.createElement('ul');
+    list.className = 'pagination pagination-sm flex-wrap';
+    for (let page = 1; page <= pages; page++) {
+        const item = document.createElement('li');
+        item.className = 'page-item';
+        item.dataset.page = page;
+        item.innerHTML = '<a class="page-link" href="#">' + page + '</a>';
+        item.addEventListener('click', event => {
+            event.preventDefault();
+            showPage(tableId, page);
+        });
+        list.appendChild(item);
+    }
+    nav.appendChild(list);
+    showPage(tableId, 1);
+});
@@ -0,0 +1,76 @@
+"""Проверка колоночного архива: повторная конвертация и устойчивость к сбою записи"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.archive import SensorArchive, archive_csv
+
+
+def readings(n: int, start: str = '2024-01-01') -> pd.DataFrame:
+    rng = np.random.default_rng(n)
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq='2min'),
+        'sensor_id': [f'S{i % 3}' for i in range(n)],
+        'temperature': rng.uniform(18, 28, n).round(2),
+        'humidity': rng.uniform(30, 70, n).round(2),
+        'co2': rng.uniform(350, 1500, n).round(1),
+        'light_level': rng.uniform(0, 800, n).round(1),
+        'zone': [f'zone_{"AB"[i % 2]}' for i in range(n)]
+    })
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'sensors.csv'
+    readings(50).to_csv(path, index=False)
+    return str(path)
+
+
+def test_archive_round_trip(csv_path, tmp_path):
+    archive = archive_csv(csv_path, str(tmp_path / 'archive'), chunksize=16)
+    frame = archive.to_frame()
+    expected = pd.read_csv(csv_path, parse_dates=['timestamp'])
+
+    assert len(archive) == 50 and archive.meta['sorted']
+    pd.testing.assert_series_equal(frame['timestamp'], expected['timestamp'], check_dtype=False)
+    assert frame['sensor_id'].tolist() == expected['sensor_id'].tolist()
+    np.testing.assert_allclose(frame['co2'], expected['co2'], rtol=1e-6)
+
+    part = archive.to_frame('2024-01-01 00:10', '2024-01-01 00:20')
+    assert len(part) == 5
+
+
+def test_rerun_refuses_instead_of_duplicating(csv_path, tmp_path):
+    path = str(tmp_path / 'archive')
+    archive_csv(csv_path, path)
+    with pytest.raises(FileExistsError):
+        archive_csv(csv_path, path)
+    assert len(SensorArchive(path)) == 50
+
+    assert len(archive_csv(csv_path, path, overwrite=True)) == 50
+    assert len(archive_csv(csv_path, path, append=True)) == 100
+
+
+def test_interrupted_append_is_discarded(tmp_path):
+    path = str(tmp_path / 'archive')
+    archive = SensorArchive(path)
+    archive.append(readings(10))
+
+    # Сбой после записи части колонок, но до замены meta.json
+    with open(os.path.join(path, 'timestamp.bin'), 'ab') as f:
+        f.write(b'\x00' * 8 * 3)
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        assert json.load(f)['rows'] == 10
+
+    reopened = SensorArchive(path)
+    assert len(reopened) == 10
+    reopened.append(readings(5, start='2024-01-02'))
+    frame = SensorArchive(path).to_frame()
+
+    assert len(frame) == 15
+    assert frame['timestamp'].is_monotonic_increasing
+    assert frame['timestamp'].iloc[10] == pd.Timestamp('2024-01-02')
@@ -0,0 +1,63 @@
+"""Проверка фолдов rolling-origin, матрицы признаков и параллельного бэктеста"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtesting import FEATURE_SETS, build_feature_matrix, make_model, rolling_origin_folds, run_backtest
+
+
+pytest.importorskip('sklearn')
+
+
+def energy(days: int = 8, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2024-01-01', periods=days * 48, freq='30min')
+    load = 60 + 40 * np.sin((timestamps.hour - 6) / 24 * 2 * np.pi) + 15 * (timestamps.dayofweek < 5)
+    return pd.DataFrame({'timestamp': timestamps, 'electricity_kwh': load + rng.normal(0, 3, len(timestamps))})
+
+
+def test_rolling_origin_folds():
+    assert rolling_origin_folds(10, initial=4, horizon=3) == [(4, 7), (7, 10)]
+    assert rolling_origin_folds(10, initial=4, horizon=3, step=1) == [(4, 7), (5, 8), (6, 9), (7, 10)]
+    assert rolling_origin_folds(5, initial=4, horizon=3) == []
+
+
+def test_feature_matrix_lags_are_known_a_day_ahead():
+    df = energy()
+    matrix = build_feature_matrix(df)
+    series = df.set_index('timestamp')['electricity_kwh']
+
+    assert set(sum(FEATURE_SETS.values(), [])) <= set(matrix.columns)
+    assert not matrix[FEATURE_SETS['calendar_lags']].isna().any().any()
+    times = pd.DatetimeIndex(matrix['timestamp'])
+    np.testing.assert_allclose(matrix['target'], series.loc[times].to_numpy())
+    np.testing.assert_allclose(matrix['lag_48'], series.shift(48).loc[times].to_numpy())
+    np.testing.assert_allclose(matrix['rolling_mean_48'], series.rolling(48).mean().shift(48).loc[times].to_numpy(),
+                               rtol=1e-12)
+    assert times[0] >= df['timestamp'].iloc[48]
+
+
+def test_backtest_matches_sequential_evaluation():
+    df = energy()
+    leaderboard = run_backtest(df, models=['linear', 'ridge'], feature_sets=['hour', 'calendar_lags'],
+                               initial=48 * 3, horizon=48, max_workers=2)
+
+    assert leaderboard['rank'].tolist() == [1, 2, 3, 4]
+    assert leaderboard['mae'].is_monotonic_increasing
+    assert set(zip(leaderboard['model'], leaderboard['feature_set'])) == {
+        (m, f) for m in ('linear', 'ridge') for f in ('hour', 'calendar_lags')}
+
+    matrix = build_feature_matrix(df)
+    folds = rolling_origin_folds(len(matrix), 48 * 3, 48)
+    X, y = matrix[FEATURE_SETS['calendar_lags']].to_numpy(dtype=float), matrix['target'].to_numpy()
+    maes = [np.abs(make_model('ridge').fit(X[:a], y[:a]).predict(X[a:b]) - y[a:b]).mean() for a, b in folds]
+
+    row = leaderboard[(leaderboard['model'] == 'ridge') & (leaderboard['feature_set'] == 'calendar_lags')].iloc[0]
+    assert row['folds'] == len(folds)
+    assert row['mae'] == pytest.approx(np.mean(maes), rel=1e-9)
+
+
+def test_backtest_rejects_short_history():
+    with pytest.raises(ValueError):
+        run_backtest(energy(days=3), models=['linear'], feature_sets=['hour'])
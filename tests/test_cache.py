@@ -0,0 +1,163 @@
+"""Проверка дискового кэша этапов: попадания, промахи, вытеснение и поврежденные записи"""
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cache import ResultCache, cached_stage, code_version, data_version
+
+
+class Counter:
+    """Вычисление этапа, считающее свои вызовы"""
+
+    def __init__(self, value=42):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / 'cache'), code='v1')
+
+
+def frame(**changes) -> pd.DataFrame:
+    df = pd.DataFrame({'timestamp': pd.date_range('2024-01-01', periods=5, freq='2min'),
+                       'temperature': [21.0, 22.0, 23.0, np.nan, 25.0]})
+    for column, (row, value) in changes.items():
+        df.loc[row, column] = value
+    return df
+
+
+def test_hit_after_miss_and_across_instances(cache, tmp_path):
+    compute = Counter({'mean': 22.5})
+    assert cache.get_or_compute('metrics', ['d1'], compute) == {'mean': 22.5}
+    assert cache.get_or_compute('metrics', ['d1'], compute) == {'mean': 22.5}
+    assert compute.calls == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1) and stats['size_bytes'] > 0
+
+    reopened = ResultCache(str(tmp_path / 'cache'), code='v1')
+    assert reopened.get_or_compute('metrics', ['d1'], compute) == {'mean': 22.5}
+    assert compute.calls == 1 and reopened.hits == 1
+
+
+def test_misses_on_data_params_and_code_change(cache, tmp_path):
+    compute = Counter()
+    cache.get_or_compute('stage', ['d1'], compute, n_sigma=3.0)
+    cache.get_or_compute('stage', ['d2'], compute, n_sigma=3.0)
+    cache.get_or_compute('stage', ['d1'], compute, n_sigma=2.5)
+    ResultCache(str(tmp_path / 'cache'), code='v2').get_or_compute('stage', ['d1'], compute, n_sigma=3.0)
+    assert compute.calls == 4
+
+    cache.get_or_compute('stage', ['d1'], compute, n_sigma=3.0)
+    assert compute.calls == 4
+
+
+def test_data_version_tracks_content():
+    assert data_version(frame()) == data_version(frame())
+    assert data_version(frame()) != data_version(frame(temperature=(3, 24.0)))
+    assert data_version(frame()) != data_version(frame().rename(columns={'temperature': 'temp'}))
+    assert data_version(frame(), None) != data_version(None, frame())
+
+
+def test_distinct_compute_functions_do_not_share_entries(cache):
+    def energy_metrics():
+        return 'energy'
+
+    def sensor_metrics():
+        return 'sensors'
+
+    assert cache.get_or_compute('metrics', ['d1'], energy_metrics) == 'energy'
+    assert cache.get_or_compute('metrics', ['d1'], sensor_metrics) == 'sensors'
+    assert cache.stats()['entries'] == 2
+
+
+def set_age(cache: ResultCache, key: str, seconds_ago: float):
+    path = cache._path(key)
+    when = os.path.getmtime(path) - seconds_ago
+    os.utime(path, (when, when))
+
+
+def test_lru_eviction_by_entries(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), max_entries=2, code='v1')
+    cache.put('a', 1)
+    cache.put('b', 2)
+    set_age(cache, 'a', 200)
+    set_age(cache, 'b', 100)
+    # Попадание обновляет время доступа: вытесняется b, а не a
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['entries'] == 2
+
+
+def test_eviction_by_size(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), max_bytes=30_000, code='v1')
+    for i in range(5):
+        cache.put(f'k{i}', np.zeros(1000))
+        set_age(cache, f'k{i}', 100 - i)
+
+    stats = cache.stats()
+    assert stats['size_bytes'] <= 30_000 and stats['entries'] == 3
+    assert [cache.get(f'k{i}') is None for i in range(5)] == [True, True, False, False, False]
+
+
+def test_corrupt_entry_is_a_miss(cache):
+    compute = Counter('fresh')
+    cache.get_or_compute('stage', ['d1'], compute)
+    for name in os.listdir(cache.directory):
+        with open(os.path.join(cache.directory, name), 'wb') as f:
+            f.write(b'\x80\x05truncated')
+
+    assert cache.get_or_compute('stage', ['d1'], compute) == 'fresh'
+    assert compute.calls == 2
+    assert cache.get('missing', 'default') == 'default'
+    assert cache.stats()['entries'] == 1
+
+
+def test_put_leaves_no_temporary_files(cache):
+    class Unpicklable:
+        def __reduce__(self):
+            raise pickle.PicklingError('нельзя сохранить')
+
+    with pytest.raises(pickle.PicklingError):
+        cache.put('bad', Unpicklable())
+    assert os.listdir(cache.directory) == []
+
+    cache.put('good', 1)
+    cache.clear()
+    assert cache.stats()['entries'] == 0
+
+
+def test_cached_stage_without_cache_always_computes():
+    compute = Counter()
+    assert cached_stage(None, 'stage', ['d1'], compute) == 42
+    assert cached_stage(None, 'stage', ['d1'], compute) == 42
+    assert compute.calls == 2
+
+
+def test_code_version_hashes_sources(tmp_path):
+    project = tmp_path / 'project'
+    os.makedirs(project / 'src' / '__pycache__')
+    (project / 'src' / 'module.py').write_text('x = 1\n')
+    (project / 'src' / '__pycache__' / 'module.pyc').write_bytes(b'bytecode')
+    (project / 'src' / 'notes.txt').write_text('заметки')
+
+    first = code_version(str(project), ('src',))
+    (project / 'src' / '__pycache__' / 'other.py').write_text('ignored = True\n')
+    (project / 'src' / 'notes.txt').write_text('другие заметки')
+    code_version.cache_clear()
+    assert code_version(str(project), ('src',)) == first
+
+    (project / 'src' / 'module.py').write_text('x = 2\n')
+    code_version.cache_clear()
+    assert code_version(str(project), ('src',)) != first
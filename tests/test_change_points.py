@@ -0,0 +1,67 @@
+"""Проверка PELT против точного разбиения перебором O(n^2)"""
+
+import numpy as np
+import pytest
+
+from src.change_points import pelt, robust_variance
+
+
+def brute_force_partition(values, penalty, min_size):
+    """Оптимальное разбиение динамическим программированием по всем началам сегментов"""
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    cum = np.concatenate([[0.0], np.cumsum(y)])
+    cum_sq = np.concatenate([[0.0], np.cumsum(y * y)])
+
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    last = np.zeros(n + 1, dtype=int)
+    for end in range(min_size, n + 1):
+        for start in range(0, end - min_size + 1):
+            if 0 < start < min_size:
+                continue
+            total = cum[end] - cum[start]
+            cost = best[start] + cum_sq[end] - cum_sq[start] - total * total / (end - start) + penalty
+            if cost < best[end]:
+                best[end], last[end] = cost, start
+
+    change_points = []
+    end = n
+    while end > 0:
+        end = last[end]
+        if end > 0:
+            change_points.append(int(end))
+    return change_points[::-1], best[n]
+
+
+def partition_cost(values, change_points, penalty):
+    y = np.asarray(values, dtype=float)
+    bounds = [0, *change_points, len(y)]
+    return sum(((y[lo:hi] - y[lo:hi].mean()) ** 2).sum() for lo, hi in zip(bounds[:-1], bounds[1:])) \
+        + penalty * len(change_points)
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_pelt_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(10, 80))
+    min_size = int(rng.integers(1, 9))
+    levels = np.repeat(rng.normal(0, 3, 6), -(-n // 6))[:n]
+    values = levels + rng.normal(0, 1, n)
+    penalty = 2 * max(robust_variance(values), 1e-12) * np.log(n)
+
+    result = pelt(values, penalty, min_size)
+    expected, expected_cost = brute_force_partition(values, penalty, min_size)
+
+    bounds = [0, *result, n]
+    assert all(hi - lo >= min_size for lo, hi in zip(bounds[:-1], bounds[1:]))
+    if n >= 2 * min_size:
+        assert partition_cost(values, result, penalty) == pytest.approx(expected_cost, abs=1e-6)
+        assert result == expected
+
+
+def test_pelt_respects_min_size():
+    rng = np.random.default_rng(0)
+    values = np.r_[rng.normal(0, 1, 6), rng.normal(5, 1, 56)]
+    change_points = pelt(values, min_size=7)
+    assert all(point >= 7 and 62 - point >= 7 for point in change_points)
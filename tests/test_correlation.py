@@ -0,0 +1,82 @@
+"""Проверка корреляций по зонам и с лагом против прямого расчета pandas/numpy"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.correlation import best_lags, lagged_correlations, zone_correlations
+
+
+def make_series(n: int = 300, seed: int = 0, lag: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    driver = rng.normal(size=n + lag)
+    frame = pd.DataFrame({
+        'co2': driver[lag:],
+        'ventilation': driver[:n] + 0.3 * rng.normal(size=n),
+        'noise': rng.normal(size=n)
+    }, index=pd.date_range('2024-01-01', periods=n, freq='30min'))
+    frame.iloc[rng.choice(n, n // 15, replace=False), 0] = np.nan
+    return frame
+
+
+def reference(series: pd.DataFrame, leader: str, follower: str, lag: int, min_pairs: int = 10) -> float:
+    """corr(leader(t), follower(t + lag)) по определению: общие средние и дисперсии рядов"""
+    x = series[leader].to_numpy()
+    y = series[follower].to_numpy()
+    n = len(x)
+    if abs(lag) >= n:
+        return np.nan
+    a, b = (x[:n - lag], y[lag:]) if lag >= 0 else (x[-lag:], y[:n + lag])
+    both = ~np.isnan(a) & ~np.isnan(b)
+    if both.sum() < min_pairs:
+        return np.nan
+    cov = np.sum((a[both] - np.nanmean(x)) * (b[both] - np.nanmean(y))) / both.sum()
+    return float(np.clip(cov / (np.nanstd(x) * np.nanstd(y)), -1, 1))
+
+
+@pytest.mark.parametrize('method', ['direct', 'fft'])
+def test_lagged_matches_definition(method):
+    series = make_series()
+    table = lagged_correlations(series, max_lag=6, method=method, use_cache=False)
+    for row in table.sample(40, random_state=1).itertuples():
+        assert row.corr == pytest.approx(reference(series, row.leader, row.follower, row.lag), abs=1e-12, nan_ok=True)
+
+
+def test_fft_and_direct_agree():
+    series = make_series(n=500, seed=3)
+    direct = lagged_correlations(series, max_lag=40, method='direct', use_cache=False)
+    fft = lagged_correlations(series, max_lag=40, method='fft', use_cache=False)
+    assert (direct['pairs'] == fft['pairs']).all()
+    np.testing.assert_allclose(direct['corr'], fft['corr'], atol=1e-12)
+
+
+def test_best_lag_recovers_shift():
+    best = best_lags(lagged_correlations(make_series(), max_lag=6, use_cache=False), pairs=[('co2', 'ventilation')])
+    assert best.loc[0, 'lag'] == 3
+    assert best.loc[0, 'corr'] > 0.9
+
+
+@pytest.mark.parametrize('method', ['direct', 'fft'])
+def test_max_lag_longer_than_series(method):
+    series = make_series(n=15)
+    table = lagged_correlations(series, max_lag=20, method=method, min_pairs=1, use_cache=False)
+
+    assert sorted(table['lag'].unique()) == list(range(-20, 21))
+    too_long = table[table['lag'].abs() >= len(series)]
+    assert too_long['corr'].isna().all() and (too_long['pairs'] == 0).all()
+    inside = table[table['lag'].abs() < len(series)]
+    for row in inside.sample(30, random_state=0).itertuples():
+        assert row.corr == pytest.approx(reference(series, row.leader, row.follower, row.lag, 1), abs=1e-12, nan_ok=True)
+
+
+def test_zone_correlations_match_pandas():
+    rng = np.random.default_rng(5)
+    sensors = pd.DataFrame(rng.normal(size=(400, 3)), columns=['temperature', 'humidity', 'co2'])
+    sensors['humidity'] += sensors['temperature']
+    sensors['zone'] = rng.choice(['A', 'B', 'C'], 400)
+    sensors.loc[rng.choice(400, 30, replace=False), 'co2'] = np.nan
+
+    result = zone_correlations(sensors, ['temperature', 'humidity', 'co2'], use_cache=False)
+    for zone, group in sensors.groupby('zone'):
+        np.testing.assert_allclose(result.loc[zone].to_numpy(), group.drop(columns='zone').corr().to_numpy(), atol=1e-10)
+    np.testing.assert_allclose(result.loc['all'].to_numpy(), sensors.drop(columns='zone').corr().to_numpy(), atol=1e-10)
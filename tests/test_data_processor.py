@@ -0,0 +1,88 @@
+"""Проверка однопроходной статистики против pandas"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processor import (SENSOR_METRICS, StatsAccumulator, compute_block_stats, compute_zone_stats,
+                                quantile_label)
+
+
+def sensors(n: int = 5000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'temperature': rng.normal(22, 2, n),
+        'humidity': rng.uniform(30, 70, n),
+        'co2': rng.normal(700, 150, n),
+        'light_level': rng.uniform(0, 800, n),
+        'zone': rng.choice(['zone_A', 'zone_B', 'zone_C'], n)
+    })
+    for col in SENSOR_METRICS:
+        df.loc[rng.choice(n, 100, replace=False), col] = np.nan
+    return df
+
+
+def test_block_stats_match_pandas():
+    df = sensors()
+    stats = compute_block_stats(df[SENSOR_METRICS].to_numpy(), quantiles=(0.05, 0.5, 0.95))
+    frame = df[SENSOR_METRICS]
+
+    np.testing.assert_array_equal(stats['count'], frame.count().to_numpy())
+    np.testing.assert_array_equal(stats['nan_count'], frame.isna().sum().to_numpy())
+    np.testing.assert_allclose(stats['mean'], frame.mean().to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(stats['std'], frame.std().to_numpy(), rtol=1e-10)
+    np.testing.assert_array_equal(stats['min'], frame.min().to_numpy())
+    np.testing.assert_array_equal(stats['max'], frame.max().to_numpy())
+    np.testing.assert_allclose(stats['quantiles'], frame.quantile([0.05, 0.5, 0.95]).to_numpy(), rtol=1e-12)
+
+
+def test_block_stats_empty_and_single_value_columns():
+    values = np.array([[1.0, np.nan], [np.nan, np.nan]])
+    stats = compute_block_stats(values, quantiles=(0.5,))
+    assert stats['count'].tolist() == [1, 0]
+    assert stats['mean'][0] == 1.0 and np.isnan(stats['mean'][1])
+    assert np.isnan(stats['std']).all()
+    assert np.isnan(stats['quantiles'][0, 1])
+
+
+def test_chunked_accumulator_matches_single_pass():
+    df = sensors()
+    whole = StatsAccumulator(SENSOR_METRICS).update(df).result()
+    parts = [StatsAccumulator(SENSOR_METRICS).update(df.iloc[i:i + 700]) for i in range(0, len(df), 700)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    merged = merged.result()
+
+    pd.testing.assert_frame_equal(merged[['count', 'nan_count', 'min', 'max']], whole[['count', 'nan_count', 'min', 'max']])
+    np.testing.assert_allclose(merged[['mean', 'std']].to_numpy(), whole[['mean', 'std']].to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(merged['mean'].to_numpy(), df[SENSOR_METRICS].mean().to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(merged['std'].to_numpy(), df[SENSOR_METRICS].std().to_numpy(), rtol=1e-10)
+
+
+def test_histogram_quantiles_within_bin_width():
+    df = sensors()
+    result = StatsAccumulator(SENSOR_METRICS).update(df).result()
+    widths = {'temperature': 0.05, 'humidity': 0.1, 'co2': 1.0, 'light_level': 1.0}
+    for q in (0.05, 0.25, 0.5, 0.75, 0.95):
+        exact = df[SENSOR_METRICS].quantile(q)
+        for col in SENSOR_METRICS:
+            # Корзина гистограммы плюс расхождение интерполяции соседних порядковых статистик
+            assert abs(result.loc[col, quantile_label(q)] - exact[col]) <= widths[col] * 1.5
+
+
+def test_count_outside():
+    values = np.arange(0.0, 50.0, 0.5)[:, None]
+    acc = StatsAccumulator(['temperature']).update(values)
+    assert acc.count_outside(18.0, 28.0)[0] == pytest.approx(((values < 18) | (values > 28)).sum(), abs=1)
+
+
+def test_zone_stats_match_groupby():
+    df = sensors()
+    chunks = [df.iloc[i:i + 999] for i in range(0, len(df), 999)]
+    result = compute_zone_stats(None, chunks=chunks)
+
+    grouped = df.groupby('zone')[SENSOR_METRICS]
+    for zone, means in grouped.mean().iterrows():
+        np.testing.assert_allclose(result.loc[zone]['mean'].to_numpy(), means.to_numpy(), rtol=1e-12)
+    np.testing.assert_array_equal(result.loc['all']['count'].to_numpy(), df[SENSOR_METRICS].count().to_numpy())
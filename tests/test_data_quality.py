@@ -0,0 +1,111 @@
+"""Проверка профиля качества данных против циклов по датчикам"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_quality import build_quality_report, gap_distribution, profile_sensors, save_quality_report
+
+
+def sensor(sensor_id: str, intervals_sec, values=None, start: str = '2024-01-01') -> pd.DataFrame:
+    times = pd.Timestamp(start) + pd.to_timedelta(np.r_[0.0, np.cumsum(intervals_sec)], unit='s')
+    values = np.full(len(times), 22.0) + np.arange(len(times)) * 0.01 if values is None else values
+    return pd.DataFrame({'timestamp': times, 'sensor_id': sensor_id, 'temperature': values})
+
+
+def test_clock_drift_per_day():
+    sensors = pd.concat([
+        sensor('fast_1min', np.full(2000, 60.010)),
+        sensor('exact_2min', np.full(1000, 120.0)),
+        sensor('slow_2min', np.full(1000, 119.995)),
+    ])
+    drift = profile_sensors(sensors)['clock_drift_ms_per_day']
+
+    # +10 мс на шаг при опросе раз в минуту: 1440 шагов в сутки
+    assert drift['fast_1min'] == pytest.approx(14_400, rel=1e-6)
+    assert drift['exact_2min'] == pytest.approx(0.0, abs=1e-6)
+    assert drift['slow_2min'] == pytest.approx(-3_600, rel=1e-6)
+
+
+def test_drift_ignores_gaps_and_uses_nominal_interval():
+    intervals = np.full(1500, 60.010)
+    intervals[700] = 60.010 * 6
+    profile = profile_sensors(sensor('A', intervals))
+    assert profile.loc['A', 'clock_drift_ms_per_day'] == pytest.approx(14_400, rel=1e-6)
+    assert profile.loc['A', 'gaps'] == 1 and profile.loc['A', 'missed_samples'] == 5
+
+    nominal = profile_sensors(sensor('A', np.full(1000, 60.0)), nominal_interval=59.99)
+    assert nominal.loc['A', 'clock_drift_ms_per_day'] == pytest.approx(0.01 / 59.99 * 86_400_000, rel=1e-6)
+
+
+def random_sensors(n_sensors: int = 12, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_sensors):
+        n = int(rng.integers(50, 400))
+        intervals = rng.choice([0.0, 120.0, 120.0, 120.0, 240.0, 720.0], n - 1)
+        values = np.round(rng.normal(22, 4, n))
+        values[rng.random(n) < 0.05] = np.nan
+        values[10:25] = 21.0
+        frames.append(sensor(f'S{i:02d}', intervals, values))
+    sensors = pd.concat(frames, ignore_index=True)
+    # Записи датчиков перемешаны между собой, как в общем потоке
+    return sensors.iloc[rng.permutation(len(sensors))].sort_values('timestamp', kind='stable')
+
+
+def longest_run(values) -> int:
+    """Самая длинная серия одинаковых подряд значений (NaN прерывает серию)"""
+    best = run = 0
+    for i, value in enumerate(values):
+        if np.isnan(value):
+            run = 0
+        else:
+            run = run + 1 if i > 0 and values[i - 1] == value else 1
+        best = max(best, run)
+    return best
+
+
+def test_profile_matches_per_sensor_loop():
+    sensors = random_sensors()
+    profile = profile_sensors(sensors, metrics=['temperature'], stuck_min_run=10)
+
+    for sensor_id, group in sensors.groupby('sensor_id'):
+        group = group.sort_values('timestamp', kind='stable')
+        intervals = group['timestamp'].diff().dt.total_seconds().dropna()
+        row = profile.loc[sensor_id]
+        values = group['temperature'].to_numpy()
+
+        assert row['rows'] == len(group)
+        assert row['interval_median_sec'] == intervals.median()
+        assert row['interval_p95_sec'] == pytest.approx(intervals.quantile(0.95))
+        assert row['interval_max_sec'] == intervals.max()
+        assert row['gaps'] == (intervals > 2 * intervals.median()).sum()
+        assert row['duplicate_timestamps'] == (intervals == 0).sum()
+        assert row['temperature_missing_rate'] == pytest.approx(np.isnan(values).mean())
+        assert row['temperature_out_of_range_rate'] == pytest.approx(((values < 18) | (values > 28)).mean())
+        assert row['temperature_longest_run'] == longest_run(values)
+        assert row['temperature_stuck_runs'] >= 1
+
+
+def test_backward_jumps_in_file_order():
+    sensors = sensor('A', np.full(10, 120.0))
+    sensors = sensors.iloc[[0, 1, 2, 4, 3, 5, 6, 7, 9, 8, 10]]
+    profile = profile_sensors(sensors)
+    assert profile.loc['A', 'backward_jumps'] == 2
+    assert profile.loc['A', 'gaps'] == 0
+
+
+def test_quality_report_is_json(tmp_path):
+    sensors = random_sensors(seed=1)
+    report = build_quality_report(sensors)
+    path = tmp_path / 'quality' / 'report.json'
+    save_quality_report(report, str(path))
+    loaded = json.loads(path.read_text(encoding='utf-8'))
+
+    assert loaded['summary']['rows'] == len(sensors)
+    assert loaded['summary']['sensors'] == 12 and len(loaded['sensors']) == 12
+    assert set(loaded['summary']['metrics']) == {'temperature'}
+    # Интервал есть у каждой записи, кроме первой записи датчика
+    assert sum(gap_distribution(sensors).values()) == len(sensors) - 12
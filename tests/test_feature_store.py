@@ -0,0 +1,95 @@
+"""Проверка хранилища признаков: потоковые обновления против расчета по всему ряду"""
+
+import numpy as np
+import pandas as pd
+
+from src.feature_store import TIME_FEATURES, FeatureStore, compute_time_features, hour_features
+
+
+def energy(n: int = 1500, gaps: int = 40, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2024-01-01', periods=n, freq='30min')
+    timestamps = timestamps.delete(rng.choice(n, gaps, replace=False))
+    return pd.DataFrame({'timestamp': timestamps, 'electricity_kwh': rng.uniform(50, 150, len(timestamps))})
+
+
+def reference(df: pd.DataFrame) -> pd.DataFrame:
+    """lag_48 и rolling_mean_48 по всему ряду средствами pandas"""
+    series = df.set_index('timestamp')['electricity_kwh']
+    step = pd.Timedelta('30min')
+    rolling = series.rolling(48 * step, min_periods=48).mean()
+    return pd.DataFrame({
+        'lag_48': series.reindex(series.index - 48 * step).to_numpy(),
+        'rolling_mean_48': rolling.reindex(series.index - 48 * step).to_numpy()
+    }, index=series.index)
+
+
+def test_streaming_updates_match_reference():
+    df = energy()
+    store = FeatureStore()
+    computed = [store.update(df.iloc[start:start + 37]) for start in range(0, len(df), 37)]
+
+    # В потоке признаки считаются только для новых строк
+    assert computed == [len(df.iloc[start:start + 37]) for start in range(0, len(df), 37)]
+    assert store.computed_rows == len(df)
+
+    expected = reference(df)
+    pd.testing.assert_frame_equal(store.data[['lag_48', 'rolling_mean_48']], expected, check_names=False)
+    time_features = compute_time_features(df['timestamp']).astype(float)
+    np.testing.assert_array_equal(store.data[TIME_FEATURES].to_numpy(), time_features.to_numpy())
+
+
+def test_streaming_state_is_bounded_by_history():
+    df = energy(n=3000, gaps=0)
+    store = FeatureStore()
+    store.update(df.iloc[:2000])
+    for i in range(2000, 2010):
+        store.update(df.iloc[i:i + 1])
+    assert len(store._history_tail()) <= store._history + 1
+
+
+def test_late_and_corrected_values_recompute_dependent_rows():
+    df = energy()
+    store = FeatureStore()
+    store.update(df.iloc[:800])
+    store.update(df.iloc[1000:])
+    store.update(df.iloc[800:1000])
+
+    corrected = df.copy()
+    corrected.loc[300:320, 'electricity_kwh'] = 0.0
+    store.update(corrected.iloc[300:321])
+    store.update(corrected.iloc[len(df) - 5:].assign(electricity_kwh=1.0))
+    corrected.loc[len(df) - 5:, 'electricity_kwh'] = 1.0
+
+    pd.testing.assert_frame_equal(store.data[['lag_48', 'rolling_mean_48']], reference(corrected), check_names=False)
+    assert store.data['electricity_kwh'].tolist() == corrected['electricity_kwh'].tolist()
+
+
+def test_save_load_then_stream(tmp_path):
+    df = energy()
+    store = FeatureStore()
+    store.update(df.iloc[:1000])
+    store.save(str(tmp_path / 'features.pkl'))
+
+    loaded = FeatureStore.load(str(tmp_path / 'features.pkl'))
+    assert loaded.update(df.iloc[1000:]) == len(df) - 1000
+    pd.testing.assert_frame_equal(loaded.data[['lag_48', 'rolling_mean_48']], reference(df), check_names=False)
+
+
+def test_inference_matrix_for_future_timestamps():
+    df = energy(gaps=0)
+    store = FeatureStore()
+    store.update(df)
+    future = pd.date_range(df['timestamp'].iloc[-1] + pd.Timedelta('30min'), periods=4, freq='30min')
+    matrix = store.inference_matrix(future)
+
+    series = df.set_index('timestamp')['electricity_kwh']
+    np.testing.assert_allclose(matrix['lag_48'], series.reindex(future - pd.Timedelta(hours=24)).to_numpy())
+    assert matrix['rolling_mean_48'].notna().all()
+
+
+def test_hour_features():
+    features = dict(zip(TIME_FEATURES, hour_features(9, 0)))
+    assert features['hour'] == 9 and features['is_peak'] == 1 and features['is_weekend'] == 0
+    features = dict(zip(TIME_FEATURES, hour_features(23, 1)))
+    assert features['is_night'] == 1 and features['is_weekend'] == 1 and features['day_of_week'] == 5
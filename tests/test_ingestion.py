@@ -0,0 +1,65 @@
+"""Проверка конвейера приема: учет всех строк при обратном давлении и сбросе по таймеру"""
+
+import asyncio
+import time
+
+from src.ingestion import IngestionPipeline, MemoryStorage, benchmark, parse_batch, validate_batch
+
+
+def reading(i: int, temperature: float = 22.0) -> str:
+    return f"2024-01-01 00:{i % 60:02d}:00,S{i},{temperature},45.0,600,300,zone_A\n"
+
+
+class SlowPipeline(IngestionPipeline):
+    """Конвейер с медленным разбором: очередь переполняется, таймер ждет в put"""
+
+    def _process_batch(self, batch):
+        time.sleep(0.2)
+        return super()._process_batch(batch)
+
+
+async def bursty_source(n: int, burst: int = 2, pause: float = 0.06):
+    for i in range(n):
+        yield reading(i, temperature=22.0 if i % 5 else 40.0)
+        if i % burst == burst - 1:
+            await asyncio.sleep(pause)
+
+
+def test_no_readings_lost_under_backpressure_with_timer_flushes():
+    storage = MemoryStorage()
+    pipeline = SlowPipeline(storage, batch_size=100, max_pending_batches=1, flush_interval=0.05)
+    stats = asyncio.run(pipeline.run(bursty_source(18)))
+
+    assert stats['received'] == 18
+    assert stats['accepted'] + stats['rejected'] == stats['received']
+    assert len(storage.to_frame()) == stats['accepted']
+    assert stats['rejected'] == 4
+
+
+def test_partial_batch_flushed_while_source_idle():
+    storage = MemoryStorage()
+    pipeline = IngestionPipeline(storage, batch_size=100, flush_interval=0.05)
+    seen = {}
+
+    async def idle_source():
+        for i in range(3):
+            yield reading(i)
+        await asyncio.sleep(0.3)
+        seen['stored_while_idle'] = len(storage.to_frame())
+        yield reading(3)
+
+    stats = asyncio.run(pipeline.run(idle_source()))
+    assert seen['stored_while_idle'] == 3
+    assert stats['accepted'] == 4
+
+
+def test_validate_batch_rejects_out_of_range_and_keeps_missing():
+    df = parse_batch([reading(0), reading(1, 40.0), "2024-01-01 00:02:00,S2,,45.0,600,300,zone_A"])
+    assert validate_batch(df).tolist() == [True, False, True]
+
+
+def test_benchmark_meets_throughput_target():
+    stats = benchmark(100_000)
+    assert stats['received'] == 100_000
+    assert stats['accepted'] + stats['rejected'] == stats['received']
+    assert stats['readings_per_sec'] >= 50_000
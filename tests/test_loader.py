@@ -0,0 +1,91 @@
+"""Проверка конкурентной загрузки источников и типизированных ошибок"""
+
+import time
+
+import pandas as pd
+import pytest
+
+from create_dashboard import load_data
+from src.loader import (DataLoadError, DataSource, DataSourceNotFoundError, DataSourceParseError,
+                        DataSourceTimeoutError, load_sources)
+
+
+class SlowSource(DataSource):
+    """Источник, чтение которого занимает delay секунд"""
+
+    def __init__(self, name: str, delay: float, **kwargs):
+        super().__init__(name, '', **kwargs)
+        self.delay = delay
+
+    def read(self) -> pd.DataFrame:
+        time.sleep(self.delay)
+        return pd.DataFrame({'value': [self.delay]})
+
+
+class BrokenSource(DataSource):
+    def read(self) -> pd.DataFrame:
+        raise RuntimeError('сбой драйвера')
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    pd.DataFrame({'timestamp': pd.date_range('2024-01-01', periods=3, freq='2min'), 'temperature': [21.0, 22.0, 23.0]}) \
+        .to_csv(tmp_path / 'sensors_data.csv', index=False)
+    (tmp_path / 'broken.csv').write_text('a,b\n1,2,3,4\n"unterminated\n')
+    (tmp_path / 'empty.csv').write_text('')
+    return tmp_path
+
+
+def test_sources_load_concurrently():
+    sources = [SlowSource(f's{i}', 0.3) for i in range(4)]
+    start = time.perf_counter()
+    data, errors = load_sources(sources)
+
+    assert time.perf_counter() - start < 0.9
+    assert list(data) == ['s0', 's1', 's2', 's3'] and errors == {}
+
+
+def test_csv_parse_dates_and_typed_errors(csv_dir):
+    data, errors = load_sources([
+        DataSource('sensors', str(csv_dir / 'sensors_data.csv'), parse_dates=['timestamp', 'missing']),
+        DataSource('broken', str(csv_dir / 'broken.csv'), required=False),
+        DataSource('empty', str(csv_dir / 'empty.csv'), required=False),
+        DataSource('absent', str(csv_dir / 'absent.csv'), required=False),
+        BrokenSource('driver', '', required=False)
+    ])
+
+    assert pd.api.types.is_datetime64_any_dtype(data['sensors']['timestamp'])
+    assert isinstance(errors['broken'], DataSourceParseError)
+    assert isinstance(errors['empty'], DataSourceParseError)
+    assert isinstance(errors['absent'], DataSourceNotFoundError)
+    assert type(errors['driver']) is DataLoadError and 'сбой драйвера' in str(errors['driver'])
+    assert all(error.source == name for name, error in errors.items())
+    assert all(data[name].empty for name in errors)
+
+
+def test_required_source_errors_are_raised(csv_dir):
+    with pytest.raises(DataSourceNotFoundError) as info:
+        load_sources([SlowSource('fast', 0.0), DataSource('sensors', str(csv_dir / 'absent.csv'))])
+    assert info.value.source == 'sensors'
+
+    with pytest.raises(DataSourceTimeoutError):
+        load_sources([SlowSource('slow', 1.0, timeout=0.1)])
+
+
+def test_optional_timeout_does_not_wait_for_slow_source():
+    start = time.perf_counter()
+    data, errors = load_sources([SlowSource('fast', 0.0), SlowSource('slow', 1.0, required=False, timeout=0.1)])
+
+    assert time.perf_counter() - start < 0.8
+    assert isinstance(errors['slow'], DataSourceTimeoutError)
+    assert len(data['fast']) == 1 and data['slow'].empty
+
+
+def test_dashboard_load_data(csv_dir, tmp_path):
+    pd.DataFrame({'timestamp': ['2024-01-01 00:00'], 'electricity_kwh': [10.0]}).to_csv(
+        csv_dir / 'energy_data.csv', index=False)
+    data = load_data(str(csv_dir), str(tmp_path / 'no_reports'))
+
+    assert set(data) == {'sensors', 'energy', 'anomalies', 'recommendations'}
+    assert len(data['sensors']) == 3 and data['anomalies'].empty and data['recommendations'].empty
+    assert load_data(str(tmp_path / 'no_data'), str(tmp_path)) is None
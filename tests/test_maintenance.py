@@ -0,0 +1,82 @@
+"""Проверка скользящих признаков оборудования против pandas rolling и модели риска"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.maintenance import EQUIPMENT_ACTIVITY, FailureRiskModel, extract_equipment_features, score_equipment
+
+
+def equipment(n: int = 1500, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='1min'),
+        'hvac_status': rng.choice(['cooling', 'heating', 'idle', 'off'], n, p=[0.4, 0.3, 0.2, 0.1]),
+        'lighting_status': rng.choice(['on', 'off'], n),
+        'ventilation_status': rng.choice(['high', 'medium', 'low', 'off'], n),
+        'equipment_load': rng.uniform(20, 80, n)
+    })
+    df.loc[rng.choice(n, n // 30, replace=False), 'equipment_load'] = np.nan
+    return df
+
+
+def test_features_match_pandas_rolling():
+    df = equipment()
+    windows = (15, 60)
+    # Порядок строк не важен: признаки считаются по времени
+    features = extract_equipment_features(df.sample(frac=1, random_state=0), windows)
+
+    np.testing.assert_array_equal(features['timestamp'].to_numpy(), df['timestamp'].to_numpy())
+    for window in windows:
+        for name, (column, levels) in EQUIPMENT_ACTIVITY.items():
+            activity = df[column].map(levels)
+            expected = activity.rolling(window, min_periods=1).mean()
+            np.testing.assert_allclose(features[f'{name}_duty_{window}'], expected, rtol=1e-12)
+
+            changed = (df[column] != df[column].shift()).astype(float)
+            changed.iloc[0] = 0.0
+            np.testing.assert_allclose(features[f'{name}_transitions_{window}'],
+                                       changed.rolling(window, min_periods=1).sum(), rtol=1e-12)
+
+        load = df['equipment_load'].rolling(window, min_periods=1)
+        np.testing.assert_allclose(features[f'load_mean_{window}'], load.mean(), rtol=1e-9)
+        np.testing.assert_allclose(features[f'load_std_{window}'], load.std(ddof=0).fillna(0.0), atol=1e-6)
+
+        offline = (df['hvac_status'] == 'off').astype(float).rolling(window, min_periods=1).mean()
+        np.testing.assert_allclose(features[f'hvac_offline_{window}'], offline, rtol=1e-12)
+
+
+def test_risk_rises_on_abnormal_operation():
+    df = equipment()
+    normal = extract_equipment_features(df)
+    model = FailureRiskModel().fit(normal)
+
+    # Последние 4 часа: HVAC постоянно переключается, загрузка скачет
+    broken = df.copy()
+    tail = broken.index[-240:]
+    broken.loc[tail, 'hvac_status'] = np.where(np.arange(240) % 2, 'cooling', 'off')
+    broken.loc[tail, 'equipment_load'] = np.where(np.arange(240) % 2, 100.0, 0.0)
+    risk = model.predict_risk(extract_equipment_features(broken))
+
+    assert list(risk.columns) == ['timestamp'] + [f'risk_{name}' for name in EQUIPMENT_ACTIVITY] + ['risk_max']
+    assert risk['risk_hvac'].iloc[-1] > 0.9
+    assert risk['risk_hvac'].iloc[-1] > risk['risk_hvac'].iloc[:1200].quantile(0.99)
+    np.testing.assert_allclose(risk['risk_max'], risk.filter(like='risk_').drop(columns='risk_max').max(axis=1))
+
+
+def test_supervised_classifier_replaces_profile_score():
+    pytest.importorskip('sklearn')
+    features = extract_equipment_features(equipment())
+    labels = pd.DataFrame({'hvac': (features['hvac_offline_60'] > features['hvac_offline_60'].median()).astype(int)})
+    model = FailureRiskModel().fit(features, labels)
+
+    assert set(model.classifiers) == {'hvac'}
+    risk = model.predict_risk(features)
+    assert ((risk['risk_hvac'] > 0.5) == labels['hvac'].astype(bool)).mean() > 0.9
+
+
+def test_unfitted_model_and_score_equipment():
+    with pytest.raises(RuntimeError):
+        FailureRiskModel().predict_risk(extract_equipment_features(equipment(n=10)))
+    risk = score_equipment(equipment(n=300), windows=(15,))
+    assert len(risk) == 300 and risk['risk_max'].between(0, 1).all()
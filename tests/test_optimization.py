@@ -0,0 +1,141 @@
+"""Проверка water-filling против LP, планирования по часам и оптимизации уставок"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.optimization import (COMFORT_BAND, COOLING_KWH_PER_DEGREE, HEATING_KWH_PER_DEGREE,
+                              PeakShavingOptimizer, generate_setpoint_candidates, optimize_setpoints,
+                              pareto_mask, simulate_setpoints, water_fill_schedule)
+
+
+class PeakHourModel:
+    """Модель-заглушка: базовая нагрузка и пик в заданный час"""
+
+    def __init__(self, base: float, peak_hour: int, peak: float):
+        self.base, self.peak_hour, self.peak = base, peak_hour, peak
+
+    def predict(self, features):
+        hours = features['hour'].to_numpy()
+        return self.base + self.peak * (hours == self.peak_hour)
+
+
+def lp_min_peak(forecast, shiftable, max_load, allowed):
+    """Минимальный пик одного здания: LP по переменным x_t и пику P"""
+    linprog = pytest.importorskip('scipy.optimize').linprog
+    n = len(forecast)
+    fixed = forecast - shiftable
+    upper = np.where(allowed, np.maximum(max_load - fixed, 0.0), shiftable)
+    c = np.r_[np.zeros(n), 1.0]
+    a_ub = np.hstack([np.eye(n), -np.ones((n, 1))])
+    result = linprog(c, A_ub=a_ub, b_ub=-fixed, A_eq=np.r_[np.ones(n), 0.0][None, :],
+                     b_eq=[shiftable.sum()], bounds=[(0, u) for u in upper] + [(None, None)])
+    return result.fun if result.success else None
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_water_fill_matches_lp(seed):
+    rng = np.random.default_rng(seed)
+    n = 24
+    forecast = rng.uniform(50, 150, size=(1, n))
+    shiftable = forecast * rng.uniform(0, 0.4, size=(1, n))
+    max_load = np.full((1, n), forecast.max() * rng.uniform(0.8, 1.2))
+    allowed = rng.random(n) < 0.5
+
+    result = water_fill_schedule(forecast, shiftable, max_load=max_load, allowed=allowed[None, :])
+    schedule = result['schedule'][0]
+    assert schedule.max() <= forecast.max() + 1e-6
+
+    best = lp_min_peak(forecast[0], shiftable[0], max_load[0], allowed)
+    if best is not None and result['feasible'][0]:
+        assert schedule.max() == pytest.approx(best, rel=1e-6)
+        assert schedule.sum() == pytest.approx(forecast.sum(), rel=1e-6)
+        # В запрещенные интервалы нагрузка не переносится
+        assert np.all(result['shifted'][0][~allowed] <= 1e-6)
+
+
+def test_restricted_allowed_hours_never_raise_peak():
+    optimizer = PeakShavingOptimizer(model=PeakHourModel(100.0, 10, 80.0))
+    result = optimizer.plan('2024-02-01', allowed_hours=range(2, 4))
+    summary = result['summary'].iloc[0]
+
+    assert summary['peak_after'] <= summary['peak_before']
+    assert summary['peak_reduction_pct'] > 0
+    hours = result['timestamps'].dt.hour.to_numpy()
+    shifted = result['schedule'][0] - result['forecast'][0]
+    assert np.all(shifted[~np.isin(hours, [2, 3])] <= 1e-9)
+
+
+def test_infeasible_max_load_keeps_original_schedule():
+    forecast = np.array([[100.0, 100.0, 100.0, 100.0]])
+    result = water_fill_schedule(forecast, 0.1 * forecast, max_load=50.0)
+    assert not result['feasible'][0]
+    np.testing.assert_array_equal(result['schedule'], forecast)
+
+
+def test_plan_uses_per_building_models():
+    models = [PeakHourModel(100.0, 9, 50.0), PeakHourModel(40.0, 19, 60.0)]
+    result = PeakShavingOptimizer(model=models[0]).plan('2024-02-01', models=models)
+
+    hours = result['timestamps'].dt.hour.to_numpy()
+    assert hours[np.argmax(result['forecast'][0])] == 9
+    assert hours[np.argmax(result['forecast'][1])] == 19
+    summary = result['summary']
+    assert summary['peak_before'].tolist() == [150.0, 100.0]
+    assert (summary['peak_after'] < summary['peak_before']).all()
+    assert summary['recommendation'].str.startswith('Сместить нагрузку с ').all()
+
+
+def simulate_one(free, heat, cool, occupied, step_hours=0.5, coupling=0.3, max_correction=3.0):
+    """Тепловая модель одной зоны и одного кандидата по шагам"""
+    indoor, energy, discomfort = free[0], 0.0, 0.0
+    for t in range(len(free)):
+        drift = indoor + coupling * (free[t] - indoor)
+        cooling = min(max(drift - cool[t], 0.0), max_correction)
+        heating = min(max(heat[t] - drift, 0.0), max_correction)
+        indoor = drift - cooling + heating
+        energy += COOLING_KWH_PER_DEGREE * cooling + HEATING_KWH_PER_DEGREE * heating
+        if occupied[t]:
+            discomfort += (max(COMFORT_BAND[0] - indoor, 0.0) + max(indoor - COMFORT_BAND[1], 0.0)) * step_hours
+    return energy, discomfort
+
+
+def test_batched_simulation_matches_scalar_model():
+    rng = np.random.default_rng(0)
+    free = 22 + 4 * np.sin(np.linspace(0, 2 * np.pi, 48))[None, :] + rng.normal(0, 1, (3, 48))
+    candidates = generate_setpoint_candidates(heating_setpoints=[19.0, 21.0], cooling_setpoints=[23.0, 25.0],
+                                              setbacks=[0.0, 2.0])
+    energy, discomfort = simulate_setpoints(free, candidates['heat'], candidates['cool'], candidates['occupied'])
+
+    for c in range(len(candidates['params'])):
+        for z in range(3):
+            expected = simulate_one(free[z], candidates['heat'][c], candidates['cool'][c], candidates['occupied'])
+            assert (energy[c, z], discomfort[c, z]) == pytest.approx(expected, rel=1e-12)
+
+
+def test_pareto_mask_matches_pairwise_dominance():
+    rng = np.random.default_rng(1)
+    energy, discomfort = rng.random((200, 4)), rng.random((200, 4))
+    mask = pareto_mask(energy, discomfort)
+
+    for z in range(4):
+        e, d = energy[:, z], discomfort[:, z]
+        dominated = ((e[None, :] <= e[:, None]) & (d[None, :] <= d[:, None])
+                     & ((e[None, :] < e[:, None]) | (d[None, :] < d[:, None]))).any(axis=1)
+        np.testing.assert_array_equal(mask[:, z], ~dominated)
+
+
+def test_optimize_setpoints_front_is_monotonic():
+    timestamps = pd.date_range('2024-01-01', periods=3 * 720, freq='2min')
+    hours = timestamps.hour.to_numpy()
+    sensors = pd.DataFrame({
+        'timestamp': np.tile(timestamps, 2),
+        'zone': np.repeat(['zone_A', 'zone_B'], len(timestamps)),
+        'temperature': np.concatenate([22 + 5 * np.sin((hours - 9) / 24 * 2 * np.pi), np.full(len(timestamps), 19.0)])
+    })
+    front = optimize_setpoints(sensors)
+
+    assert set(front['zone']) == {'zone_A', 'zone_B'}
+    for _, zone in front.groupby('zone'):
+        assert zone['energy_kwh'].is_monotonic_increasing
+        assert zone['discomfort_deg_h'].is_monotonic_decreasing
@@ -0,0 +1,94 @@
+"""Проверка параллельного анализа портфеля зданий"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from create_portfolio import aggregate_portfolio, find_buildings, run_portfolio
+from src.data_generation import BMSDataGenerator
+
+
+@pytest.fixture(scope='module')
+def portfolio(tmp_path_factory):
+    """Два здания с синтетическими данными за 2 дня"""
+    root = tmp_path_factory.mktemp('portfolio')
+    for i, name in enumerate(['building_b', 'building_a']):
+        sensors = BMSDataGenerator(seed=i).generate_sensor_data(days=2, freq='2min')
+        timestamps = pd.date_range('2024-01-01', periods=96, freq='30min')
+        energy = pd.DataFrame({
+            'timestamp': timestamps,
+            'electricity_kwh': 50 + 30 * timestamps.hour.isin(range(8, 20)) + np.random.default_rng(i).normal(0, 2, 96),
+            'heating_gcal': 0.1
+        })
+        os.makedirs(root / name)
+        sensors.to_csv(root / name / 'sensors_data.csv', index=False)
+        energy.to_csv(root / name / 'energy_data.csv', index=False)
+    # Папка без energy_data.csv зданием не считается
+    os.makedirs(root / 'notes')
+    (root / 'notes' / 'sensors_data.csv').write_text('timestamp\n')
+    return root
+
+
+def test_run_portfolio_writes_dashboards_index_and_timings(portfolio, tmp_path):
+    output = tmp_path / 'out'
+    kpis = run_portfolio(str(portfolio), str(output), max_workers=2, cache_dir=str(tmp_path / 'cache'))
+
+    assert [name for name, _ in find_buildings(str(portfolio))] == ['building_a', 'building_b']
+    assert kpis['building'].tolist() == ['building_a', 'building_b']
+    for row in kpis.itertuples():
+        assert os.path.isfile(output / row.dashboard)
+        sensors = pd.read_csv(portfolio / row.building / 'sensors_data.csv')
+        assert row.readings == len(sensors)
+        assert row.avg_temperature == pytest.approx(sensors['temperature'].mean(), abs=0.05)
+
+    stages = ['load', 'fingerprint', 'metrics', 'anomalies', 'forecast', 'recommendations', 'dashboard']
+    timings = kpis[[f'time_{stage}_sec' for stage in stages]]
+    assert (timings >= 0).all().all()
+    np.testing.assert_allclose(kpis['time_total_sec'], kpis.filter(regex=r'^time_(?!total)').sum(axis=1))
+
+    saved = pd.read_csv(output / 'portfolio_kpis.csv')
+    assert saved['building'].tolist() == kpis['building'].tolist()
+    index = (output / 'index.html').read_text(encoding='utf-8')
+    assert 'href="building_a/dashboard.html"' in index and 'href="building_b/dashboard.html"' in index
+
+
+def test_failed_building_is_reported_and_others_kept(portfolio, tmp_path, capsys):
+    broken = tmp_path / 'portfolio'
+    os.makedirs(broken / 'broken')
+    (broken / 'broken' / 'sensors_data.csv').write_text('a,b\n1,2\n')
+    (broken / 'broken' / 'energy_data.csv').write_text('a,b\n1,2\n')
+    os.symlink(portfolio / 'building_a', broken / 'building_a')
+
+    kpis = run_portfolio(str(broken), str(tmp_path / 'out'), max_workers=2)
+    assert kpis['building'].tolist() == ['building_a']
+    assert 'Не обработано зданий: 1 из 2: broken' in capsys.readouterr().out
+
+    os.remove(broken / 'building_a')
+    with pytest.raises(RuntimeError):
+        run_portfolio(str(broken), str(tmp_path / 'out'), max_workers=1)
+
+
+def test_empty_portfolio_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        run_portfolio(str(tmp_path), str(tmp_path / 'out'))
+
+
+def test_aggregate_portfolio_weights_by_readings():
+    kpis = pd.DataFrame({
+        'readings': [100, 300],
+        'avg_temperature': [20.0, 24.0],
+        'avg_co2': [400.0, 800.0],
+        'energy_kwh': [10.0, 20.0],
+        'forecast_24h_kwh': [1.0, 2.0],
+        'anomalies': [1, 2],
+        'high_priority_recommendations': [0, 3]
+    })
+    summary = aggregate_portfolio(kpis)
+    assert summary['Зданий'] == 2
+    assert summary['Показаний датчиков'] == 400
+    assert summary['Средняя температура, °C'] == pytest.approx(23.0)
+    assert summary['Средний CO2, ppm'] == pytest.approx(700.0)
+    assert summary['Энергопотребление, кВт·ч'] == 30.0
+    assert summary['Рекомендаций высокого приоритета'] == 3
@@ -0,0 +1,125 @@
+"""Проверка микро-пакетов прогноза: один predict на пакет, гистограммы и HTTP"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pytest
+
+from src.prediction_service import Histogram, MicroBatcher, PredictionService, feature_rows
+
+
+class CountingModel:
+    """Модель-заглушка: прогноз 10 * час + выходной, размеры пакетов записываются"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def predict(self, features):
+        with self._lock:
+            self.calls.append(len(features))
+        if (features['hour'] == 13).any():
+            raise RuntimeError('сбой модели')
+        return 10 * features['hour'].to_numpy() + features['is_weekend'].to_numpy()
+
+
+def test_feature_rows():
+    rows = feature_rows([0, 8, 23], [0, 1, 0])
+    assert rows['hour'].tolist() == [0, 8, 23]
+    assert rows['is_weekend'].tolist() == [0, 1, 0]
+    assert rows['is_peak'].tolist() == [0, 1, 0]
+
+
+def test_one_predict_per_batch():
+    model = CountingModel()
+    batcher = MicroBatcher(model, window_ms=200, max_batch=256)
+    futures = [batcher.submit(i % 12, i % 2) for i in range(100)]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert model.calls == [100]
+    assert results[:3] == [0.0, 11.0, 20.0]
+    assert batcher.batch_sizes.to_dict()['count'] == 1
+
+
+def test_max_batch_splits_requests():
+    model = CountingModel()
+    batcher = MicroBatcher(model, window_ms=200, max_batch=16)
+    futures = [batcher.submit(5) for _ in range(100)]
+    assert [future.result(timeout=5) for future in futures] == [50.0] * 100
+    assert model.calls == [16] * 6 + [4]
+
+
+def test_concurrent_callers_share_batches():
+    model = CountingModel()
+    batcher = MicroBatcher(model, window_ms=20)
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        results = list(executor.map(lambda i: batcher.predict(i % 12), range(256)))
+
+    assert results == [10.0 * (i % 12) for i in range(256)]
+    assert sum(model.calls) == 256 and len(model.calls) < 64
+
+
+def test_model_error_fails_batch_but_not_batcher():
+    batcher = MicroBatcher(CountingModel(), window_ms=50)
+    failed = [batcher.submit(13), batcher.submit(1)]
+    for future in failed:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+    assert batcher.predict(2) == 20.0
+    with pytest.raises(ValueError):
+        batcher.submit(24)
+
+
+def test_histogram_quantiles():
+    histogram = Histogram([1, 2, 5, 10])
+    assert np.isnan(histogram.quantile(0.5)) and histogram.to_dict()['count'] == 0
+    for value in [0.5] * 50 + [3.0] * 45 + [7.0] * 4 + [42.0]:
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(0.95) == 5.0
+    assert histogram.quantile(0.99) == 10.0
+    assert histogram.quantile(1.0) == 42.0
+    summary = histogram.to_dict()
+    assert summary['buckets'] == {'le_1': 50, 'le_2': 0, 'le_5': 45, 'le_10': 4, 'le_inf': 1}
+    assert summary['mean'] == pytest.approx((25 + 135 + 28 + 42) / 100)
+
+
+@pytest.fixture
+def service():
+    service = PredictionService(('127.0.0.1', 0), CountingModel(), window_ms=20)
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{service.server_address[1]}', service
+    service.shutdown()
+    service.server_close()
+
+
+def get(url):
+    with urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def test_http_endpoints(service):
+    url, server = service
+    assert get(f'{url}/predict?hour=8&is_weekend=1') == {'hour': 8, 'is_weekend': 1, 'prediction_kwh': 81.0}
+
+    body = json.dumps({'requests': [{'hour': h} for h in range(5)]}).encode()
+    with urlopen(Request(f'{url}/predict', data=body, method='POST'), timeout=5) as response:
+        predictions = json.loads(response.read())['predictions']
+    assert [p['prediction_kwh'] for p in predictions] == [0.0, 10.0, 20.0, 30.0, 40.0]
+    assert server.batcher.model.calls[-1] == 5
+
+    for path, status in [('/predict?hour=25', 400), ('/predict', 400), ('/unknown', 404), ('/predict?hour=13', 500)]:
+        with pytest.raises(HTTPError) as info:
+            get(url + path)
+        assert info.value.code == status
+
+    metrics = get(f'{url}/metrics')
+    assert metrics['request_latency_ms']['count'] == 2
+    assert metrics['batch_size']['count'] == 2
+    assert get(f'{url}/health') == {'status': 'ok'}
@@ -0,0 +1,105 @@
+"""Проверка векторного движка правил против построчной цепочки if/elif"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models import (RECOMMENDATION_RULES, RecommendationEngine, build_energy_rollup,
+                        generate_building_recommendations, generate_recommendations)
+
+
+OPERATORS = {'<': lambda a, b: a < b, '<=': lambda a, b: a <= b, '>': lambda a, b: a > b, '>=': lambda a, b: a >= b}
+
+
+def reference(row: dict, table: dict):
+    """Статус, действие и приоритет одной строки по таблице правил (как в ноутбуке)"""
+    value = row[table['metric']]
+    status, action = table['default']
+    for op, threshold, rule_status, template in table['rules']:
+        if OPERATORS[op](value, threshold):
+            status, action = rule_status, template.format(**row)
+            break
+    priority = table['default_priority']
+    for op, threshold, rule_priority in table['priority']:
+        if OPERATORS[op](value, threshold):
+            priority = rule_priority
+            break
+    return status, action, priority, table['value_format'].format(**row)
+
+
+def rollup(n: int = 300, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'zone': rng.choice(['zone_A', 'zone_B'], n),
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='1h'),
+        # Включая точные пороги: строгие сравнения на границе
+        'temperature': rng.choice([17.5, 18.0, 20.0, 22.0, 24.0, 25.0, 27.0], n),
+        'humidity': rng.uniform(25, 75, n),
+        'co2': rng.choice([550.0, 600.0, 700.0, 800.0, 900.0, 1000.0, 1200.0], n),
+        'light_level': rng.uniform(100, 500, n),
+        'electricity_kwh': rng.uniform(50, 150, n),
+        'peak_hour': rng.integers(0, 24, n),
+        'peak_ratio': rng.uniform(1.0, 2.5, n)
+    })
+    return frame
+
+
+def test_engine_matches_row_by_row_rules():
+    frame = rollup()
+    result = RecommendationEngine().evaluate(frame, sort_by_priority=False)
+
+    expected = []
+    for parameter, table in RECOMMENDATION_RULES.items():
+        for row in frame.to_dict('records'):
+            expected.append((row['zone'], row['timestamp'], parameter, *reference(row, table)))
+
+    actual = result[['zone', 'timestamp', 'Параметр', 'Статус', 'Рекомендация', 'Приоритет', 'Текущее значение']]
+    assert list(actual.itertuples(index=False, name=None)) == expected
+
+
+def test_actionable_only_and_priority_order():
+    frame = rollup(seed=1)
+    full = RecommendationEngine().evaluate(frame, sort_by_priority=False)
+    actionable = RecommendationEngine().evaluate(frame, actionable_only=True)
+
+    needs_action = (full['Рекомендация'] != 'Поддерживать текущие настройки') & \
+        (full['Рекомендация'] != 'Оптимизировать график работы оборудования') | (full['Приоритет'] == 'Высокий')
+    assert len(actionable) == needs_action.sum()
+    order = actionable['Приоритет'].map({'Высокий': 1, 'Средний': 2, 'Низкий': 3})
+    assert order.is_monotonic_increasing
+
+
+def test_missing_metric_rows_are_skipped():
+    frame = rollup(n=10).drop(columns=['peak_ratio'])
+    frame.loc[:4, 'co2'] = np.nan
+    result = RecommendationEngine().evaluate(frame)
+    assert 'Энергопотребление' not in set(result['Параметр'])
+    assert (result['Параметр'] == 'CO2').sum() == 5
+
+
+def test_energy_rollup_peak_hour():
+    timestamps = pd.date_range('2024-01-01', periods=96, freq='30min')
+    kwh = np.where(timestamps.hour == 9, 300.0, 100.0)
+    energy = pd.DataFrame({'timestamp': timestamps, 'electricity_kwh': kwh})
+    result = build_energy_rollup(energy)
+
+    assert result['peak_hour'].tolist() == [9, 9]
+    assert result['peak_ratio'].iloc[0] == pytest.approx(300 / ((2 * 300 + 46 * 100) / 48))
+
+
+def test_generate_recommendations_shapes():
+    rng = np.random.default_rng(3)
+    sensors = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=480, freq='2min'),
+        'zone': rng.choice(['zone_A', 'zone_B'], 480),
+        'temperature': rng.normal(26, 1, 480),
+        'humidity': rng.uniform(40, 60, 480),
+        'co2': rng.normal(500, 20, 480),
+        'light_level': rng.uniform(400, 500, 480)
+    })
+    result = generate_recommendations(sensors)
+    assert set(result['zone']) == {'zone_A', 'zone_B'}
+    assert set(result['Параметр']) == {'Температура'}
+
+    building = generate_building_recommendations(sensors)
+    assert building['Параметр'].tolist() == ['Температура', 'Влажность', 'CO2', 'Освещенность']
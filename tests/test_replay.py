@@ -0,0 +1,57 @@
+"""Проверка k-путевого слияния и темпа воспроизведения"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.replay import CountingSink, HistoricalReplayer, ListSink, merge_sources
+
+
+def frame(times, value):
+    return pd.DataFrame({'timestamp': pd.to_datetime(times), 'value': value})
+
+
+def test_merge_matches_stable_sort():
+    rng = np.random.default_rng(0)
+    frames = {
+        name: frame(np.sort(pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 500, 200), unit='min')),
+                    np.arange(200) + offset)
+        for name, offset in [('sensors', 0), ('energy', 1000), ('equipment', 2000)]
+    }
+    merged = list(merge_sources(frames))
+
+    expected = pd.concat([df.assign(source=name, rank=rank) for rank, (name, df) in enumerate(frames.items())])
+    expected = expected.sort_values(['timestamp', 'rank'], kind='stable')
+    assert [source for _, source, _ in merged] == expected['source'].tolist()
+    assert [data['value'] for _, _, data in merged] == expected['value'].tolist()
+    times = [ts for ts, _, _ in merged]
+    assert times == sorted(times)
+
+
+def test_unlimited_replay_counts_events():
+    frames = {'a': frame(['2024-01-01 00:00', '2024-01-01 00:02'], [1, 2]),
+              'b': frame(['2024-01-01 00:01'], [3]),
+              'c': frame([], [])}
+    sink = ListSink()
+    report = HistoricalReplayer(frames, speed=None).run(sink)
+
+    assert report['events'] == 3 and report['by_source'] == {'a': 2, 'b': 1}
+    assert [event['data']['value'] for event in sink.events] == [1, 3, 2]
+    assert sink.events[1]['timestamp'] == pd.Timestamp('2024-01-01 00:01')
+
+    counting = CountingSink()
+    assert HistoricalReplayer(frames, speed=None).run(counting, limit=2)['events'] == 2
+    assert counting.counts == {'a': 1, 'b': 1}
+
+
+def test_speed_scales_wall_time():
+    # 10 минут истории при ускорении 6000x - 0.1 с
+    frames = {'a': frame(pd.date_range('2024-01-01', periods=11, freq='1min'), range(11))}
+    report = HistoricalReplayer(frames, speed=6000).run(ListSink())
+    assert report['elapsed_sec'] == pytest.approx(0.1, abs=0.05)
+    assert report['max_lag_sec'] < 0.05
+
+
+def test_speed_must_be_positive():
+    with pytest.raises(ValueError):
+        HistoricalReplayer({}, speed=0)
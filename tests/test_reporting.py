@@ -0,0 +1,106 @@
+"""Проверка потоковых отчетов: чанки и архив против расчета по всему периоду"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.archive import write_archive
+from src.data_processor import SENSOR_METRICS
+from src.reporting import PERIOD_REPORTS_DIR, ReportAccumulator, build_reports, iter_archive_chunks, iter_csv_chunks
+
+
+def sensors(n: int = 3000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='2min'),
+        'sensor_id': [f'S{i % 4}' for i in range(n)],
+        'temperature': rng.normal(23, 2, n).round(2),
+        'humidity': rng.uniform(30, 70, n).round(2),
+        'co2': rng.normal(800, 150, n).round(1),
+        'light_level': rng.uniform(0, 800, n).round(1),
+        'zone': rng.choice(['zone_A', 'zone_B'], n)
+    })
+    df.loc[rng.choice(n, n // 50, replace=False), 'co2'] = np.nan
+    return df
+
+
+def energy(days: int = 4) -> pd.DataFrame:
+    timestamps = pd.date_range('2024-01-01', periods=days * 48, freq='30min')
+    return pd.DataFrame({'timestamp': timestamps, 'electricity_kwh': np.where(timestamps.hour == 14, 90.0, 40.0)})
+
+
+class ConstantModel:
+    def predict(self, features):
+        return np.full(len(features), 50.0)
+
+
+def test_csv_chunks_select_period_and_stop_early(tmp_path):
+    df = sensors(200)
+    path = tmp_path / 'sensors.csv'
+    df.to_csv(path, index=False)
+    # Испорченный хвост после конца периода не читается для упорядоченного файла
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('broken,"line\n')
+
+    start, end = df['timestamp'].iloc[37], df['timestamp'].iloc[120]
+    chunks = list(iter_csv_chunks(str(path), start, end, chunksize=25))
+    result = pd.concat(chunks, ignore_index=True)
+    assert result['timestamp'].tolist() == df['timestamp'].iloc[37:120].tolist()
+
+
+def test_chunked_report_equals_single_pass():
+    df, en = sensors(), energy()
+    whole = ReportAccumulator(model=ConstantModel()).update_sensors(df).update_energy(en)
+
+    sensor_bounds, energy_bounds = np.linspace(0, len(df), 6).astype(int), np.linspace(0, len(en), 6).astype(int)
+    parts = [ReportAccumulator(model=ConstantModel())
+             .update_sensors(df.iloc[sensor_bounds[i]:sensor_bounds[i + 1]])
+             .update_energy(en.iloc[energy_bounds[i]:energy_bounds[i + 1]]) for i in range(5)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    for accumulator in (whole, merged):
+        summary = accumulator.summary()
+        np.testing.assert_allclose([summary[col] for col in SENSOR_METRICS], df[SENSOR_METRICS].mean(), rtol=1e-12)
+        assert summary['peak_hour'] == 14
+        assert summary['electricity_kwh'] == pytest.approx(en['electricity_kwh'].mean())
+        metrics = accumulator.model_metrics()
+        assert metrics['n'] == len(en)
+        assert metrics['mae'] == pytest.approx(np.abs(en['electricity_kwh'] - 50).mean())
+        assert accumulator._period() == f"{df['timestamp'].iloc[0]:%Y-%m-%d %H:%M} - {df['timestamp'].iloc[-1]:%Y-%m-%d %H:%M}"
+
+    pd.testing.assert_frame_equal(merged.recommendations(), whole.recommendations())
+    merged_anomalies, whole_anomalies = merged.temperature_anomalies(), whole.temperature_anomalies()
+    assert merged_anomalies['count'] == whole_anomalies['count']
+    assert merged_anomalies['upper'] == pytest.approx(whole_anomalies['upper'], rel=1e-12)
+
+
+def test_archive_chunks_match_csv(tmp_path):
+    df = sensors()
+    archive = write_archive(df, str(tmp_path / 'archive'))
+    start, end = '2024-01-02 03:00', '2024-01-03 10:00'
+    chunks = list(iter_archive_chunks(archive, start, end, chunksize=400))
+    result = pd.concat(chunks, ignore_index=True)
+
+    expected = df[(df['timestamp'] >= start) & (df['timestamp'] < end)].reset_index(drop=True)
+    assert max(len(chunk) for chunk in chunks) == 400
+    np.testing.assert_array_equal(result['timestamp'].to_numpy(), expected['timestamp'].to_numpy())
+    assert result['zone'].tolist() == expected['zone'].tolist()
+    np.testing.assert_allclose(result[SENSOR_METRICS].to_numpy(), expected[SENSOR_METRICS].to_numpy(), equal_nan=True)
+
+
+def test_build_reports_writes_period_files(tmp_path):
+    assert PERIOD_REPORTS_DIR == os.path.join('reports', 'period')
+    output = tmp_path / 'period'
+    build_reports(iter([sensors()]), iter([energy()]), output_dir=str(output), model=ConstantModel())
+
+    assert sorted(os.listdir(output)) == ['analysis_report.csv', 'ml_final_report.txt',
+                                          'recommendations_report.txt', 'system_recommendations.csv']
+    mae = np.abs(energy()['electricity_kwh'] - 50).mean()
+    assert f'MAE = {mae:.2f} кВт·ч' in (output / 'ml_final_report.txt').read_text(encoding='utf-8')
+
+    with pytest.raises(ValueError):
+        build_reports(iter([]), output_dir=str(tmp_path / 'empty'))
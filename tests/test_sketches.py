@@ -0,0 +1,84 @@
+"""Проверка KLL-скетчей: ошибка ранга против точных квантилей np.quantile"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.sketches import ComfortPercentiles, KLLSketch, normalized_rank_error, quantile_label
+
+
+QS = np.linspace(0.01, 0.99, 99)
+
+
+def rank_errors(values: np.ndarray, sketch: KLLSketch) -> np.ndarray:
+    """|доля значений <= оценки - q| по точному отсортированному ряду"""
+    ordered = np.sort(values)
+    estimates = sketch.quantiles(QS)
+    low = np.searchsorted(ordered, estimates, side='left') / len(ordered)
+    high = np.searchsorted(ordered, estimates, side='right') / len(ordered)
+    # Для повторяющихся значений подходит любой ранг внутри [low, high]
+    return np.maximum(0, np.maximum(low - QS, QS - high))
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('distribution', ['normal', 'lognormal', 'rounded'])
+def test_quantiles_within_rank_error(seed, distribution):
+    rng = np.random.default_rng(seed)
+    values = {'normal': rng.normal(22, 2, 100_000),
+              'lognormal': rng.lognormal(6, 0.5, 100_000),
+              'rounded': np.round(rng.normal(600, 100, 100_000), -1)}[distribution]
+    sketch = KLLSketch(k=200, seed=seed).update(values)
+
+    assert rank_errors(values, sketch).max() <= normalized_rank_error(200)
+    assert sketch.n == len(values)
+    assert sketch.retained < 4 * 200
+
+
+def test_merged_sketches_within_rank_error():
+    rng = np.random.default_rng(7)
+    parts = [rng.normal(loc, 3, 20_000) for loc in (18, 22, 26, 30)]
+    merged = KLLSketch(k=200, seed=0).update(parts[0])
+    for i, part in enumerate(parts[1:], start=1):
+        merged.merge(KLLSketch(k=200, seed=i).update(part))
+
+    values = np.concatenate(parts)
+    assert merged.n == len(values)
+    assert rank_errors(values, merged).max() <= normalized_rank_error(200)
+    assert merged.quantile(0) == values.min() and merged.quantile(1) == values.max()
+
+
+def test_small_input_is_exact():
+    values = np.array([5.0, 1.0, np.nan, 3.0, 2.0, 4.0])
+    sketch = KLLSketch(k=200).update(values)
+    assert sketch.n == 5
+    assert sketch.quantiles([0.2, 0.5, 1.0]).tolist() == [1.0, 3.0, 5.0]
+    assert sketch.rank(3.0) == pytest.approx(0.6)
+    assert np.isnan(KLLSketch().quantile(0.5))
+
+
+def test_comfort_percentiles_labels_and_values():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    sensors = pd.DataFrame({
+        'timestamp': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 7 * 24 * 60, n), unit='min'),
+        'zone': rng.choice(['zone_A', 'zone_B'], n),
+        'temperature': rng.normal(22, 2, n),
+        'humidity': rng.uniform(30, 70, n),
+        'co2': rng.normal(700, 100, n)
+    })
+    comfort = ComfortPercentiles(seed=1).update(sensors.iloc[:n // 2]).merge(
+        ComfortPercentiles(seed=2).update(sensors.iloc[n // 2:]))
+
+    by_zone = comfort.by_zone()
+    assert list(by_zone.columns[:3]) == [f'temperature_{quantile_label(q)}' for q in (0.05, 0.5, 0.95)]
+    exact = sensors.groupby('zone')['temperature'].quantile(0.5)
+    np.testing.assert_allclose(by_zone['temperature_p50'], exact, atol=0.1)
+
+    building = comfort.building_percentiles()
+    assert set(building['co2']) == {'p5', 'p50', 'p95'}
+    assert building['co2']['p95'] == pytest.approx(np.quantile(sensors['co2'], 0.95), rel=0.01)
+    assert comfort.by_zone_hour().index.names == ['zone', 'hour']
+
+
+def test_quantile_label():
+    assert [quantile_label(q) for q in (0.05, 0.5, 0.95, 0.999)] == ['p5', 'p50', 'p95', 'p99.9']
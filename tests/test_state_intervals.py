@@ -0,0 +1,77 @@
+"""Проверка интервального хранения статусов против поминутного ряда"""
+
+import numpy as np
+import pandas as pd
+
+from src.state_intervals import StateIntervals, encode_equipment, load_intervals, save_intervals
+
+
+def status_series(n: int = 5000, seed: int = 0) -> pd.DataFrame:
+    """Поминутный ряд с длинными сериями одинаковых состояний и разрывами в данных"""
+    rng = np.random.default_rng(seed)
+    runs = rng.integers(1, 120, n)
+    states = np.repeat(rng.choice(['cooling', 'heating', 'idle', 'off'], n), runs)[:n]
+    timestamps = pd.date_range('2024-03-01', periods=n, freq='1min')
+    keep = np.ones(n, dtype=bool)
+    keep[1000:1060] = False
+    keep[3000:3001] = False
+    return pd.DataFrame({'timestamp': timestamps[keep], 'hvac_status': states[keep]})
+
+
+def test_encode_decode_round_trip():
+    df = status_series()
+    shuffled = df.sample(frac=1, random_state=1)
+    intervals = StateIntervals.encode(shuffled['timestamp'], shuffled['hvac_status'])
+    decoded = intervals.decode()
+
+    np.testing.assert_array_equal(decoded['timestamp'].to_numpy(), df['timestamp'].to_numpy())
+    np.testing.assert_array_equal(decoded['state'].to_numpy(), df['hvac_status'].to_numpy())
+    # Интервалов не больше, чем смен состояния плюс разрывов
+    changes = (df['hvac_status'] != df['hvac_status'].shift()).sum()
+    assert len(intervals) <= changes + 2
+
+
+def test_queries_match_naive_minute_scan():
+    df = status_series()
+    intervals = StateIntervals.encode(df['timestamp'], df['hvac_status'])
+    start, end = pd.Timestamp('2024-03-01 10:07'), pd.Timestamp('2024-03-03 05:31')
+    window = df[(df['timestamp'] >= start) & (df['timestamp'] < end)]
+
+    durations = intervals.durations(start, end)
+    expected = window['hvac_status'].value_counts()
+    for state in intervals.categories:
+        assert durations[state] == expected.get(state, 0)
+    assert intervals.total_minutes('cooling', start, end) == expected.get('cooling', 0)
+    assert intervals.duty_cycle('idle', start, end) == expected.get('idle', 0) / len(window)
+    assert intervals.total_minutes('unknown') == 0.0
+
+    codes = window['hvac_status'].to_numpy()
+    assert intervals.transitions(start, end) == int((codes[1:] != codes[:-1]).sum())
+
+
+def test_state_at_matches_lookup_and_gaps():
+    df = status_series()
+    intervals = StateIntervals.encode(df['timestamp'], df['hvac_status'])
+    probes = df.sample(200, random_state=2)
+
+    np.testing.assert_array_equal(intervals.state_at(probes['timestamp'] + pd.Timedelta('30s')),
+                                  probes['hvac_status'].to_numpy())
+    assert intervals.state_at(df['timestamp'].iloc[10]) == df['hvac_status'].iloc[10]
+    # Внутри разрыва и за пределами ряда состояние неизвестно
+    assert intervals.state_at(pd.Timestamp('2024-03-01') + pd.Timedelta(minutes=1030)) is None
+    assert intervals.state_at('2024-02-01') is None
+
+
+def test_save_load_equipment(tmp_path):
+    df = status_series()
+    df['lighting_status'] = np.where(df['timestamp'].dt.hour.between(8, 19), 'on', 'off')
+    df['ventilation_status'] = 'low'
+    series = encode_equipment(df)
+    path = tmp_path / 'intervals.npz'
+    save_intervals(series, str(path))
+    loaded = load_intervals(str(path))
+
+    assert set(loaded) == set(series)
+    assert len(loaded['ventilation_status']) == 3
+    for name, intervals in series.items():
+        pd.testing.assert_frame_equal(loaded[name].to_frame(), intervals.to_frame())
@@ -0,0 +1,86 @@
+"""Проверка оконной агрегации по времени событий против resample по полному ряду"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.streaming import WindowedAggregator, apply_corrections
+
+
+def readings(n: int = 2000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'timestamp': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 2 * 24 * 3600, n)), unit='s'),
+        'temperature': rng.normal(22, 2, n),
+        'co2': rng.normal(600, 50, n)
+    })
+    df.loc[rng.choice(n, 50, replace=False), 'co2'] = np.nan
+    return df
+
+
+AGGREGATIONS = {'temperature': 'mean', 'co2': 'max'}
+
+
+def expected_windows(df: pd.DataFrame) -> pd.DataFrame:
+    grouped = df.set_index('timestamp').resample('30min')
+    result = pd.DataFrame({'temperature': grouped['temperature'].mean(), 'co2': grouped['co2'].max()})
+    return result[grouped['temperature'].count() > 0]
+
+
+def split(df: pd.DataFrame, parts: int):
+    bounds = np.linspace(0, len(df), parts + 1).astype(int)
+    return [df.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def run(aggregator: WindowedAggregator, batches) -> pd.DataFrame:
+    results = [aggregator.add_batch(batch) for batch in batches] + [aggregator.flush()]
+    return apply_corrections(pd.concat([r for r in results if len(r)], ignore_index=True))
+
+
+def test_in_order_stream_matches_resample():
+    df = readings()
+    result = run(WindowedAggregator('30min', AGGREGATIONS), split(df, 40))
+    expected = expected_windows(df)
+
+    assert (result['revision'] == 0).all()
+    np.testing.assert_array_equal(result['timestamp'].to_numpy(), expected.index.to_numpy())
+    np.testing.assert_allclose(result[['temperature', 'co2']].to_numpy(dtype=float), expected.to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_out_of_order_within_lateness_matches_resample(seed):
+    df = readings(seed=seed)
+    rng = np.random.default_rng(seed)
+    # Задержка доставки до 20 минут, окно принимает опоздания до 30 минут
+    delivery = df['timestamp'] + pd.to_timedelta(rng.integers(0, 20 * 60, len(df)), unit='s')
+    shuffled = df.iloc[np.argsort(delivery.to_numpy(), kind='stable')]
+
+    aggregator = WindowedAggregator('30min', AGGREGATIONS, allowed_lateness='30min')
+    result = run(aggregator, split(shuffled, 200))
+    expected = expected_windows(df)
+
+    assert aggregator.stats['dropped_late'] == 0
+    np.testing.assert_array_equal(result['timestamp'].to_numpy(), expected.index.to_numpy())
+    np.testing.assert_allclose(result[['temperature', 'co2']].to_numpy(dtype=float), expected.to_numpy(), rtol=1e-12)
+
+
+def test_window_emitted_on_watermark_then_corrected_then_dropped():
+    aggregator = WindowedAggregator('30min', {'temperature': 'mean'}, allowed_lateness='30min')
+    batch = lambda times, values: pd.DataFrame({'timestamp': pd.to_datetime(times), 'temperature': values})
+
+    assert len(aggregator.add_batch(batch(['2024-01-01 00:05', '2024-01-01 00:20'], [20.0, 22.0]))) == 0
+    first = aggregator.add_batch(batch(['2024-01-01 00:31'], [25.0]))
+    assert first[['temperature', 'revision']].values.tolist() == [[21.0, 0]]
+
+    correction = aggregator.add_batch(batch(['2024-01-01 00:10', '2024-01-01 00:45'], [24.0, 25.0]))
+    assert correction[['temperature', 'revision']].values.tolist() == [[22.0, 1]]
+
+    # Водяной знак 01:05 закрывает окно 00:00 окончательно
+    aggregator.add_batch(batch(['2024-01-01 01:05'], [25.0]))
+    assert len(aggregator.add_batch(batch(['2024-01-01 00:15'], [0.0]))) == 0
+    assert aggregator.stats['dropped_late'] == 1
+
+
+def test_unsupported_aggregation():
+    with pytest.raises(ValueError):
+        WindowedAggregator(aggregations={'temperature': 'median'})
@@ -0,0 +1,76 @@
+"""Проверка компилируемых шаблонов против string.Template и экранирования в дашборде"""
+
+import string
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from create_dashboard import generate_anomalies_table, generate_recommendations_list
+from src.templating import (CompiledTemplate, escape_column, format_column, format_datetime_column, load_template,
+                            page_numbers, pagination_controls)
+
+
+@pytest.mark.parametrize('source', [
+    '',
+    'plain text',
+    '${a}',
+    '<td>${a}</td><td>$b</td>',
+    '${a}${a}$$${b} costs $$5',
+    '<div class="${cls}">\n  ${body}\n</div>\n'
+])
+def test_render_matches_string_template(source):
+    context = {'a': 1.5, 'b': '<x>', 'cls': 'badge', 'body': 'текст'}
+    assert CompiledTemplate(source).render(context) == string.Template(source).substitute(context)
+
+
+def test_missing_and_invalid_fields():
+    with pytest.raises(KeyError):
+        CompiledTemplate('${a} ${b}').render({'a': 1})
+    with pytest.raises(KeyError):
+        CompiledTemplate('${a}').render_rows({'b': ['1']})
+    with pytest.raises(ValueError):
+        CompiledTemplate('price: $5')
+
+
+def test_render_rows_equals_row_by_row_render():
+    template = load_template('anomaly_row.html')
+    rng = np.random.default_rng(0)
+    columns = {name: [f'{name}{value}' for value in rng.integers(0, 100, 50)] for name in template.fields}
+
+    expected = ''.join(template.render({name: values[i] for name, values in columns.items()}) for i in range(50))
+    assert template.render_rows(columns) == expected
+    assert template.render_rows({name: [] for name in template.fields}) == ''
+
+
+def test_column_formatting_and_pages():
+    assert format_column([1.25, np.nan, -3.0], '.1f') == ['1.2', '—', '-3.0']
+    assert escape_column(['<b>', 'a & b', 5]) == ['&lt;b&gt;', 'a &amp; b', '5']
+    assert format_datetime_column(pd.to_datetime(['2024-03-01 08:05', None]), '%d.%m %H:%M') == ['01.03 08:05', '—']
+    assert page_numbers(5, 2) == ['1', '1', '2', '2', '3']
+    assert page_numbers(3) == ['1', '1', '1']
+    assert pagination_controls('t', 10, 0) == '' and pagination_controls('t', 10, 10) == ''
+    assert 't' in pagination_controls('t', 11, 10)
+
+
+def test_dashboard_tables_escape_user_text():
+    anomalies = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-01 10:00', '2024-01-01 11:00']),
+        'temperature': [30.0, 15.0],
+        'anomaly_type': ['<script>alert(1)</script>', 'слишком холодно'],
+        'deviation': [2.0, -3.0]
+    })
+    html = generate_anomalies_table(anomalies, limit=None, page_size=1)
+    assert '<script>' not in html and '&lt;script&gt;alert(1)&lt;/script&gt;' in html
+    assert html.count('data-page="2"') == 1 and '❄️' in html and '🔥' in html
+
+    recommendations = pd.DataFrame({
+        'Параметр': ['CO2'],
+        'zone': ['zone_<A>'],
+        'Приоритет': ['Высокий'],
+        'Рекомендация': ['Открыть "окна" & двери'],
+        'Статус': ['Высокий']
+    })
+    html = generate_recommendations_list(recommendations)
+    assert 'CO2 · zone_&lt;A&gt;' in html
+    assert 'Открыть &quot;окна&quot; &amp; двери' in html
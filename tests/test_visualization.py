@@ -0,0 +1,104 @@
+"""Проверка прореживания рядов против наивных реализаций по корзинам"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.visualization import decimate, decimate_view, lttb_indices, minmax_indices, select_view
+
+
+def series(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    y = np.sin(x / 50) * 10 + rng.normal(0, 1, n)
+    return x, y
+
+
+def naive_lttb(x, y, n_out):
+    """Классический LTTB: корзины по (n - 2) / (n_out - 2) точек"""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    selected, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        areas = [abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        selected.append(a)
+    return np.array(selected + [n - 1])
+
+
+def test_lttb_matches_reference_and_keeps_endpoints():
+    x, y = series(1002)
+    indices = lttb_indices(x, y, 102)
+    np.testing.assert_array_equal(indices, naive_lttb(x, y, 102))
+
+    x, y = series(5000, seed=1)
+    indices = lttb_indices(x, y, 333)
+    assert len(indices) == 333
+    assert indices[0] == 0 and indices[-1] == 4999
+    assert np.all(np.diff(indices) > 0)
+
+
+@pytest.mark.parametrize('n_buckets', [1, 7, 100, 499])
+def test_minmax_matches_reference_per_bucket(n_buckets):
+    x, y = series(3000, seed=n_buckets)
+    y[::97] = np.nan
+    indices = minmax_indices(x, y, n_buckets)
+
+    valid = np.flatnonzero(~np.isnan(y))
+    bucket = np.minimum(((x[valid] - x[valid][0]) / (x[valid][-1] - x[valid][0]) * n_buckets).astype(int),
+                        n_buckets - 1)
+    expected = set()
+    for b in np.unique(bucket):
+        members = valid[bucket == b]
+        expected.update([members[np.argmin(y[members])], members[np.argmax(y[members])]])
+
+    assert indices.tolist() == sorted(expected)
+    assert len(indices) <= 2 * n_buckets
+    assert np.nanargmax(y) in indices and np.nanargmin(y) in indices
+
+
+def test_short_series_and_nan_are_passed_through():
+    y = np.array([1.0, np.nan, 3.0])
+    assert minmax_indices(np.arange(3), y, 10).tolist() == [0, 2]
+    assert lttb_indices(np.arange(3), y, 10).tolist() == [0, 2]
+
+
+def test_decimate_budget_and_kept_points():
+    timestamps = pd.date_range('2024-01-01', periods=50_000, freq='2min').to_numpy()
+    _, y = series(50_000, seed=3)
+    keep = np.zeros(50_000, dtype=bool)
+    keep[[10, 12, 25_000]] = True
+
+    for method in ('minmax', 'lttb'):
+        plain = decimate(timestamps, y, budget=500, method=method)
+        assert len(plain) <= 500
+        kept = decimate(timestamps, y, budget=500, method=method, keep=keep)
+        assert set(np.flatnonzero(keep)) <= set(kept)
+        assert len(kept) <= 503
+
+    with pytest.raises(ValueError):
+        decimate(timestamps, y, method='every_nth')
+
+
+def test_decimate_view_selects_period():
+    timestamps = pd.date_range('2024-01-01', periods=10 * 720, freq='2min')
+    df = pd.DataFrame({'timestamp': timestamps, 'temperature': series(len(timestamps))[1]})
+    shuffled = df.sample(frac=1, random_state=0)
+    # Маска задана в порядке строк неотсортированного df
+    marked = [timestamps[-100], timestamps[0]]
+    keep = shuffled['timestamp'].isin(marked).to_numpy()
+
+    day = select_view(df, 'day')
+    assert len(day) == 720 and day['timestamp'].iloc[-1] == timestamps[-1]
+
+    rows, total = decimate_view(shuffled, 'temperature', 'week', budget=200, keep=keep)
+    assert total == 7 * 720
+    assert rows['timestamp'].is_monotonic_increasing
+    assert rows['timestamp'].iloc[0] > timestamps[-1] - pd.Timedelta('7D')
+    week = df[df['timestamp'] > timestamps[-1] - pd.Timedelta('7D')]
+    assert rows['temperature'].max() == week['temperature'].max()
+    assert rows['temperature'].min() == week['temperature'].min()
+    assert timestamps[-100] in set(rows['timestamp']) and timestamps[0] not in set(rows['timestamp'])